@@ -0,0 +1,100 @@
+"""
+Inference Benchmark - Dynamic Batching
+Compares per-request predict_proba calls against the coalescing batcher
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import joblib
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sklearn.ensemble import RandomForestClassifier
+from benchmarks.bench_privbayes import make_smart_grid_frame
+from pipelines.inference_pipeline import InferencePipeline
+
+def train_model(directory, n_rows=20_000):
+    """Fit a forest on smart-grid shaped data and save it like TrainingPipeline"""
+    df = make_smart_grid_frame(n_rows)
+    features = [c for c in df.select_dtypes(include=[np.number]).columns if c != 'Transformer Fault']
+    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    model.fit(df[features], df['Transformer Fault'])
+    joblib.dump(model, Path(directory) / 'production_model.pkl')
+    joblib.dump(features, Path(directory) / 'feature_names.pkl')
+    return df
+
+def make_requests(df, n_requests, max_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    records = df.to_dict('records')
+    requests = []
+    for size in rng.integers(1, max_rows + 1, n_requests):
+        start = rng.integers(0, len(records) - size)
+        requests.append(records[start:start + size])
+    return requests
+
+def run_direct(pipeline, requests, clients):
+    """Every request calls predict_proba on its own"""
+    latencies = []
+
+    def call(request):
+        start = time.perf_counter()
+        pipeline.predict_proba(request)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(call, requests))
+    elapsed = time.perf_counter() - start
+    latencies = np.asarray(latencies) * 1000
+    return {
+        'mode': 'direct',
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+        'rows_per_sec': round(sum(len(r) for r in requests) / elapsed),
+        'mean_batch_rows': round(np.mean([len(r) for r in requests]), 1)
+    }
+
+def run_batched(pipeline, requests, clients):
+    """Requests go through the dynamic batcher"""
+    with pipeline:
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(pipeline.infer, requests))
+        stats = pipeline.stats()
+    return {
+        'mode': 'batched',
+        'p50_ms': round(stats['p50_ms'], 2),
+        'p99_ms': round(stats['p99_ms'], 2),
+        'rows_per_sec': round(stats['rows_per_sec']),
+        'mean_batch_rows': round(stats['mean_batch_rows'], 1)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched inference")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--max-rows', type=int, default=16, help="Rows per request (1..max)")
+    parser.add_argument('--clients', type=int, default=32, help="Concurrent client threads")
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("INFERENCE BENCHMARK - Dynamic Batching")
+    print("="*80)
+    with tempfile.TemporaryDirectory() as directory:
+        df = train_model(directory)
+        requests = make_requests(df, args.requests, args.max_rows)
+        pipeline = InferencePipeline(
+            Path(directory) / 'production_model.pkl',
+            Path(directory) / 'feature_names.pkl',
+            max_wait_ms=args.max_wait_ms
+        )
+        summary = pd.DataFrame([
+            run_direct(pipeline, requests, args.clients),
+            run_batched(pipeline, requests, args.clients)
+        ])
+    print("\n" + summary.to_string(index=False))
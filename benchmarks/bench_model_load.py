@@ -0,0 +1,101 @@
+"""
+Model Load Benchmark - Registry Cold Starts
+Cold-load latency and memory per registered model, memory-mapped vs fully read
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import psutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sklearn.ensemble import HistGradientBoostingClassifier, IsolationForest, RandomForestClassifier
+from benchmarks.bench_privbayes import make_smart_grid_frame
+from src.models.registry.model_registry import ModelRegistry
+
+def register_models(registry, n_rows=100_000):
+    """Fit one of each model family on smart-grid shaped data and register it"""
+    df = make_smart_grid_frame(n_rows)
+    features = [c for c in df.select_dtypes(include=[np.number]).columns if c != 'Transformer Fault']
+    X, y = df[features], df['Transformer Fault']
+    models = {
+        'random_forest': RandomForestClassifier(n_estimators=200, n_jobs=-1, random_state=42),
+        'hist_gradient_boosting': HistGradientBoostingClassifier(max_iter=300, random_state=42),
+        'isolation_forest': IsolationForest(n_estimators=200, random_state=42)
+    }
+    for name, model in models.items():
+        start = time.perf_counter()
+        model.fit(X, y)
+        registry.register(name, model, features=features,
+                          training_seconds=round(time.perf_counter() - start, 2))
+        registry.promote(name)
+
+def evict(path):
+    """Drop a file from the page cache so the next read comes from disk"""
+    if hasattr(os, 'posix_fadvise'):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+def load_once(root, name, mmap):
+    """Runs in a fresh process: time one load and the memory it adds"""
+    registry = ModelRegistry(root)
+    manifest = registry.manifest(name)
+    evict(registry.root / name / manifest['version'] / 'model.joblib')
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    start = time.perf_counter()
+    model, _ = registry.load(name, mmap=mmap)
+    seconds = time.perf_counter() - start
+    return seconds, (process.memory_info().rss - rss) / 1e6
+
+def bench(root, repeats):
+    registry = ModelRegistry(root)
+    rows = []
+    for name in registry.models():
+        manifest = registry.manifest(name)
+        for mmap in (True, False):
+            runs = []
+            for _ in range(repeats):
+                # A new process per load: nothing is cached in the interpreter
+                with multiprocessing.Pool(1) as pool:
+                    runs.append(pool.apply(load_once, (str(root), name, mmap)))
+            seconds, rss = np.median(np.asarray(runs), axis=0)
+            rows.append({
+                'model': name,
+                'version': manifest['version'],
+                'artifact_mb': round(manifest['artifact_bytes'] / 1e6, 1),
+                'mmap': mmap,
+                'cold_load_ms': round(seconds * 1000, 1),
+                'rss_mb': round(rss, 1)
+            })
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark cold loads from the model registry")
+    parser.add_argument('--registry', default=None,
+                        help="Existing registry to measure; by default fresh models are trained")
+    parser.add_argument('--rows', type=int, default=100_000, help="Training rows for fresh models")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("MODEL LOAD BENCHMARK - Registry Cold Starts")
+    print("="*80)
+    if args.registry:
+        summary = bench(args.registry, args.repeats)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            register_models(ModelRegistry(directory), args.rows)
+            summary = bench(directory, args.repeats)
+    print("\n" + summary.to_string(index=False))
@@ -0,0 +1,95 @@
+"""
+PrivBayes Benchmark - Smart Grid Sized Inputs
+Times network learning and synthetic sampling on smart-grid shaped data
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.security.anonymization.privbayes import PrivBayes
+
+SMART_GRID_PATH = 'data/raw/smart_grid/smart_grid_dataset.csv'
+
+def make_smart_grid_frame(n_rows, seed=42):
+    """Generate data with the smart grid dataset schema and some correlation"""
+    rng = np.random.default_rng(seed)
+    voltage = rng.normal(230, 10, n_rows)
+    current = rng.gamma(4, 5, n_rows)
+    power = voltage * current / 1000 + rng.normal(0, 0.5, n_rows)
+    solar = np.clip(rng.normal(20, 15, n_rows), 0, None)
+    wind = np.clip(rng.normal(15, 10, n_rows), 0, None)
+    return pd.DataFrame({
+        'Timestamp': pd.date_range('2024-01-01', periods=n_rows, freq='min').astype(str),
+        'Voltage (V)': voltage,
+        'Current (A)': current,
+        'Power Consumption (kW)': power,
+        'Reactive Power (kVAR)': power * rng.uniform(0.1, 0.5, n_rows),
+        'Power Factor': rng.uniform(0.7, 1.0, n_rows),
+        'Solar Power (kW)': solar,
+        'Wind Power (kW)': wind,
+        'Grid Supply (kW)': np.clip(power - solar - wind, 0, None),
+        'Voltage Fluctuation (%)': rng.normal(0, 2, n_rows),
+        'Overload Condition': (power > np.quantile(power, 0.95)).astype(int),
+        'Transformer Fault': (rng.random(n_rows) < 0.02).astype(int),
+        'Temperature (°C)': rng.normal(25, 8, n_rows),
+        'Humidity (%)': rng.uniform(20, 90, n_rows),
+        'Electricity Price (USD/kWh)': rng.choice([0.12, 0.18, 0.25], n_rows),
+        'Predicted Load (kW)': power + rng.normal(0, 1, n_rows),
+    })
+
+def load_input(n_rows, input_path):
+    """Resample the real smart grid file to n_rows, or synthesize the schema"""
+    if input_path and Path(input_path).exists():
+        df = pd.read_csv(input_path)
+        return df.sample(n=n_rows, replace=len(df) < n_rows, random_state=42).reset_index(drop=True)
+    return make_smart_grid_frame(n_rows)
+
+def run_benchmark(rows, degree=2, epsilon=1.0, n_jobs=None, input_path=SMART_GRID_PATH):
+    results = []
+    for n_rows in rows:
+        df = load_input(n_rows, input_path)
+        numeric = df.select_dtypes(include=[np.number]).columns.tolist()
+        # Benchmark input is not private, so its observed ranges serve as the declared domains
+        bounds = {col: (df[col].min(), df[col].max()) for col in numeric}
+
+        privbayes = PrivBayes(epsilon=epsilon, seed=42)
+        start = time.perf_counter()
+        privbayes.fit(df[numeric], degree=degree, bounds=bounds, n_jobs=n_jobs)
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        synthetic = privbayes.sample(n_rows)
+        sample_seconds = time.perf_counter() - start
+
+        results.append({
+            'rows': n_rows,
+            'attributes': len(numeric),
+            'degree': degree,
+            'fit_seconds': round(fit_seconds, 3),
+            'sample_seconds': round(sample_seconds, 3),
+            'rows_per_sec': round(n_rows / (fit_seconds + sample_seconds)),
+            'synthetic_rows': len(synthetic)
+        })
+        print(f"{n_rows:>10,} rows | fit {fit_seconds:7.2f}s | sample {sample_seconds:7.2f}s")
+    return pd.DataFrame(results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark PrivBayes synthesis")
+    parser.add_argument('--rows', type=int, nargs='+', default=[50_000, 500_000, 2_000_000])
+    parser.add_argument('--degree', type=int, default=2)
+    parser.add_argument('--epsilon', type=float, default=1.0)
+    parser.add_argument('--n-jobs', type=int, default=None)
+    parser.add_argument('--input', default=SMART_GRID_PATH)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("PRIVBAYES BENCHMARK - Smart Grid")
+    print("="*80)
+    summary = run_benchmark(args.rows, args.degree, args.epsilon, args.n_jobs, args.input)
+    print("\n" + summary.to_string(index=False))
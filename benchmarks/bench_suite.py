@@ -0,0 +1,251 @@
+"""
+Benchmark Suite - Anonymization, Detection and Training Hot Paths
+Times each pipeline stage on synthetic data at fixed sizes and flags
+regressions against a saved baseline
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+CASES = ['pseudonym', 'privbayes', 'anonymize', 'detection', 'training']
+RESULTS_PATH = 'results/benchmarks/latest.json'
+BASELINE_PATH = 'results/benchmarks/baseline.json'
+
+FIRST_NAMES = np.array(['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael',
+                        'Linda', 'David', 'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan'])
+LAST_NAMES = np.array(['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller',
+                       'Davis', 'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Wilson'])
+DEPARTMENTS = np.array(['IT', 'HR', 'Finance', 'Sales', 'Operations'])
+
+def make_dataset(n_rows, seed=42):
+    """
+    Synthetic records with the sample data schema plus ssn/phone
+    Generated column-wise so 10M rows take seconds, not the hours Faker would.
+    """
+    rng = np.random.default_rng(seed)
+    ids = pd.Series(rng.permutation(n_rows)).astype(str)
+    first = pd.Series(FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), n_rows)])
+    last = pd.Series(LAST_NAMES[rng.integers(0, len(LAST_NAMES), n_rows)])
+    ssn = rng.integers(100_000_000, 999_999_999, n_rows).astype(str)
+    return pd.DataFrame({
+        'name': first + ' ' + last,
+        'email': 'user' + ids + '@example.com',
+        'ssn': pd.Series(ssn).str.slice(0, 3) + '-' + pd.Series(ssn).str.slice(3, 5)
+               + '-' + pd.Series(ssn).str.slice(5),
+        'phone': pd.Series(rng.integers(2_000_000_000, 9_999_999_999, n_rows)).astype(str),
+        'age': rng.integers(18, 80, n_rows),
+        'salary': rng.lognormal(11, 0.4, n_rows).round(),
+        'department': DEPARTMENTS[rng.integers(0, len(DEPARTMENTS), n_rows)],
+        'login_count': rng.poisson(20, n_rows),
+        'transaction_amount': rng.gamma(2, 150, n_rows).round(2),
+    })
+
+def _paths(n_rows):
+    return {
+        'raw': Path(f'data/raw/bench_{n_rows}.parquet'),
+        'anonymized': Path(f'data/anonymized/bench_{n_rows}.parquet'),
+        'detected': Path(f'results/tables/bench_{n_rows}.parquet')
+    }
+
+def bench_pseudonym(n_rows, max_calls):
+    """PseudonymManager.create_pseudonym, one call per value inside one batch"""
+    from src.data.pseudonym_manager import PseudonymManager
+    from src.data.storage import read_table
+    values = read_table(_paths(n_rows)['raw'], columns=['email'])['email'].to_numpy()[:max_calls]
+    manager = PseudonymManager()
+    start = time.perf_counter()
+    with manager.batch():
+        for value in values:
+            manager.create_pseudonym(value, 'email')
+    seconds = time.perf_counter() - start
+    manager.close()
+    return len(values), seconds
+
+def bench_privbayes(n_rows, max_calls):
+    """PrivBayes.anonymize_dataframe over every numeric column"""
+    from src.security.anonymization.privbayes import PrivBayes
+    from src.data.storage import read_table
+    df = read_table(_paths(n_rows)['raw'])
+    numeric = df.select_dtypes(include=['number']).columns.tolist()
+    privbayes = PrivBayes(epsilon=0.1, seed=42)
+    start = time.perf_counter()
+    privbayes.anonymize_dataframe(df, numeric, inplace=True)
+    return len(df), time.perf_counter() - start
+
+def bench_anonymize(n_rows, max_calls):
+    """BootstrapPipeline.anonymize_dataset, file to file"""
+    from pipelines.bootstrap_pipeline import BootstrapPipeline
+    paths = _paths(n_rows)
+    bootstrap = BootstrapPipeline(seed=42)
+    start = time.perf_counter()
+    df = bootstrap.anonymize_dataset(paths['raw'], paths['anonymized'])
+    return len(df), time.perf_counter() - start
+
+def bench_detection(n_rows, max_calls):
+    """DetectionPipeline.run_detection on the anonymized output"""
+    from pipelines.detection_pipeline import DetectionPipeline
+    paths = _paths(n_rows)
+    detector = DetectionPipeline()
+    start = time.perf_counter()
+    df = detector.run_detection(paths['anonymized'], paths['detected'])
+    return len(df), time.perf_counter() - start
+
+def bench_training(n_rows, max_calls):
+    """TrainingPipeline.train_anomaly_model on the detection output"""
+    from pipelines.training_pipeline import TrainingPipeline
+    paths = _paths(n_rows)
+    trainer = TrainingPipeline()
+    start = time.perf_counter()
+    trainer.train_anomaly_model(str(paths['detected']))
+    return n_rows, time.perf_counter() - start
+
+BENCHMARKS = {
+    'pseudonym': bench_pseudonym,
+    'privbayes': bench_privbayes,
+    'anonymize': bench_anonymize,
+    'detection': bench_detection,
+    'training': bench_training
+}
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1e6 if sys.platform == 'darwin' else 1e3), 1)
+
+def run_case(workdir, case, n_rows, max_calls):
+    """Runs in a fresh process inside workdir so peak RSS belongs to one case"""
+    os.chdir(workdir)
+    if case == 'generate':
+        from src.data.storage import write_table
+        raw = _paths(n_rows)['raw']
+        raw.parent.mkdir(parents=True, exist_ok=True)
+        write_table(make_dataset(n_rows), raw)
+        return None
+    rows, seconds = BENCHMARKS[case](n_rows, max_calls)
+    return {
+        'case': case,
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(rows / seconds) if seconds else None,
+        'peak_rss_mb': _peak_rss_mb()
+    }
+
+def _in_fresh_process(*args):
+    # spawn, not fork: a forked child would inherit the parent's peak RSS
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(run_case, args)
+
+def run_suite(sizes, cases, max_calls=100_000, workdir=None):
+    """
+    Run every case at every size
+    Cases run in pipeline order on the same files, so detection and training
+    need anonymize (and detection) in the same run.
+    """
+    root = Path(__file__).parent.parent.resolve()
+    owned = workdir is None
+    workdir = Path(workdir or tempfile.mkdtemp(prefix='epics-bench-'))
+    workdir.mkdir(parents=True, exist_ok=True)
+    shutil.copytree(root / 'configs', workdir / 'configs', dirs_exist_ok=True)
+    results = []
+    try:
+        for label in sizes:
+            n_rows = SIZES[label]
+            _in_fresh_process(str(workdir), 'generate', n_rows, max_calls)
+            for case in [c for c in CASES if c in cases]:
+                result = _in_fresh_process(str(workdir), case, n_rows, max_calls)
+                results.append({'size': label, **result})
+                print(f"{case:>10} {label:>5} | {result['seconds']:9.2f}s | "
+                      f"{result['rows_per_sec'] or 0:>12,} rows/s | {result['peak_rss_mb']} MB peak")
+    finally:
+        if owned:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+def save_results(results, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                        'cpus': os.cpu_count()},
+            'results': results
+        }, f, indent=2)
+
+def compare(results, baseline_path, tolerance=0.2):
+    """
+    Compare against a baseline run
+    A case regresses when its rows/sec drops, or its peak RSS grows, by more
+    than tolerance. Returns (comparison table, number of regressions).
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['case'], r['size']): r for r in json.load(f)['results']}
+    rows = []
+    for result in results:
+        base = baseline.get((result['case'], result['size']))
+        if base is None:
+            continue
+        speed = result['rows_per_sec'] / base['rows_per_sec']
+        memory = (result['peak_rss_mb'] / base['peak_rss_mb']
+                  if result['peak_rss_mb'] and base['peak_rss_mb'] else 1.0)
+        rows.append({
+            'case': result['case'],
+            'size': result['size'],
+            'rows_per_sec': result['rows_per_sec'],
+            'baseline_rows_per_sec': base['rows_per_sec'],
+            'speed_ratio': round(speed, 2),
+            'rss_ratio': round(memory, 2),
+            'regression': speed < 1 - tolerance or memory > 1 + tolerance
+        })
+    table = pd.DataFrame(rows)
+    return table, int(table['regression'].sum()) if len(table) else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the anonymization, detection and training stages")
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['10k', '100k'])
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES)
+    parser.add_argument('--max-calls', type=int, default=100_000,
+                        help="Cap on per-value create_pseudonym calls")
+    parser.add_argument('--output', default=RESULTS_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--workdir', default=None, help="Keep generated files here")
+    args = parser.parse_args()
+
+    print("="*80)
+    print(f"BENCHMARK SUITE - sizes {', '.join(args.sizes)}")
+    print("="*80)
+    results = run_suite(args.sizes, args.cases, args.max_calls, args.workdir)
+    save_results(results, args.output)
+    print(f"\nResults saved to {args.output}")
+
+    if args.save_baseline:
+        save_results(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+    elif Path(args.baseline).exists():
+        table, regressions = compare(results, args.baseline, args.tolerance)
+        print("\n" + table.to_string(index=False))
+        if regressions:
+            print(f"\n{regressions} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\nNo regressions against the baseline")
+    else:
+        print(f"No baseline at {args.baseline}; rerun with --save-baseline to create one")
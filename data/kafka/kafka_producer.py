@@ -0,0 +1,175 @@
+"""
+Kafka Producer Simulation - Smart Grid Billing Logs
+Streams billing events through the local broker into anonymization and detection
+"""
+
+import asyncio
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from pipelines.bootstrap_pipeline import BootstrapPipeline
+from pipelines.streaming_detection_pipeline import StreamingDetectionPipeline
+from src.data.ingestion.streaming import LocalBroker, StreamProducer, StreamConsumer
+from src.data.pipeline_stats import publish_stats
+from src.data.storage import write_table
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda',
+               'David', 'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+              'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas', 'Taylor']
+REGIONS = ['north', 'south', 'east', 'west', 'central']
+TARIFFS = ['residential', 'commercial', 'industrial']
+
+class KafkaSimulator:
+    def __init__(self, topic='smart-grid-billing', partitions=4, batch_size=1000,
+                 log_dir=None, contamination=0.05, seed=None):
+        """
+        Smart grid billing stream over the local broker
+        Args:
+            topic: Topic the billing events are produced to
+            partitions: Partitions in the topic (events are keyed by meter)
+            batch_size: Records per consumer micro-batch
+            log_dir: Optional directory for a file-backed broker log
+            contamination: Expected fraud rate for the detector
+            seed: Seed for the event generator
+        """
+        self.topic = topic
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.broker = LocalBroker(log_dir)
+        self.broker.create_topic(topic, partitions)
+        self.bootstrap = BootstrapPipeline()
+        self.detector = StreamingDetectionPipeline(contamination=contamination)
+        print("Kafka Simulator Initialized")
+
+    def generate_billing_events(self, num_events=10000):
+        """Generate smart grid billing events with ~5% fraudulent readings"""
+        rng = self.rng
+        is_fraud = rng.random(num_events) < 0.05
+        meter = rng.integers(0, max(1, num_events // 10), num_events)
+        first = rng.choice(FIRST_NAMES, num_events)
+        last = rng.choice(LAST_NAMES, num_events)
+        kwh = rng.gamma(4.0, 75.0, num_events)
+        # Fraud: tampered meters under-report consumption against the billed amount
+        kwh = np.where(is_fraud, kwh * rng.uniform(0.05, 0.3, num_events), kwh)
+        rate = rng.normal(0.15, 0.01, num_events)
+        bill = np.where(is_fraud, kwh * rate * rng.uniform(3, 8, num_events), kwh * rate)
+
+        return pd.DataFrame({
+            'meter_id': pd.Series(meter).map('MTR-{:06d}'.format),
+            'name': pd.Series(first) + ' ' + pd.Series(last),
+            'email': pd.Series(first).str.lower() + '.' + pd.Series(last).str.lower()
+                     + pd.Series(meter).astype(str) + '@example.com',
+            'region': rng.choice(REGIONS, num_events),
+            'tariff': rng.choice(TARIFFS, num_events),
+            'timestamp': datetime.now().isoformat(),
+            'kwh_consumed': kwh.round(3),
+            'bill_amount': bill.round(2),
+            'voltage': rng.normal(230, 3, num_events).round(2),
+            'is_fraud': is_fraud.astype(int)
+        })
+
+    def _process_batch(self, records):
+        """Anonymize and score one micro-batch (runs in a worker thread)"""
+        batch = pd.DataFrame.from_records([value for _, _, value in records])
+        labels = batch.pop('is_fraud')
+        # The online detector scores each micro-batch, then learns from it
+        results = self.detector.detect_frame(self.bootstrap.anonymize_frame(batch))
+        results['is_fraud'] = labels.values
+        return results
+
+    async def _produce(self, events):
+        producer = await StreamProducer(self.broker, self.topic).start()
+        for record in events.to_dict('records'):
+            await producer.send(record, key=record['meter_id'])
+        await producer.close()
+
+    async def _consume(self, total, results, latencies, max_inflight=4):
+        consumer = StreamConsumer(self.broker, self.topic, 'fraud-detection',
+                                  batch_size=self.batch_size)
+        # Bounded hand-off: polling stalls while detection is behind
+        pending = asyncio.Queue(maxsize=max_inflight)
+
+        async def process():
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                records, positions = item
+                results.append(await asyncio.to_thread(self._process_batch, records))
+                done = time.time()
+                latencies.extend(done - produced_at for produced_at, _, _ in records)
+                consumer.commit(positions)
+
+        async def hand_off(item):
+            put = asyncio.ensure_future(pending.put(item))
+            await asyncio.wait([put, worker], return_when=asyncio.FIRST_COMPLETED)
+            if worker.done() and not put.done():
+                put.cancel()
+                worker.result()  # Re-raise a processing failure instead of blocking
+
+        worker = asyncio.create_task(process())
+        consumed = 0
+        while consumed < total:
+            records = await consumer.poll()
+            if records:
+                consumed += len(records)
+                await hand_off((records, dict(consumer.positions)))
+        await hand_off(None)
+        await worker
+
+    async def _run(self, events):
+        results, latencies = [], []
+        await asyncio.gather(
+            self._produce(events),
+            self._consume(len(events), results, latencies)
+        )
+        return results, latencies
+
+    def simulate_streaming_pipeline(self, num_events=10000,
+                                    output_path='data/raw/kafka_stream_logs.csv'):
+        """Stream billing events end to end and return the labelled records"""
+        print("="*80)
+        print("KAFKA STREAMING - Smart Grid Billing Logs")
+        print("="*80)
+
+        print(f"\n[1/3] Generating {num_events:,} Billing Events...")
+        events = self.generate_billing_events(num_events)
+
+        print(f"\n[2/3] Streaming to '{self.topic}' "
+              f"({len(self.broker.topics[self.topic])} partitions) through Anonymization and Detection...")
+        start = time.perf_counter()
+        batches, latencies = asyncio.run(self._run(events))
+        elapsed = time.perf_counter() - start
+        results = pd.concat(batches, ignore_index=True)
+        write_table(results, output_path)
+        publish_stats('anonymize', output_path, records=len(results))
+        publish_stats('detection', output_path, records=len(results),
+                      anomalies=results['is_anomaly'].sum())
+
+        print("\n[3/3] Streaming Report...")
+        latencies = np.asarray(latencies) * 1000
+        flagged = results['is_anomaly'] == 1
+        print(f"\n{'='*80}")
+        print(f"STREAMING RESULTS")
+        print(f"{'='*80}")
+        print(f"Events Processed: {len(results):,} in {len(batches)} micro-batches")
+        print(f"Sustained Throughput: {len(results)/elapsed:,.0f} events/sec")
+        print(f"End-to-End Latency: p50 {np.percentile(latencies, 50):.1f} ms | "
+              f"p99 {np.percentile(latencies, 99):.1f} ms")
+        print(f"Billing Anomalies Detected: {flagged.sum()}")
+        print(f"Fraud Caught (Ground Truth): {(flagged & (results['is_fraud'] == 1)).sum()}"
+              f" of {results['is_fraud'].sum()}")
+        print(f"\nResults saved to: {output_path}")
+        print(f"{'='*80}")
+        return results
+
+if __name__ == "__main__":
+    simulator = KafkaSimulator()
+    simulator.simulate_streaming_pipeline()
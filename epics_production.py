@@ -13,16 +13,141 @@ This is NOT a demo - This is a PRODUCTION-READY system implementing:
 8. Role-Based Access Control Implementation
 """
 
+import argparse
+import multiprocessing
+import os
+import queue
 import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
 import time
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+RAW_DATA = 'data/raw/sample_data.csv'
+ANONYMIZED_DATA = 'data/anonymized/sample_anonymized.csv'
+DETECTION_RESULTS = 'results/tables/anomaly_results.csv'
+
+def _summary(results):
+    """Small picklable summary of a use case's labelled records"""
+    return {'records': len(results), 'anomalies': int(results['is_anomaly'].sum())}
+
+def run_kafka_streaming():
+    from data.kafka.kafka_producer import KafkaSimulator
+    kafka_sim = KafkaSimulator()
+    return _summary(kafka_sim.simulate_streaming_pipeline())
+
+def run_nosy_admin_detection():
+    from experiments.nosy_admin.nosy_admin_detection import NosyAdminDetector
+    nosy_detector = NosyAdminDetector()
+    return _summary(nosy_detector.run_detection())
+
+def run_dormant_account_detection():
+    from experiments.dormant_accounts.dormant_detector import DormantAccountDetector
+    dormant_detector = DormantAccountDetector()
+    return _summary(dormant_detector.run_detection())
+
+def run_anonymization():
+    """Anonymize the raw sample data and label it; training and analysis read the outputs"""
+    from pipelines.bootstrap_pipeline import BootstrapPipeline
+    from pipelines.detection_pipeline import DetectionPipeline
+    BootstrapPipeline().anonymize_dataset(RAW_DATA, ANONYMIZED_DATA)
+    return _summary(DetectionPipeline().run_detection(ANONYMIZED_DATA, DETECTION_RESULTS))
+
+def run_model_training():
+    from pipelines.training_pipeline import TrainingPipeline
+    trainer = TrainingPipeline()
+    trainer.train_anomaly_model(ANONYMIZED_DATA)
+    best = max(trainer.models.values(), key=lambda info: info['score'])
+    return {'accuracy': best['accuracy']}
+
+def run_data_analysis():
+    from notebooks.exploratory.data_analysis import analyze_anonymized_data
+    analyze_anonymized_data()
+    return {}
+
+def run_system_monitoring():
+    from monitoring.performance.system_monitor import SystemMonitor
+    monitor = SystemMonitor()
+    monitor.monitor_pipeline_execution(10)
+    return {}
+
+_worker_events = None
+
+def _init_worker(events):
+    global _worker_events
+    _worker_events = events
+
+def _run_use_case(name, function):
+    """Worker entry point: report which process runs `name`, then run it"""
+    _worker_events.put((name, os.getpid()))
+    return function()
+
+# name: (title, scenario, technology, purpose, function, depends on)
+USE_CASES = {
+    'kafka': (
+        "USE CASE 1: SMART GRID REAL-TIME DATA STREAMING",
+        "Real-time ingestion of Smart Grid billing application logs",
+        "Apache Kafka + Spring Cloud Dataflow",
+        "Monitor energy consumption and detect billing fraud in real-time",
+        run_kafka_streaming, []
+    ),
+    'nosy_admin': (
+        "USE CASE 2: NOSY ADMIN DETECTION PIPELINE",
+        "Database administrators improperly accessing customer data",
+        "Random Forest + Pseudonymization + PrivBayes",
+        "Detect privilege abuse while preserving admin privacy",
+        run_nosy_admin_detection, []
+    ),
+    'dormant': (
+        "USE CASE 3: DORMANT ACCOUNT DETECTION PIPELINE",
+        "Inactive accounts suddenly becoming active (security breach)",
+        "Isolation Forest + Differential Privacy",
+        "Identify compromised dormant accounts in Smart Grid systems",
+        run_dormant_account_detection, []
+    ),
+    'anonymization': (
+        "PREREQUISITE: ANONYMIZED TRAINING DATA",
+        "Pseudonymize and label the raw sample records",
+        "Pseudonymization + PrivBayes + Isolation Forest",
+        "Provide the anonymized data that training and analysis consume",
+        run_anonymization, []
+    ),
+    'training': (
+        "USE CASE 4: PRODUCTION ML MODEL TRAINING & DEPLOYMENT",
+        "Train production-grade ML models on anonymized Smart Grid data",
+        "Random Forest + Gradient Boosting on anonymized data",
+        "Deploy ML models for automated threat detection",
+        run_model_training, ['anonymization']
+    ),
+    'analysis': (
+        "USE CASE 5: PRIVACY-PRESERVING DATA ANALYTICS",
+        "Statistical analysis of Smart Grid data with privacy guarantees",
+        "Differential Privacy (ε=0.1) + Statistical Analysis",
+        "Enable data scientists to analyze sensitive data safely",
+        run_data_analysis, ['anonymization']
+    ),
+    'monitoring': (
+        "USE CASE 6: REAL-TIME SYSTEM PERFORMANCE MONITORING",
+        "Monitor system health during analytics operations",
+        "Prometheus + Custom Metrics Collection",
+        "Ensure system reliability and optimal performance",
+        run_system_monitoring, []
+    )
+}
+
+def _banner(title):
+    print("\n" + "█"*100)
+    print("█" + " "*98 + "█")
+    print("█" + title.center(98) + "█")
+    print("█" + " "*98 + "█")
+    print("█"*100)
+
 class EPICSProductionOrchestrator:
     def __init__(self):
         self.start_time = datetime.now()
+        self.results = {}
         print("\n" + "="*100)
         print(" " * 20 + "🚀 EPICS MBDAaaS v2.0 - PRODUCTION SYSTEM 🚀")
         print(" " * 10 + "Model-Based Big Data Analytics-as-a-Service for Smart Grid Security")
@@ -31,103 +156,109 @@ class EPICSProductionOrchestrator:
         print("Academic Reference: Computers and Electrical Engineering (2021)")
         print("DOI: https://doi.org/10.1016/j.compeleceng.2021.107215")
         print("\n" + "="*100 + "\n")
-    
-    def run_complete_workflow(self):
+
+    def _finish_monitoring(self, sampler, start):
+        sampler.save('monitoring/performance/metrics.csv', 'monitoring/performance/stage_usage.csv')
+        print(sampler.summary().to_string(index=False))
+        self.results['monitoring'] = {'status': 'ok', 'seconds': round(time.perf_counter() - start, 1)}
+
+    def run_sequential(self):
+        """Run every use case in order in this process, sampling each one while it runs"""
+        from monitoring.performance.system_monitor import BackgroundSampler
+        sampler = BackgroundSampler(rate_hz=20, include_children=True).start()
+        monitor_start = time.perf_counter()
+        try:
+            for name, (title, scenario, technology, purpose, function, depends_on) in USE_CASES.items():
+                if name == 'monitoring':
+                    continue
+                if any(self.results.get(dep, {}).get('status') != 'ok' for dep in depends_on):
+                    self.results[name] = {'status': 'skipped'}
+                    print(f"⏭  {title} skipped: a dependency failed")
+                    continue
+                _banner(title)
+                print(f"\nScenario: {scenario}")
+                print(f"Technology: {technology}")
+                print(f"Purpose: {purpose}\n")
+                start = time.perf_counter()
+                with sampler.stage(name):
+                    try:
+                        result = {'status': 'ok', **function()}
+                    except Exception as error:
+                        result = {'status': 'failed', 'error': str(error)}
+                        print(f"✘  {title} failed: {error}")
+                self.results[name] = {**result, 'seconds': round(time.perf_counter() - start, 1)}
+        finally:
+            sampler.stop()
+        self._finish_monitoring(sampler, monitor_start)
+
+    def run_concurrent(self, max_workers=None):
+        """
+        Run use cases in worker processes as soon as their dependencies finish
+        Monitoring samples the workers in the background for as long as they
+        run; each worker reports its pid, so its usage goes to its own use case.
+        """
+        from monitoring.performance.system_monitor import BackgroundSampler
+        pending = {name: spec for name, spec in USE_CASES.items() if name != 'monitoring'}
+        max_workers = max_workers or min(len(pending), max(2, os.cpu_count() or 1))
+        _banner(f"CONCURRENT ORCHESTRATION: {len(pending)} USE CASES ON {max_workers} WORKERS")
+
+        sampler = BackgroundSampler(rate_hz=20, include_children=True).start()
+        monitor_start = time.perf_counter()
+
+        running, started = {}, {}
+        events = multiprocessing.Queue()
+
+        def track_workers():
+            while True:
+                try:
+                    name, pid = events.get_nowait()
+                except queue.Empty:
+                    return
+                # A start reported after its result arrived must not reopen the stage
+                if name in running.values():
+                    sampler.start_stage(name, pid=pid)
+
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(events,)) as pool:
+                while pending or running:
+                    for name, (title, _, _, _, function, depends_on) in list(pending.items()):
+                        statuses = [self.results.get(dep, {}).get('status') for dep in depends_on]
+                        if any(status in ('failed', 'skipped') for status in statuses):
+                            self.results[name] = {'status': 'skipped'}
+                            del pending[name]
+                            print(f"⏭  {title} skipped: a dependency failed")
+                        elif all(status == 'ok' for status in statuses):
+                            running[pool.submit(_run_use_case, name, function)] = name
+                            started[name] = time.perf_counter()
+                            del pending[name]
+                            print(f"▶  {title} started")
+                    if not running:
+                        continue
+                    finished, _ = wait(running, timeout=sampler.interval, return_when=FIRST_COMPLETED)
+                    track_workers()
+                    for future in finished:
+                        name = running.pop(future)
+                        sampler.end_stage(name)
+                        seconds = round(time.perf_counter() - started[name], 1)
+                        try:
+                            self.results[name] = {'status': 'ok', **future.result(), 'seconds': seconds}
+                            print(f"✔  {USE_CASES[name][0]} finished in {seconds}s")
+                        except Exception as error:
+                            self.results[name] = {'status': 'failed', 'error': str(error), 'seconds': seconds}
+                            print(f"✘  {USE_CASES[name][0]} failed: {error}")
+        finally:
+            sampler.stop()
+            events.close()
+        self._finish_monitoring(sampler, monitor_start)
+
+    def run_complete_workflow(self, mode='concurrent', max_workers=None):
         """Execute complete EPICS production workflow"""
-        
-        # ========== USE CASE 1: KAFKA STREAMING ==========
-        print("\n" + "█"*100)
-        print("█" + " "*98 + "█")
-        print("█" + " "*20 + "USE CASE 1: SMART GRID REAL-TIME DATA STREAMING" + " "*31 + "█")
-        print("█" + " "*98 + "█")
-        print("█"*100)
-        print("\nScenario: Real-time ingestion of Smart Grid billing application logs")
-        print("Technology: Apache Kafka + Spring Cloud Dataflow")
-        print("Purpose: Monitor energy consumption and detect billing fraud in real-time\n")
-        
-        from data.kafka.kafka_producer import KafkaSimulator
-        kafka_sim = KafkaSimulator()
-        kafka_data = kafka_sim.simulate_streaming_pipeline()
-        
-        time.sleep(2)
-        
-        # ========== USE CASE 2: NOSY ADMIN DETECTION ==========
-        print("\n" + "█"*100)
-        print("█" + " "*98 + "█")
-        print("█" + " "*22 + "USE CASE 2: NOSY ADMIN DETECTION PIPELINE" + " "*35 + "█")
-        print("█" + " "*98 + "█")
-        print("█"*100)
-        print("\nScenario: Database administrators improperly accessing customer data")
-        print("Technology: Random Forest + Pseudonymization + PrivBayes")
-        print("Purpose: Detect privilege abuse while preserving admin privacy\n")
-        
-        from experiments.nosy_admin.nosy_admin_detection import NosyAdminDetector
-        nosy_detector = NosyAdminDetector()
-        nosy_results = nosy_detector.run_detection()
-        
-        time.sleep(2)
-        
-        # ========== USE CASE 3: DORMANT ACCOUNT DETECTION ==========
-        print("\n" + "█"*100)
-        print("█" + " "*98 + "█")
-        print("█" + " "*20 + "USE CASE 3: DORMANT ACCOUNT DETECTION PIPELINE" + " "*32 + "█")
-        print("█" + " "*98 + "█")
-        print("█"*100)
-        print("\nScenario: Inactive accounts suddenly becoming active (security breach)")
-        print("Technology: Isolation Forest + Differential Privacy")
-        print("Purpose: Identify compromised dormant accounts in Smart Grid systems\n")
-        
-        from experiments.dormant_accounts.dormant_detector import DormantAccountDetector
-        dormant_detector = DormantAccountDetector()
-        dormant_results = dormant_detector.run_detection()
-        
-        time.sleep(2)
-        
-        # ========== USE CASE 4: PRODUCTION ML MODEL TRAINING ==========
-        print("\n" + "█"*100)
-        print("█" + " "*98 + "█")
-        print("█" + " "*18 + "USE CASE 4: PRODUCTION ML MODEL TRAINING & DEPLOYMENT" + " "*27 + "█")
-        print("█" + " "*98 + "█")
-        print("█"*100)
-        print("\nScenario: Train production-grade ML models on anonymized Smart Grid data")
-        print("Technology: Random Forest + Gradient Boosting on anonymized data")
-        print("Purpose: Deploy ML models for automated threat detection\n")
-        
-        from pipelines.training_pipeline import TrainingPipeline
-        trainer = TrainingPipeline()
-        model = trainer.train_anomaly_model()
-        
-        time.sleep(2)
-        
-        # ========== USE CASE 5: DATA ANALYSIS ==========
-        print("\n" + "█"*100)
-        print("█" + " "*98 + "█")
-        print("█" + " "*18 + "USE CASE 5: PRIVACY-PRESERVING DATA ANALYTICS" + " "*35 + "█")
-        print("█" + " "*98 + "█")
-        print("█"*100)
-        print("\nScenario: Statistical analysis of Smart Grid data with privacy guarantees")
-        print("Technology: Differential Privacy (ε=0.1) + Statistical Analysis")
-        print("Purpose: Enable data scientists to analyze sensitive data safely\n")
-        
-        from notebooks.exploratory.data_analysis import analyze_anonymized_data
-        analyze_anonymized_data()
-        
-        time.sleep(2)
-        
-        # ========== USE CASE 6: SYSTEM MONITORING ==========
-        print("\n" + "█"*100)
-        print("█" + " "*98 + "█")
-        print("█" + " "*20 + "USE CASE 6: REAL-TIME SYSTEM PERFORMANCE MONITORING" + " "*27 + "█")
-        print("█" + " "*98 + "█")
-        print("█"*100)
-        print("\nScenario: Monitor system health during analytics operations")
-        print("Technology: Prometheus + Custom Metrics Collection")
-        print("Purpose: Ensure system reliability and optimal performance\n")
-        
-        from monitoring.performance.system_monitor import SystemMonitor
-        monitor = SystemMonitor()
-        metrics = monitor.monitor_pipeline_execution(10)
-        
+        if mode == 'concurrent':
+            self.run_concurrent(max_workers)
+        else:
+            self.run_sequential()
+
         # ========== FINAL SUMMARY ==========
         end_time = datetime.now()
         duration = (end_time - self.start_time).total_seconds()
@@ -144,13 +275,23 @@ class EPICSProductionOrchestrator:
         print(f"End Time: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"Total Duration: {duration:.2f} seconds")
         
-        print("\n✅ ALL USE CASES EXECUTED SUCCESSFULLY:")
-        print("   [1] Smart Grid Kafka Streaming: data/raw/kafka_stream_logs.csv")
-        print("   [2] Nosy Admin Detection: experiments/nosy_admin/nosy_admin_results.csv")
-        print("   [3] Dormant Account Detection: experiments/dormant_accounts/dormant_results.csv")
-        print("   [4] Production ML Model: models/trained/production_model.pkl")
-        print("   [5] Data Analysis Report: notebooks/reports/analysis_report.csv")
-        print("   [6] System Metrics: monitoring/performance/metrics.csv")
+        outputs = {
+            'kafka': "data/raw/kafka_stream_logs.csv",
+            'nosy_admin': "experiments/nosy_admin/nosy_admin_results.csv",
+            'dormant': "experiments/dormant_accounts/dormant_results.csv",
+            'anonymization': DETECTION_RESULTS,
+            'training': "models/trained/production_model.pkl",
+            'analysis': "notebooks/reports/analysis_report.csv",
+            'monitoring': "monitoring/performance/metrics.csv"
+        }
+        succeeded = all(result['status'] == 'ok' for result in self.results.values())
+        print(f"\n{'✅ ALL USE CASES EXECUTED SUCCESSFULLY' if succeeded else '⚠️ SOME USE CASES DID NOT COMPLETE'} ({mode}):")
+        for name, result in self.results.items():
+            mark = {'ok': '✓', 'failed': '✘', 'skipped': '⏭'}[result['status']]
+            timing = f" ({result['seconds']}s)" if 'seconds' in result else ""
+            print(f"   {mark} {USE_CASES[name][0].split(': ', 1)[1]}: {outputs[name]}{timing}")
+            if 'error' in result:
+                print(f"     {result['error']}")
         
         print("\n🔒 SECURITY & PRIVACY FEATURES:")
         print("   ✓ Pseudonymization: SHA-256 with HIVE warehouse storage")
@@ -172,10 +313,14 @@ class EPICSProductionOrchestrator:
         print("   ✓ API Documentation: http://localhost:8000/docs")
         
         print("\n📈 PERFORMANCE METRICS:")
-        print(f"   ✓ Data Processed: {len(kafka_data) + len(nosy_results) + len(dormant_results)} records")
-        print(f"   ✓ Anomalies Detected: {kafka_data['is_anomaly'].sum() + nosy_results['is_anomaly'].sum() + dormant_results['is_anomaly'].sum()}")
-        print(f"   ✓ ML Model Accuracy: 100.00%")
-        print(f"   ✓ Processing Speed: {(len(kafka_data) + len(nosy_results) + len(dormant_results))/duration:.2f} records/sec")
+        detected = [self.results[name] for name in ('kafka', 'nosy_admin', 'dormant')
+                    if self.results.get(name, {}).get('status') == 'ok']
+        records = sum(result['records'] for result in detected)
+        print(f"   ✓ Data Processed: {records} records")
+        print(f"   ✓ Anomalies Detected: {sum(result['anomalies'] for result in detected)}")
+        if 'accuracy' in self.results.get('training', {}):
+            print(f"   ✓ ML Model Accuracy: {self.results['training']['accuracy'] * 100:.2f}%")
+        print(f"   ✓ Processing Speed: {records/duration:.2f} records/sec")
         
         print("\n🎓 ACADEMIC VALIDATION:")
         print("   ✓ Based on peer-reviewed research (Computers and Electrical Engineering 2021)")
@@ -188,5 +333,9 @@ class EPICSProductionOrchestrator:
         print("="*100 + "\n")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the EPICS production use cases")
+    parser.add_argument('--mode', choices=['concurrent', 'sequential'], default='concurrent')
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes in concurrent mode")
+    args = parser.parse_args()
     orchestrator = EPICSProductionOrchestrator()
-    orchestrator.run_complete_workflow()
+    orchestrator.run_complete_workflow(args.mode, args.workers)
@@ -5,7 +5,6 @@ Detects inactive accounts that suddenly become active (security risk)
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import sys
 from pathlib import Path
 
@@ -13,51 +12,19 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from pipelines.bootstrap_pipeline import BootstrapPipeline
 from pipelines.detection_pipeline import DetectionPipeline
+from pipelines.fused_pipeline import FusedPipeline
+from src.data.bulk_generator import generate_logs
 
 class DormantAccountDetector:
     def __init__(self):
         self.bootstrap = BootstrapPipeline()
         self.detector = DetectionPipeline(contamination=0.02)
+        self.pipeline = FusedPipeline(self.bootstrap, self.detector)
         print("Dormant Account Detector Initialized")
     
-    def generate_account_activity_logs(self, num_accounts=500):
+    def generate_account_activity_logs(self, num_accounts=500, seed=None):
         """Generate realistic account activity logs with dormant accounts"""
-        from faker import Faker
-        fake = Faker()
-        
-        data = []
-        for i in range(num_accounts):
-            # 10% chance of dormant account
-            is_dormant = np.random.random() < 0.1
-            
-            if is_dormant:
-                # Dormant: No activity for 6+ months, then sudden activity
-                last_activity = datetime.now() - timedelta(days=np.random.randint(180, 720))
-                current_activity = datetime.now()
-                days_inactive = (current_activity - last_activity).days
-            else:
-                # Active: Regular activity
-                last_activity = datetime.now() - timedelta(days=np.random.randint(1, 30))
-                current_activity = datetime.now()
-                days_inactive = (current_activity - last_activity).days
-            
-            record = {
-                'account_id': fake.uuid4(),
-                'user_name': fake.name(),
-                'email': fake.email(),
-                'last_login': last_activity,
-                'current_login': current_activity,
-                'days_inactive': days_inactive,
-                'login_count_last_month': 0 if is_dormant else np.random.randint(5, 50),
-                'data_accessed_mb': np.random.randint(1000, 10000) if is_dormant else np.random.randint(1, 100),
-                'actions_performed': np.random.randint(50, 500) if is_dormant else np.random.randint(1, 20),
-                'ip_address': fake.ipv4(),
-                'user_agent': fake.user_agent(),
-                'is_dormant': 1 if is_dormant else 0
-            }
-            data.append(record)
-        
-        return pd.DataFrame(data)
+        return generate_logs('account_activity', num_accounts, seed=seed)
     
     def run_detection(self):
         """Run complete dormant account detection"""
@@ -66,28 +33,20 @@ class DormantAccountDetector:
         print("="*80)
         
         # Step 1: Generate account logs
-        print("\n[1/4] Generating Account Activity Logs...")
+        print("\n[1/3] Generating Account Activity Logs...")
         logs = self.generate_account_activity_logs(500)
-        logs.to_csv('data/raw/account_activity_logs.csv', index=False)
         print(f"Generated {len(logs)} account records")
         print(f"Dormant accounts: {logs['is_dormant'].sum()}")
-        
-        # Step 2: Anonymize
-        print("\n[2/4] Anonymizing Account Data...")
-        anonymized = self.bootstrap.anonymize_dataset(
-            'data/raw/account_activity_logs.csv',
-            'data/anonymized/accounts_anonymized.csv'
-        )
-        
-        # Step 3: Detect dormant accounts
-        print("\n[3/4] Detecting Dormant Account Activities...")
-        results = self.detector.run_detection(
-            'data/anonymized/accounts_anonymized.csv',
-            'experiments/dormant_accounts/dormant_results.csv'
+
+        # Step 2: Anonymize and detect dormant accounts in memory
+        print("\n[2/3] Anonymizing Account Data and Detecting Dormant Account Activities...")
+        results = self.pipeline.run(
+            logs,
+            output_path='experiments/dormant_accounts/dormant_results.csv'
         )
-        
-        # Step 4: Analysis
-        print("\n[4/4] Generating Analysis Report...")
+
+        # Step 3: Analysis
+        print("\n[3/3] Generating Analysis Report...")
         dormant_detected = results[results['is_anomaly'] == 1]
         
         print(f"\n{'='*80}")
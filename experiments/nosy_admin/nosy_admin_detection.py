@@ -5,7 +5,6 @@ Detects database administrators accessing sensitive customer data without author
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import sys
 from pathlib import Path
 
@@ -13,44 +12,19 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from pipelines.bootstrap_pipeline import BootstrapPipeline
 from pipelines.detection_pipeline import DetectionPipeline
+from pipelines.fused_pipeline import FusedPipeline
+from src.data.bulk_generator import generate_logs
 
 class NosyAdminDetector:
     def __init__(self):
         self.bootstrap = BootstrapPipeline()
         self.detector = DetectionPipeline(contamination=0.05)
+        self.pipeline = FusedPipeline(self.bootstrap, self.detector)
         print("Nosy Admin Detector Initialized")
     
-    def generate_admin_access_logs(self, num_records=1000):
+    def generate_admin_access_logs(self, num_records=1000, seed=None):
         """Generate realistic database admin access logs"""
-        from faker import Faker
-        fake = Faker()
-        
-        # Normal admin activities
-        normal_activities = ['backup', 'schema_update', 'index_optimization', 'health_check']
-        # Suspicious activities
-        suspicious_activities = ['customer_table_scan', 'credit_card_query', 'email_export', 'bulk_data_download']
-        
-        data = []
-        for i in range(num_records):
-            is_suspicious = np.random.random() < 0.05  # 5% suspicious
-            
-            record = {
-                'admin_id': fake.uuid4(),
-                'admin_name': fake.name(),
-                'timestamp': datetime.now() - timedelta(hours=np.random.randint(0, 720)),
-                'database': np.random.choice(['customers_db', 'orders_db', 'products_db', 'analytics_db']),
-                'table_accessed': np.random.choice(['users', 'orders', 'payments', 'products', 'sessions']),
-                'operation': np.random.choice(suspicious_activities if is_suspicious else normal_activities),
-                'rows_accessed': np.random.randint(1, 100000) if is_suspicious else np.random.randint(1, 1000),
-                'access_duration_seconds': np.random.randint(300, 3600) if is_suspicious else np.random.randint(1, 300),
-                'ip_address': fake.ipv4(),
-                'is_after_hours': np.random.choice([True, False]),
-                'label': 1 if is_suspicious else 0  # Ground truth for evaluation
-            }
-            data.append(record)
-        
-        df = pd.DataFrame(data)
-        return df
+        return generate_logs('admin_access', num_records, seed=seed)
     
     def run_detection(self):
         """Run complete nosy admin detection pipeline"""
@@ -59,27 +33,19 @@ class NosyAdminDetector:
         print("="*80)
         
         # Step 1: Generate realistic admin access logs
-        print("\n[1/4] Generating Admin Access Logs...")
+        print("\n[1/3] Generating Admin Access Logs...")
         logs = self.generate_admin_access_logs(1000)
-        logs.to_csv('data/raw/admin_access_logs.csv', index=False)
         print(f"Generated {len(logs)} admin access records")
-        
-        # Step 2: Anonymize admin identities (privacy protection)
-        print("\n[2/4] Anonymizing Admin Identities...")
-        anonymized = self.bootstrap.anonymize_dataset(
-            'data/raw/admin_access_logs.csv',
-            'data/anonymized/admin_access_anonymized.csv'
-        )
-        
-        # Step 3: Detect nosy admin behavior
-        print("\n[3/4] Detecting Suspicious Admin Behavior...")
-        results = self.detector.run_detection(
-            'data/anonymized/admin_access_anonymized.csv',
-            'experiments/nosy_admin/nosy_admin_results.csv'
+
+        # Step 2: Anonymize admin identities and detect nosy behavior in memory
+        print("\n[2/3] Anonymizing Admin Identities and Detecting Suspicious Behavior...")
+        results = self.pipeline.run(
+            logs,
+            output_path='experiments/nosy_admin/nosy_admin_results.csv'
         )
-        
-        # Step 4: Generate report
-        print("\n[4/4] Generating Detection Report...")
+
+        # Step 3: Generate report
+        print("\n[3/3] Generating Detection Report...")
         suspicious = results[results['is_anomaly'] == 1]
         print(f"\n{'='*80}")
         print(f"DETECTION RESULTS")
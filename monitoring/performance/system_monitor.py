@@ -4,20 +4,25 @@ Monitors pipeline performance, privacy budget, and system health
 """
 
 import psutil
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 import pandas as pd
 
 class SystemMonitor:
     def __init__(self):
         self.metrics = []
+        # Prime the counter so the first non-blocking reading covers a real interval
+        psutil.cpu_percent(interval=None)
         print("System Monitor Started")
     
     def collect_metrics(self):
-        """Collect real-time system metrics"""
+        """Collect real-time system metrics (CPU is averaged since the previous call)"""
         return {
             'timestamp': datetime.now(),
-            'cpu_percent': psutil.cpu_percent(interval=1),
+            'cpu_percent': psutil.cpu_percent(interval=None),
             'memory_percent': psutil.Process().memory_percent(),
             'disk_usage': psutil.disk_usage('/').percent,
             'active_threads': psutil.Process().num_threads()
@@ -40,6 +45,250 @@ class SystemMonitor:
         
         return df
 
+class BackgroundSampler:
+    def __init__(self, rate_hz=20, capacity=60_000, include_children=False):
+        """
+        Samples CPU, RSS and I/O from a background thread and credits them to stages
+        A stage is owned either by a process (e.g. a pool worker running one use
+        case) or by a single thread of this process (e.g. one DAG step). Process
+        stages get that process's CPU, RSS and I/O; thread stages get only the
+        CPU time of their thread, since memory and I/O are shared by all threads.
+        Use as a context manager around a run.
+        Args:
+            rate_hz: Samples per second (10-50 Hz keeps overhead well under 1% CPU)
+            capacity: Ring buffer size in samples; the oldest are dropped beyond it
+            include_children: Also sample child processes (e.g. worker pools)
+        """
+        self.interval = 1.0 / rate_hz
+        self.samples = deque(maxlen=capacity)
+        self.include_children = include_children
+        self.process = psutil.Process()
+        self._processes = {self.process.pid: self.process}
+        self._ppids = {}
+        self._last = {}
+        self._last_threads = {}
+        self._last_time = None
+        self._stages = {}
+        self._recent = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start_stage(self, name, pid=None, per_thread=False):
+        """
+        Credit usage of a process, or of the calling thread, to stage `name`
+        Args:
+            pid: Process doing the work (default: this process)
+            per_thread: Credit only the calling thread's CPU time
+        """
+        owner = (pid or self.process.pid, threading.get_native_id() if per_thread else None)
+        with self._lock:
+            if owner[1] is None:
+                # A process runs one process-level stage at a time, e.g. a reused pool worker
+                for other, other_owner in list(self._stages.items()):
+                    if other_owner == owner:
+                        del self._stages[other]
+            self._stages[name] = owner
+
+    def end_stage(self, name):
+        with self._lock:
+            owner = self._stages.pop(name, None)
+            if owner is not None:
+                # Credit the work since the last sample to this stage, not to whatever follows
+                self._recent[name] = owner
+
+    @contextmanager
+    def stage(self, name, per_thread=False):
+        """Credit usage inside the block to stage `name`"""
+        self.start_stage(name, per_thread=per_thread)
+        try:
+            yield self
+        finally:
+            self.end_stage(name)
+
+    def _current_processes(self):
+        if self.include_children:
+            try:
+                children = self.process.children(recursive=True)
+            except psutil.Error:
+                children = []
+            # Keep one Process object per pid so counters are diffed per process
+            alive = {self.process.pid: self.process}
+            for child in children:
+                alive[child.pid] = self._processes.get(child.pid, child)
+                if child.pid not in self._ppids:
+                    try:
+                        self._ppids[child.pid] = child.ppid()
+                    except psutil.Error:
+                        pass
+            self._processes = alive
+        return self._processes
+
+    def _inherited_stage(self, pid, by_process):
+        """Process stage of the nearest ancestor, e.g. for a worker's own helper processes"""
+        while pid in self._ppids:
+            pid = self._ppids[pid]
+            if by_process.get(pid, {}).get('process'):
+                return by_process[pid]['process']
+        return None
+
+    @staticmethod
+    def _counters(process, threads):
+        with process.oneshot():
+            times = process.cpu_times()
+            counters = {
+                'cpu': times.user + times.system,
+                'rss': process.memory_info().rss,
+                'read_bytes': 0,
+                'write_bytes': 0
+            }
+            if hasattr(process, 'io_counters'):
+                io = process.io_counters()
+                counters['read_bytes'] = io.read_bytes
+                counters['write_bytes'] = io.write_bytes
+            thread_cpu = {}
+            if threads:
+                thread_cpu = {thread.id: thread.user_time + thread.system_time
+                              for thread in process.threads()}
+        return counters, thread_cpu
+
+    def _sample(self, now):
+        with self._lock:
+            # Stages that ended since the last sample still get that sample; open ones take precedence
+            stages = [*self._recent.items(), *self._stages.items()]
+            self._recent = {}
+        by_process = {}
+        for name, (pid, tid) in stages:
+            by_process.setdefault(pid, {'process': None, 'threads': {}})
+            if tid is None:
+                by_process[pid]['process'] = name
+            else:
+                by_process[pid]['threads'][tid] = name
+
+        dt = now - self._last_time
+        rows = []
+        for pid, process in self._current_processes().items():
+            owners = by_process.get(pid, {'process': None, 'threads': {}})
+            try:
+                # This process's threads are read every sample so a stage opened later diffs from fresh values
+                counters, thread_cpu = self._counters(process, pid == self.process.pid)
+            except psutil.Error:
+                # The process exited between listing and sampling
+                continue
+            # A process first seen mid-run started after the sampler, so its counters start at zero
+            last = self._last.get(pid, dict.fromkeys(counters, 0))
+            self._last[pid] = counters
+            delta = {key: max(counters[key] - last[key], 0) for key in ('cpu', 'read_bytes', 'write_bytes')}
+
+            thread_seconds = 0.0
+            for tid, name in owners['threads'].items():
+                last_cpu = self._last_threads.get(tid, 0.0)
+                seconds = max(thread_cpu.get(tid, last_cpu) - last_cpu, 0.0)
+                thread_seconds += seconds
+                rows.append({'stage': name, 'pid': pid, 'cpu_seconds': seconds, 'rss_bytes': None,
+                             'read_bytes': None, 'write_bytes': None})
+            if thread_cpu:
+                self._last_threads = thread_cpu
+
+            # The rest of the process: its own stage, or what no thread stage accounts for
+            rest = (owners['process'] or self._inherited_stage(pid, by_process)
+                    or ('unattributed' if owners['threads'] or pid != self.process.pid else 'idle'))
+            rows.append({'stage': rest, 'pid': pid, 'cpu_seconds': max(delta['cpu'] - thread_seconds, 0.0),
+                         'rss_bytes': counters['rss'], 'read_bytes': delta['read_bytes'],
+                         'write_bytes': delta['write_bytes']})
+        for row in rows:
+            row['cpu_percent'] = 100.0 * row['cpu_seconds'] / dt if dt > 0 else 0.0
+        return {'time': now, 'dt': dt, 'rows': rows}
+
+    def _prime(self):
+        """Baseline the counters of processes that already exist"""
+        self._last_time = time.perf_counter()
+        for pid, process in self._current_processes().items():
+            try:
+                self._last[pid], thread_cpu = self._counters(process, pid == self.process.pid)
+                self._last_threads.update(thread_cpu)
+            except psutil.Error:
+                continue
+
+    def _run(self):
+        next_at = time.perf_counter()
+        while not self._stop.is_set():
+            next_at += self.interval
+            # Skip missed ticks instead of bursting to catch up
+            delay = next_at - time.perf_counter()
+            if delay < 0:
+                next_at = time.perf_counter()
+                delay = 0
+            self._stop.wait(delay)
+            now = time.perf_counter()
+            self.samples.append(self._sample(now))
+            self._last_time = now
+
+    def start(self):
+        self._prime()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='background-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def to_frame(self):
+        """One row per sample, stage and process"""
+        rows = [{'sample': i, 'time': sample['time'], 'dt': sample['dt'], **row}
+                for i, sample in enumerate(self.samples) for row in sample['rows']]
+        df = pd.DataFrame(rows)
+        if len(df):
+            df['elapsed'] = df['time'] - self.samples[0]['time'] + self.samples[0]['dt']
+        return df
+
+    def summary(self):
+        """Per-stage usage: each process's or thread's work is credited to one stage only"""
+        df = self.to_frame()
+        if df.empty:
+            return df
+        # Add up the processes of a stage within each sample first (e.g. 'idle' children)
+        per_sample = df.groupby(['stage', 'sample']).agg(
+            dt=('dt', 'first'), cpu_seconds=('cpu_seconds', 'sum'), cpu_percent=('cpu_percent', 'sum'),
+            rss_bytes=('rss_bytes', lambda rss: rss.sum(min_count=1)),
+            read_bytes=('read_bytes', 'sum'), write_bytes=('write_bytes', 'sum')
+        ).reset_index()
+        summary = per_sample.groupby('stage').agg(
+            samples=('sample', 'size'),
+            seconds=('dt', 'sum'),
+            cpu_seconds=('cpu_seconds', 'sum'),
+            peak_cpu_percent=('cpu_percent', 'max'),
+            peak_rss_mb=('rss_bytes', 'max'),
+            read_mb=('read_bytes', 'sum'),
+            write_mb=('write_bytes', 'sum')
+        ).reset_index()
+        summary['mean_cpu_percent'] = 100.0 * summary['cpu_seconds'] / summary['seconds']
+        summary['peak_rss_mb'] /= 1024**2
+        summary[['read_mb', 'write_mb']] /= 1024**2
+        columns = ['stage', 'samples', 'seconds', 'cpu_seconds', 'mean_cpu_percent', 'peak_cpu_percent',
+                   'peak_rss_mb', 'read_mb', 'write_mb']
+        return summary[columns].round(2)
+
+    def save(self, path='monitoring/performance/metrics.csv', summary_path=None):
+        df = self.to_frame()
+        df.to_csv(path, index=False)
+        print(f"{len(df)} sample rows saved to: {path}")
+        if summary_path:
+            self.summary().to_csv(summary_path, index=False)
+            print(f"Per-stage usage saved to: {summary_path}")
+        return df
+
 if __name__ == "__main__":
     monitor = SystemMonitor()
     monitor.monitor_pipeline_execution(10)
@@ -7,54 +7,203 @@ import pandas as pd
 from pathlib import Path
 import hashlib
 import sys
+import yaml
 
 sys.path.append(str(Path(__file__).parent.parent))
 
 from src.security.anonymization.privbayes import PrivBayes
 from src.data.pseudonym_manager import PseudonymManager
+from src.data.pipeline_stats import publish_stats
+from src.data.stage_cache import code_version, rng_state
+from src.data.storage import infer_format, iter_table, read_table, write_table, TableWriter
+
+SENSITIVE_COLUMNS = ['name', 'email', 'ssn', 'phone']
 
 class BootstrapPipeline:
-    def __init__(self, config_path='configs/security_config.yaml', use_privbayes=True):
+    def __init__(self, config_path='configs/security_config.yaml', use_privbayes=True, seed=None,
+                 cache=None):
+        """
+        Args:
+            seed: Seed for the PrivBayes noise (None = fresh noise every run)
+            cache: Optional StageCache; only seeded or noise-free runs are cached,
+                because unseeded differential privacy noise must stay fresh
+        """
         self.config_path = config_path
         self.use_privbayes = use_privbayes
+        self.seed = seed
+        self.cache = cache
+        self.column_bounds = self._load_column_bounds()
         self.pseudonym_manager = PseudonymManager()
         if use_privbayes:
-            self.privbayes = PrivBayes(epsilon=0.1)
+            self.privbayes = PrivBayes(epsilon=0.1, seed=seed)
         print("Bootstrap Pipeline Initialized")
 
+    def _load_column_bounds(self):
+        """Load declared numeric column bounds from the security config"""
+        if not Path(self.config_path).exists():
+            return {}
+        with open(self.config_path) as f:
+            config = yaml.safe_load(f) or {}
+        bounds = (config.get('privbayes') or {}).get('column_bounds') or {}
+        return {col: tuple(value) for col, value in bounds.items()}
+
     def pseudonymize(self, data, column):
         """Pseudonymize sensitive columns with mapping storage"""
-        return data[column].apply(
-            lambda x: self.pseudonym_manager.create_pseudonym(x, column)
-        )
+        tokens = self.pseudonym_manager.create_pseudonyms(data[column], column)
+        return pd.Series(tokens, index=data.index, name=column)
 
-    def anonymize_dataset(self, input_path, output_path):
-        """Anonymize dataset using pseudonymization and PrivBayes"""
-        print(f"Loading data from {input_path}...")
-        df = pd.read_csv(input_path)
-        print(f"Original dataset shape: {df.shape}")
-        
+    def _anonymize_frame(self, df, numeric_cols=None):
+        """Pseudonymize and noise one in-memory frame"""
         # Step 1: Pseudonymize highly sensitive columns
-        sensitive_cols = ['name', 'email', 'ssn', 'phone']
-        existing_cols = [col for col in sensitive_cols if col in df.columns]
-        
-        for col in existing_cols:
-            df[f'{col}_pseudo'] = self.pseudonymize(df, col)
-            df.drop(col, axis=1, inplace=True)
-        
+        existing_cols = [col for col in SENSITIVE_COLUMNS if col in df.columns]
+
+        with self.pseudonym_manager.batch():
+            for col in existing_cols:
+                df[f'{col}_pseudo'] = self.pseudonymize(df, col)
+                df.drop(col, axis=1, inplace=True)
+
         # Step 2: Apply PrivBayes to numeric columns
         if self.use_privbayes:
-            numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns.tolist()
+            if numeric_cols is None:
+                numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns.tolist()
             if numeric_cols:
                 print(f"Applying PrivBayes to: {numeric_cols}")
-                df = self.privbayes.anonymize_dataframe(df, numeric_cols)
-        
+                df = self.privbayes.anonymize_dataframe(
+                    df, numeric_cols, bounds=self.column_bounds, inplace=True
+                )
+        return df
+
+    def anonymize_frame(self, df):
+        """Anonymize an in-memory DataFrame without touching the caller's copy"""
+        return self._anonymize_frame(df.copy(deep=False))
+
+    def cache_params(self):
+        """
+        Everything besides the input that determines the anonymized output
+        The noise generator's exact state stands in for the seed, so a pipeline
+        that already drew noise never matches a fresh one. A hit writes no
+        pseudonym mappings, so the key names the store that holds them.
+        """
+        if self.use_privbayes and self.seed is None:
+            return None
+        store = self.pseudonym_manager.store
+        params = {
+            'code': code_version(BootstrapPipeline, PseudonymManager, write_table),
+            'sensitive_columns': SENSITIVE_COLUMNS,
+            'use_privbayes': self.use_privbayes,
+            'pseudonym_store': {'path': str(store.db_path.resolve()), 'id': store.store_id}
+        }
+        if self.use_privbayes:
+            params.update({
+                'privbayes_code': code_version(PrivBayes, type(self.privbayes.mechanism)),
+                'epsilon': self.privbayes.epsilon,
+                'seed': self.seed,
+                'rng_state': rng_state(self.privbayes.mechanism.rng),
+                'column_bounds': self.column_bounds
+            })
+        return params
+
+    def restore_cached_state(self, meta):
+        """Leave the noise generator where the cached run left it"""
+        if self.use_privbayes and meta.get('rng_state'):
+            self.privbayes.mechanism.rng.bit_generator.state = meta['rng_state']
+
+    def cached_state(self):
+        return {'rng_state': rng_state(self.privbayes.mechanism.rng) if self.use_privbayes else None}
+
+    def anonymize_dataset(self, input_path, output_path):
+        """Anonymize dataset using pseudonymization and PrivBayes"""
+        params = self.cache_params() if self.cache is not None else None
+        if params is not None:
+            key = self.cache.key('anonymize', [input_path], {**params, 'format': infer_format(output_path)})
+            meta = self.cache.lookup(key)
+            if meta is not None:
+                self.cache.restore(meta, {'output': output_path})
+                self.restore_cached_state(meta)
+                publish_stats('anonymize', output_path, records=meta['records'])
+                print(f"Anonymized data restored from cache to {output_path}")
+                return read_table(output_path)
+
+        print(f"Loading data from {input_path}...")
+        df = read_table(input_path)
+        print(f"Original dataset shape: {df.shape}")
+
+        df = self._anonymize_frame(df)
+
         # Save anonymized data
-        df.to_csv(output_path, index=False)
+        write_table(df, output_path)
+        publish_stats('anonymize', output_path, records=len(df))
+        if params is not None:
+            self.cache.store(key, {'output': output_path}, stage='anonymize',
+                             records=len(df), **self.cached_state())
         print(f"Anonymized data saved to {output_path}")
-        print(f"Pseudonym mappings stored: {self.pseudonym_manager.get_mapping_count()}")
+        print(f"Pseudonym mappings stored: {self.pseudonym_manager.publish_count()}")
         return df
 
+    def _chunk_schema(self, first_chunk):
+        """
+        Fix per-column dtypes from the first chunk so every chunk matches
+        Sensitive columns stay strings so their pseudonyms match the batch
+        path. Columns that get noised are read as float64, since a later chunk
+        may hold decimals or blanks; other integer columns stay verbatim as strings.
+        """
+        schema = {}
+        for col, dtype in first_chunk.dtypes.items():
+            if col in SENSITIVE_COLUMNS or first_chunk[col].isna().all():
+                schema[col] = str
+            elif pd.api.types.is_bool_dtype(dtype):
+                schema[col] = 'boolean'
+            elif pd.api.types.is_float_dtype(dtype):
+                schema[col] = 'float64'
+            elif pd.api.types.is_integer_dtype(dtype):
+                schema[col] = 'float64' if self.use_privbayes else str
+            else:
+                schema[col] = str
+        return schema
+
+    def iter_anonymized_chunks(self, input_path, chunksize=100_000):
+        """Yield anonymized chunks of a file under one stable schema"""
+        if infer_format(input_path) == 'csv':
+            first_chunk = pd.read_csv(input_path, nrows=chunksize)
+            schema = self._chunk_schema(first_chunk)
+            chunks = iter_table(input_path, chunksize, dtype=schema)
+        else:
+            # Columnar inputs carry their own schema
+            first_chunk = next(iter_table(input_path, chunksize))
+            schema = {col: str(dtype) for col, dtype in first_chunk.dtypes.items()}
+            chunks = iter_table(input_path, chunksize)
+        numeric_cols = [
+            col for col in first_chunk.select_dtypes(include=['number']).columns
+            if col not in SENSITIVE_COLUMNS and schema[col] is not str
+        ]
+        for chunk in chunks:
+            yield self._anonymize_frame(chunk, numeric_cols)
+
+    def stream_anonymize_dataset(self, input_path, output_path, chunksize=100_000, progress=None):
+        """
+        Anonymize a file in bounded-size chunks, appending each to the output
+        Peak memory depends on chunksize, not on the file size.
+        Args:
+            progress: Optional callback called with the running record count
+                after each chunk; raising from it stops the run
+        Returns:
+            Number of records anonymized
+        """
+        print(f"Streaming data from {input_path} in chunks of {chunksize:,}...")
+        total = 0
+        with TableWriter(output_path) as writer:
+            for i, chunk in enumerate(self.iter_anonymized_chunks(input_path, chunksize)):
+                writer.write(chunk)
+                total += len(chunk)
+                print(f"   Chunk {i + 1}: {total:,} records anonymized")
+                if progress is not None:
+                    progress(total)
+
+        publish_stats('anonymize', output_path, records=total)
+        print(f"Anonymized data saved to {output_path}")
+        print(f"Pseudonym mappings stored: {self.pseudonym_manager.publish_count()}")
+        return total
+
 if __name__ == "__main__":
     pipeline = BootstrapPipeline()
     print("Bootstrap Pipeline Ready!")
@@ -0,0 +1,716 @@
+"""
+DAG Executor - Declarative Pipeline and Workflow Runner
+Turns pipeline_config.yaml and workflows.yaml into a step DAG, streams chunks
+between steps through bounded queues and runs independent branches concurrently
+"""
+
+import argparse
+import importlib
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+import pandas as pd
+import yaml
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from monitoring.performance.system_monitor import BackgroundSampler
+from src.data.pipeline_stats import publish_stats
+from src.data.storage import iter_table, numeric_columns, write_table, TableWriter
+
+PIPELINE_CONFIG = 'orchestration/spring_dataflow/pipeline_config.yaml'
+WORKFLOWS_CONFIG = 'models/procedural/workflows.yaml'
+DATA_CONFIG = 'configs/data_config.yaml'
+SECURITY_CONFIG = 'configs/security_config.yaml'
+
+_END = object()
+
+def _load_yaml(path):
+    if not Path(path).exists():
+        return {}
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+def _columns(value):
+    """'a,b' or ['a', 'b'] as a list of column names"""
+    if isinstance(value, str):
+        return [col.strip() for col in value.split(',') if col.strip()]
+    return list(value or [])
+
+class ExecutionContext:
+    def __init__(self, data_config=DATA_CONFIG, security_config=SECURITY_CONFIG):
+        """Data locations shared by every step of a run"""
+        self.data = _load_yaml(data_config)
+        self.security = _load_yaml(security_config)
+        self.chunksize = self.data.get('chunksize', 100_000)
+
+    def dataset(self, name):
+        datasets = self.data.get('datasets') or {}
+        if name not in datasets:
+            raise KeyError(f"Dataset '{name}' is not defined in the data config")
+        return Path(datasets[name])
+
+    def column_bounds(self):
+        bounds = (self.security.get('privbayes') or {}).get('column_bounds') or {}
+        return {col: tuple(value) for col, value in bounds.items()}
+
+# ---------------------------------------------------------------------------
+# Step implementations
+# ---------------------------------------------------------------------------
+
+class Step:
+    """
+    One node of a stream
+    Sources implement produce(); processors return a chunk (or None) from
+    process() and may emit a last chunk from finish(); sinks consume chunks in
+    process() and return a summary dict from finish().
+    """
+    kind = 'processor'
+
+    def __init__(self, name, properties, context, pipeline):
+        self.name = name
+        self.props = properties or {}
+        self.context = context
+        self.pipeline = pipeline
+
+    def reads(self):
+        """Paths this step reads; used to order dependent pipelines"""
+        return []
+
+    def writes(self):
+        return []
+
+    def open(self):
+        """Heavy setup, run in the step's own thread"""
+
+    def produce(self):
+        raise NotImplementedError
+
+    def process(self, chunk):
+        return chunk
+
+    def finish(self):
+        return None
+
+class KafkaSource(Step):
+    """Drain a topic from the local broker log, or replay its configured file"""
+    kind = 'source'
+
+    def _broker(self):
+        return self.context.data.get('broker') or {}
+
+    def _log_dir(self):
+        log_dir = self.props.get('log-dir') or self._broker().get('log_dir')
+        return Path(log_dir) if log_dir else None
+
+    def _logs(self):
+        log_dir = self._log_dir()
+        return sorted(log_dir.glob(f"{self.props['topic']}-*.log")) if log_dir else []
+
+    def _replay_path(self):
+        topics = self.context.data.get('topics') or {}
+        return Path(topics[self.props['topic']]) if self.props['topic'] in topics else None
+
+    def reads(self):
+        if self._logs():
+            return [self._log_dir()]
+        return [self._replay_path()] if self._replay_path() else []
+
+    def produce(self):
+        batch_size = self.props.get('batch-size', self.context.chunksize)
+        logs = self._logs()
+        if not logs:
+            path = self._replay_path()
+            if path is None:
+                raise ValueError(f"Topic '{self.props['topic']}' has no broker log or replay file")
+            yield from iter_table(path, batch_size)
+            return
+
+        from src.data.ingestion.streaming import LocalBroker
+        topic = self.props['topic']
+        group = self.props.get('consumer-group') or self._broker().get('consumer_group', 'dag-executor')
+        broker = LocalBroker(self._log_dir())
+        broker.create_topic(topic, len(logs))
+        try:
+            for partition in range(len(logs)):
+                offset = broker.committed(group, topic, partition)
+                while True:
+                    records = broker.read(topic, partition, offset, batch_size)
+                    if not records:
+                        break
+                    yield pd.DataFrame.from_records([value for _, _, value in records])
+                    offset += len(records)
+                    broker.commit(group, topic, partition, offset)
+        finally:
+            broker.close()
+
+def _tagged(chunks, path):
+    """Record each chunk's source file in DataFrame.attrs for per-file steps"""
+    for chunk in chunks:
+        chunk.attrs['source'] = str(path)
+        yield chunk
+
+class FileSource(Step):
+    """Stream every matching file in a directory, or one dataset file"""
+    kind = 'source'
+
+    def _files(self):
+        if 'path' in self.props:
+            return [Path(self.props['path'])]
+        return sorted(Path(self.props['directory']).glob(self.props.get('pattern', '*.csv')))
+
+    def reads(self):
+        return [Path(self.props.get('path') or self.props['directory'])]
+
+    def produce(self):
+        files = self._files()
+        if not files:
+            raise FileNotFoundError(f"No input files for step '{self.name}'")
+        for path in files:
+            yield from _tagged(iter_table(path, self.props.get('chunksize', self.context.chunksize)), path)
+
+class FeatureSource(FileSource):
+    """Stream only the numeric columns of a dataset"""
+
+    def produce(self):
+        for path in self._files():
+            yield from _tagged(iter_table(path, self.context.chunksize, columns=numeric_columns(path)), path)
+
+class PseudonymProcessor(Step):
+    """Replace identifying columns with stored pseudonyms (<col>_pseudo)"""
+
+    def open(self):
+        from src.data.pseudonym_manager import PseudonymManager
+        self.manager = PseudonymManager(self.props.get('manager-path', 'data/hive/pseudonym_mappings'))
+        self.columns = _columns(self.props.get('columns'))
+
+    def process(self, chunk):
+        with self.manager.batch():
+            for col in [c for c in self.columns if c in chunk.columns]:
+                chunk[f'{col}_pseudo'] = self.manager.create_pseudonyms(chunk[col], col)
+                chunk = chunk.drop(columns=col)
+        return chunk
+
+    def finish(self):
+        self.manager.publish_count()
+        self.manager.close()
+
+class PrivBayesProcessor(Step):
+    """Laplace noise on the configured numeric columns"""
+
+    def open(self):
+        from src.security.anonymization.privbayes import PrivBayes
+        self.privbayes = PrivBayes(epsilon=self.props.get('epsilon', 0.1), seed=self.props.get('seed'))
+        self.columns = _columns(self.props.get('sensitive-columns'))
+        self.bounds = self.context.column_bounds()
+
+    def process(self, chunk):
+        columns = [c for c in self.columns if c in chunk.columns]
+        return self.privbayes.anonymize_dataframe(chunk, columns, bounds=self.bounds, inplace=True)
+
+class AnonymizeProcessor(Step):
+    """Full bootstrap anonymization: pseudonyms and PrivBayes noise"""
+
+    def open(self):
+        from pipelines.bootstrap_pipeline import BootstrapPipeline
+        self.bootstrap = BootstrapPipeline(seed=self.props.get('seed'))
+
+    def process(self, chunk):
+        return self.bootstrap.anonymize_frame(chunk)
+
+class IsolationForestProcessor(Step):
+    """
+    Batch detector: fits on the first chunk of each source file, then scores its chunks
+    Files in one directory may differ in schema, and each file's labels do
+    not depend on which files sort before it.
+    """
+
+    def open(self):
+        self.source = None
+        self.detector = None
+
+    def process(self, chunk):
+        from pipelines.detection_pipeline import DetectionPipeline
+        source = chunk.attrs.get('source')
+        if self.detector is None or source != self.source:
+            self.source = source
+            self.detector = DetectionPipeline(
+                contamination=self.props.get('contamination', 0.1),
+                random_state=self.props.get('random-state', 42)
+            )
+        return self.detector.detect_frame(chunk)
+
+class HalfSpaceTreesProcessor(Step):
+    """Online detector: scores each chunk, then learns from it"""
+
+    def open(self):
+        from pipelines.streaming_detection_pipeline import StreamingDetectionPipeline
+        self.detector = StreamingDetectionPipeline(
+            contamination=self.props.get('contamination', 0.1),
+            n_trees=self.props.get('n-trees', 25),
+            height=self.props.get('height', 10),
+            window_size=self.props.get('window-size', 1000)
+        )
+
+    def process(self, chunk):
+        return self.detector.detect_frame(chunk)
+
+class TrainingProcessor(Step):
+    """Collect the feature stream, train the production model, emit candidate scores"""
+
+    def open(self):
+        self.chunks = []
+
+    def process(self, chunk):
+        self.chunks.append(chunk)
+
+    def finish(self):
+        from pipelines.training_pipeline import TrainingPipeline
+        features = Path('models/checkpoints/features') / f'{self.pipeline}.parquet'
+        features.parent.mkdir(parents=True, exist_ok=True)
+        write_table(pd.concat(self.chunks, ignore_index=True), features)
+        trainer = TrainingPipeline()
+        trainer.train_anomaly_model(str(features), metric=self.props.get('metric', 'average_precision'))
+        best = max(trainer.models, key=lambda name: trainer.models[name]['score'])
+        return pd.DataFrame([
+            {'model': name, 'score': info['score'], 'accuracy': info['accuracy'], 'selected': name == best}
+            for name, info in trainer.models.items()
+        ])
+
+class FileSink(Step):
+    """Write the stream to one file"""
+    kind = 'sink'
+    stats_stage = 'anonymize'
+
+    def _path(self):
+        if 'file' in self.props:
+            return Path(self.props['file'])
+        return Path(self.props['path']) / f"{self.pipeline}.{self.props.get('format', 'csv')}"
+
+    def writes(self):
+        return [self._path()]
+
+    def open(self):
+        self.writer = TableWriter(self._path())
+
+    def process(self, chunk):
+        self.writer.write(chunk)
+
+    def finish(self):
+        self.writer.close()
+        if self.stats_stage:
+            publish_stats(self.stats_stage, self.writer.path, records=self.writer.rows)
+        return {'records': self.writer.rows, 'output': str(self.writer.path)}
+
+class ReportSink(FileSink):
+    """Write a small result table, e.g. model evaluation, without stage stats"""
+    stats_stage = None
+
+class AlertSink(Step):
+    """
+    Raise alerts for flagged records
+    Severity is the record's anomaly rank within its chunk (1 = most anomalous);
+    flagged records at or above `threshold` are written to the alerts file,
+    with the file they came from. With `file` set, every labelled record is
+    written there as well. Both files keep the columns of their first chunk,
+    since sources in one directory may differ in schema.
+    """
+    kind = 'sink'
+
+    def _alerts_path(self):
+        return Path(self.context.data.get('alerts_dir', 'results/alerts')) / f'{self.pipeline}.csv'
+
+    def writes(self):
+        return [self._alerts_path()] + ([Path(self.props['file'])] if 'file' in self.props else [])
+
+    def open(self):
+        self.alerts = TableWriter(self._alerts_path())
+        self.results = TableWriter(self.props['file']) if 'file' in self.props else None
+        self.records = 0
+        self.anomalies = 0
+        self.columns = {}
+
+    def _write(self, writer, frame):
+        columns = self.columns.setdefault(writer.path, list(frame.columns))
+        writer.write(frame if list(frame.columns) == columns else frame.reindex(columns=columns))
+
+    def process(self, chunk):
+        self.records += len(chunk)
+        self.anomalies += int(chunk['is_anomaly'].sum())
+        if self.results is not None:
+            self._write(self.results, chunk)
+        severity = 1 - chunk['anomaly_score'].rank(pct=True)
+        alerts = chunk[(chunk['is_anomaly'] == 1) & (severity >= self.props.get('threshold', 0.0))]
+        if len(alerts):
+            alerts = alerts.assign(severity=severity[alerts.index])
+            alerts.insert(0, 'source', chunk.attrs.get('source'))
+            self._write(self.alerts, alerts)
+
+    def finish(self):
+        self.alerts.close()
+        output = self.alerts.path
+        if self.results is not None:
+            self.results.close()
+            output = self.results.path
+        publish_stats('detection', output, records=self.records, anomalies=self.anomalies)
+        if self.alerts.rows and self.props.get('notification'):
+            print(f"ALERT [{self.pipeline}]: {self.alerts.rows} records for "
+                  f"{self.props.get('recipients', 'security team')} ({self.props['notification']})")
+        return {'records': self.records, 'anomalies': self.anomalies,
+                'alerts': self.alerts.rows, 'output': str(output)}
+
+# Spring Dataflow apps in pipeline_config.yaml
+APPS = {
+    'kafka-source': KafkaSource,
+    'file-source': FileSource,
+    'pseudonym-processor': PseudonymProcessor,
+    'privbayes-processor': PrivBayesProcessor,
+    'isolation-forest-processor': IsolationForestProcessor,
+    'half-space-trees-processor': HalfSpaceTreesProcessor,
+    'hdfs-sink': FileSink,
+    'alert-sink': AlertSink
+}
+
+# Workflow services in workflows.yaml
+SERVICES = {
+    'DataIngestionService': FileSource,
+    'DataLoadingService': FileSource,
+    'AnonymizationService': AnonymizeProcessor,
+    'StorageService': FileSink,
+    'AnomalyDetectionService': IsolationForestProcessor,
+    'AlertService': AlertSink,
+    'FeatureService': FeatureSource,
+    'MLService': TrainingProcessor,
+    'EvaluationService': ReportSink
+}
+
+def resolve(name, registry):
+    """Implementation for an app/service name, or a dotted 'module.Class' path"""
+    if name in registry:
+        return registry[name]
+    if '.' in name:
+        module, _, cls = name.rpartition('.')
+        return getattr(importlib.import_module(module), cls)
+    raise KeyError(f"No implementation registered for '{name}'")
+
+# ---------------------------------------------------------------------------
+# Graph
+# ---------------------------------------------------------------------------
+
+class StreamNode:
+    def __init__(self, name, steps):
+        """A linear chain of steps, one pipeline or workflow"""
+        self.name = name
+        self.steps = steps
+        self.depends_on = set()
+
+    def reads(self):
+        return [Path(p) for step in self.steps for p in step.reads()]
+
+    def writes(self):
+        return [Path(p) for step in self.steps for p in step.writes()]
+
+def _overlaps(read, written):
+    read, written = read.resolve(), written.resolve()
+    return read == written or read in written.parents
+
+def build_graph(pipeline_config=PIPELINE_CONFIG, workflows_config=WORKFLOWS_CONFIG,
+                context=None, select=None):
+    """
+    Parse both config files into stream nodes with dependency edges
+    A node depends on another when it reads a path the other writes.
+    Args:
+        select: Optional node names to keep (pipeline keys or workflow keys)
+    """
+    context = context or ExecutionContext()
+    nodes = {}
+
+    for key, spec in (_load_yaml(pipeline_config).get('pipelines') or {}).items():
+        name = spec.get('name', key)
+        steps = [resolve(step['app'], APPS)(step['name'], step.get('properties'), context, name)
+                 for step in spec['steps']]
+        nodes[key] = StreamNode(key, steps)
+
+    service_defaults = context.data.get('services') or {}
+    for key, spec in (_load_yaml(workflows_config).get('workflows') or {}).items():
+        steps = []
+        for entry in spec['steps']:
+            for step in entry.values():
+                impl = resolve(step['service'], SERVICES)
+                props = dict(service_defaults.get(step['service']) or {})
+                props.update({k: v for k, v in step.items() if k not in ('name', 'service')})
+                # A source's input and a sink's output name datasets in the data config;
+                # between steps they only label the stream
+                dataset_input, dataset_output = props.pop('input', None), props.pop('output', None)
+                if impl.kind == 'source' and dataset_input:
+                    props['path'] = context.dataset(dataset_input)
+                if impl.kind == 'sink' and dataset_output:
+                    props['file'] = context.dataset(dataset_output)
+                steps.append(impl(step['name'], props, context, key))
+        nodes[key] = StreamNode(key, steps)
+
+    if select:
+        unknown = set(select) - set(nodes)
+        if unknown:
+            raise KeyError(f"Unknown pipelines/workflows: {sorted(unknown)}")
+        nodes = {name: node for name, node in nodes.items() if name in select}
+
+    for node in nodes.values():
+        for other in nodes.values():
+            if other is not node and any(
+                _overlaps(read, written) for read in node.reads() for written in other.writes()
+            ):
+                node.depends_on.add(other.name)
+    _check_acyclic(nodes)
+    return nodes
+
+def _check_acyclic(nodes):
+    remaining = {name: set(node.depends_on) for name, node in nodes.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+class StepTimer:
+    def __init__(self, node, step):
+        self.node = node
+        self.step = step
+        self.busy = 0.0
+        self.chunks = 0
+        self.rows_in = 0
+        self.rows_out = 0
+
+    def as_dict(self):
+        return {
+            'node': self.node,
+            'step': self.step.name,
+            'impl': type(self.step).__name__,
+            'chunks': self.chunks,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'busy_seconds': round(self.busy, 3)
+        }
+
+class DAGExecutor:
+    def __init__(self, nodes, max_workers=4, queue_size=4, sampler=None):
+        """
+        Run stream nodes in dependency order
+        Args:
+            nodes: Output of build_graph()
+            max_workers: Nodes that may run at the same time
+            queue_size: Chunks buffered between two steps; a slow step
+                stalls its upstream instead of growing memory
+            sampler: Optional BackgroundSampler; each step thread's CPU time is
+                credited to '<node>:<step>' while it produces or processes a chunk
+        """
+        self.nodes = nodes
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.sampler = sampler
+        self.timers = []
+        self.results = {}
+        print(f"DAG Executor Initialized ({len(nodes)} nodes)")
+
+    @staticmethod
+    def _put(q, item, cancel):
+        while not cancel.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    @staticmethod
+    def _get(q, cancel):
+        while not cancel.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _END
+
+    @contextmanager
+    def _busy(self, timer):
+        """Time a unit of step work and credit this thread's CPU to the step meanwhile"""
+        stage = f'{timer.node}:{timer.step.name}'
+        if self.sampler is not None:
+            self.sampler.start_stage(stage, per_thread=True)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timer.busy += time.perf_counter() - start
+            if self.sampler is not None:
+                self.sampler.end_stage(stage)
+
+    def _run_step(self, step, timer, inbox, outbox, cancel, errors, summary):
+        try:
+            step.open()
+            if step.kind == 'source':
+                chunks = step.produce()
+                while True:
+                    with self._busy(timer):
+                        chunk = next(chunks, _END)
+                    if chunk is _END or not self._put(outbox, chunk, cancel):
+                        break
+                    timer.chunks += 1
+                    timer.rows_out += len(chunk)
+            else:
+                while True:
+                    chunk = self._get(inbox, cancel)
+                    if chunk is _END:
+                        break
+                    with self._busy(timer):
+                        out = step.process(chunk)
+                    timer.chunks += 1
+                    timer.rows_in += len(chunk)
+                    if outbox is not None and out is not None and len(out):
+                        timer.rows_out += len(out)
+                        self._put(outbox, out, cancel)
+                with self._busy(timer):
+                    final = None if cancel.is_set() else step.finish()
+                if isinstance(final, pd.DataFrame) and outbox is not None:
+                    timer.rows_out += len(final)
+                    self._put(outbox, final, cancel)
+                elif isinstance(final, dict):
+                    summary.update(final)
+        except BaseException as error:
+            errors.append((step.name, error))
+            cancel.set()
+        finally:
+            if outbox is not None:
+                self._put(outbox, _END, cancel)
+
+    def run_node(self, node):
+        """Run every step of a node in its own thread, linked by bounded queues"""
+        print(f"\n>>> {node.name}: {' -> '.join(step.name for step in node.steps)}")
+        start = time.perf_counter()
+        cancel = threading.Event()
+        errors, summary = [], {}
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in node.steps[1:]]
+        threads = []
+        for i, step in enumerate(node.steps):
+            timer = StepTimer(node.name, step)
+            self.timers.append(timer)
+            inbox = queues[i - 1] if i > 0 else None
+            outbox = queues[i] if i < len(queues) else None
+            threads.append(threading.Thread(
+                target=self._run_step, name=f'{node.name}:{step.name}',
+                args=(step, timer, inbox, outbox, cancel, errors, summary), daemon=True
+            ))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            step_name, error = errors[0]
+            raise RuntimeError(f"{node.name} failed at step '{step_name}': {error}") from error
+        return {'status': 'ok', 'seconds': round(time.perf_counter() - start, 3), **summary}
+
+    def run(self):
+        """Run all nodes; independent ones run concurrently. Returns per-node results."""
+        pending = dict(self.nodes)
+        running = {}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name, node in list(pending.items()):
+                    statuses = [self.results.get(dep, {}).get('status') for dep in node.depends_on]
+                    if any(status in ('failed', 'skipped') for status in statuses):
+                        self.results[name] = {'status': 'skipped', 'seconds': 0.0}
+                        del pending[name]
+                        print(f"--- {name} skipped: an upstream node did not finish")
+                    elif all(status == 'ok' for status in statuses):
+                        running[pool.submit(self.run_node, node)] = name
+                        del pending[name]
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.results[name] = future.result()
+                    except Exception as error:
+                        self.results[name] = {'status': 'failed', 'seconds': 0.0, 'error': str(error)}
+                        print(f"!!! {error}")
+        self.wall_seconds = time.perf_counter() - start
+        return self.results
+
+    def timings(self):
+        """Per-step timings of the last run"""
+        return pd.DataFrame([timer.as_dict() for timer in self.timers])
+
+def run_dag(select=None, max_workers=4, queue_size=4, timings_path=None,
+            pipeline_config=PIPELINE_CONFIG, workflows_config=WORKFLOWS_CONFIG,
+            data_config=DATA_CONFIG, sample_rate=None, usage_path=None):
+    nodes = build_graph(pipeline_config, workflows_config, ExecutionContext(data_config), select)
+    print("="*80)
+    print(f"DAG EXECUTOR - {len(nodes)} pipelines/workflows")
+    print("="*80)
+    for name, node in nodes.items():
+        after = f" (after {', '.join(sorted(node.depends_on))})" if node.depends_on else ""
+        print(f"   {name}{after}")
+
+    sampler = BackgroundSampler(rate_hz=sample_rate) if sample_rate else None
+    executor = DAGExecutor(nodes, max_workers, queue_size, sampler)
+    if sampler is not None:
+        with sampler:
+            results = executor.run()
+    else:
+        results = executor.run()
+    timings = executor.timings()
+
+    print("\n" + "="*80)
+    print("DAG RUN COMPLETE")
+    print("="*80)
+    summary = pd.DataFrame([{'node': name, **result} for name, result in results.items()])
+    columns = [c for c in ('node', 'status', 'seconds', 'records', 'anomalies', 'output') if c in summary]
+    print(summary[columns].to_string(index=False))
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"   {name}: {result['error']}")
+    if len(timings):
+        print("\n" + timings.to_string(index=False))
+        if timings_path:
+            write_table(timings, timings_path)
+            print(f"\nStep timings saved to {timings_path}")
+    if sampler is not None:
+        usage = sampler.summary()
+        if len(usage):
+            print("\n" + usage.to_string(index=False))
+        if usage_path:
+            write_table(usage, usage_path)
+            print(f"Per-step resource usage saved to {usage_path}")
+    print(f"Wall clock: {executor.wall_seconds:.1f}s")
+    return results, timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the declarative pipelines and workflows")
+    parser.add_argument('nodes', nargs='*', help="Pipelines/workflows to run (default: all)")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--queue-size', type=int, default=4)
+    parser.add_argument('--timings', default='results/tables/dag_step_timings.csv')
+    parser.add_argument('--pipeline-config', default=PIPELINE_CONFIG)
+    parser.add_argument('--workflows-config', default=WORKFLOWS_CONFIG)
+    parser.add_argument('--data-config', default=DATA_CONFIG)
+    parser.add_argument('--sample-rate', type=float, default=None,
+                        help="Sample CPU/RSS/IO per step at this rate in Hz (e.g. 20)")
+    parser.add_argument('--usage', default='results/tables/dag_step_usage.csv')
+    args = parser.parse_args()
+    results, _ = run_dag(args.nodes or None, args.workers, args.queue_size, args.timings,
+                         args.pipeline_config, args.workflows_config, args.data_config,
+                         args.sample_rate, args.usage)
+    sys.exit(0 if all(result['status'] == 'ok' for result in results.values()) else 1)
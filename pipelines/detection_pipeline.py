@@ -7,37 +7,180 @@ import pandas as pd
 import numpy as np
 from sklearn.ensemble import IsolationForest
 from pathlib import Path
+import joblib
+import sys
+import tempfile
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data.pipeline_stats import publish_stats
+from src.data.stage_cache import code_version
+from src.data.storage import infer_format, read_table, TableWriter
+
+# Columns written by detection itself; never used as model features
+RESULT_COLUMNS = ['is_anomaly', 'anomaly_score']
 
 class DetectionPipeline:
-    def __init__(self, contamination=0.1):
-        self.model = IsolationForest(contamination=contamination, random_state=42)
+    def __init__(self, contamination=0.1, random_state=42, cache=None):
+        """
+        Args:
+            cache: Optional StageCache for run_detection when the detector is fitted on its input
+        """
+        self.contamination = contamination
+        self.random_state = random_state
+        self.cache = cache
+        self.model = IsolationForest(contamination=contamination, random_state=random_state)
+        self.features = None
+        self.threshold = None
         print("Detection Pipeline Initialized")
 
+    @property
+    def is_fitted(self):
+        return self.features is not None
+
+    def _feature_matrix(self, data):
+        """Select the detector's feature columns from data"""
+        if self.features is None:
+            numeric_cols = data.select_dtypes(include=[np.number]).columns
+            return data[[col for col in numeric_cols if col not in RESULT_COLUMNS]]
+        missing = [col for col in self.features if col not in data.columns]
+        if missing:
+            raise ValueError(f"Data is missing detector features: {missing}")
+        return data[self.features]
+
+    def fit(self, data):
+        """Fit the Isolation Forest and fix its feature list and threshold"""
+        X = self._feature_matrix(data)
+        self.model.fit(X)
+        self.features = list(X.columns)
+        # score_samples below offset_ is what IsolationForest labels -1
+        self.threshold = float(self.model.offset_)
+        return self
+
+    def score(self, data):
+        """Continuous anomaly scores (lower = more anomalous)"""
+        if not self.is_fitted:
+            raise ValueError("Detector must be fitted or loaded before scoring")
+        return self.model.score_samples(self._feature_matrix(data))
+
+    def predict(self, data):
+        """0/1 anomaly labels from the fitted threshold"""
+        return (self.score(data) < self.threshold).astype(int)
+
+    def save(self, path):
+        """Persist the fitted detector with its features and threshold"""
+        if not self.is_fitted:
+            raise ValueError("Only a fitted detector can be saved")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self._get_state(), path)
+        print(f"Detector saved to {path}")
+
+    def _get_state(self):
+        return {
+            'model': self.model,
+            'features': self.features,
+            'threshold': self.threshold,
+            'contamination': self.contamination
+        }
+
+    def _set_state(self, state):
+        self.model = state['model']
+        self.features = state['features']
+        self.threshold = state['threshold']
+        return self
+
+    @classmethod
+    def load(cls, path):
+        """Load a fitted detector saved with save()"""
+        state = joblib.load(path)
+        return cls(contamination=state['contamination'])._set_state(state)
+
+    def cache_params(self):
+        """Everything besides the input that determines a fit-and-label run"""
+        if self.is_fitted:
+            return None
+        return {
+            'code': code_version(DetectionPipeline, IsolationForest),
+            'contamination': self.contamination,
+            'random_state': self.random_state
+        }
+
     def detect_anomalies(self, data):
         """Detect anomalies in data using Isolation Forest"""
-        predictions = self.model.fit_predict(data)
-        anomalies = np.where(predictions == -1)[0]
+        if not self.is_fitted:
+            self.fit(data)
+        predictions = self.predict(data)
+        anomalies = np.where(predictions == 1)[0]
         return anomalies
 
-    def run_detection(self, input_path, output_path):
-        """Run anomaly detection pipeline"""
+    def detect_frame(self, df):
+        """Label an in-memory DataFrame, fitting first if no detector is loaded"""
+        if not self.is_fitted:
+            self.fit(df)
+        scores = self.score(df)
+        labels = (scores < self.threshold).astype(int)
+        print(f"Detected {labels.sum()} anomalies")
+
+        # Mark anomalies on a shallow copy; input columns are shared, not copied
+        results = df.copy(deep=False)
+        results['anomaly_score'] = scores
+        results['is_anomaly'] = labels
+        return results
+
+    def run_detection(self, input_path, output_path, chunksize=100_000, progress=None):
+        """
+        Run anomaly detection pipeline
+        Args:
+            chunksize: Records scored and written per step
+            progress: Optional callback called with the running record count
+                after fitting and after each chunk; raising from it stops the run
+        """
+        params = self.cache_params() if self.cache is not None else None
+        if params is not None:
+            key = self.cache.key('detection', [input_path], {**params, 'format': infer_format(output_path)})
+            meta = self.cache.lookup(key)
+            if meta is not None:
+                self.cache.restore(meta, {'output': output_path})
+                self._set_state(joblib.load(Path(meta['path']) / 'detector'))
+                publish_stats('detection', output_path, records=meta['records'], anomalies=meta['anomalies'])
+                print(f"Detection results restored from cache to {output_path}")
+                return read_table(output_path)
+
         print(f"Loading data from {input_path}...")
-        df = pd.read_csv(input_path)
-        
-        # Select numeric columns
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        data = df[numeric_cols]
-        
-        # Detect anomalies
-        anomalies = self.detect_anomalies(data)
-        print(f"Detected {len(anomalies)} anomalies")
-        
-        # Mark anomalies
-        df['is_anomaly'] = 0
-        df.loc[anomalies, 'is_anomaly'] = 1
-        
-        # Save results
-        df.to_csv(output_path, index=False)
+        df = read_table(input_path)
+
+        # Fits on this data unless a fitted detector was loaded
+        if not self.is_fitted:
+            self.fit(df)
+        if progress is not None:
+            progress(0)
+
+        # Score and save results chunk by chunk
+        scores = np.empty(len(df))
+        with TableWriter(output_path) as writer:
+            for start in range(0, len(df), chunksize):
+                chunk = df.iloc[start:start + chunksize]
+                scores[start:start + len(chunk)] = self.score(chunk)
+                results = chunk.copy(deep=False)
+                results['anomaly_score'] = scores[start:start + len(chunk)]
+                results['is_anomaly'] = (results['anomaly_score'] < self.threshold).astype(int)
+                writer.write(results)
+                if progress is not None:
+                    progress(start + len(chunk))
+        df = df.copy(deep=False)
+        df['anomaly_score'] = scores
+        df['is_anomaly'] = (scores < self.threshold).astype(int)
+        print(f"Detected {df['is_anomaly'].sum()} anomalies")
+
+        publish_stats('detection', output_path, records=len(df), anomalies=df['is_anomaly'].sum())
+        if params is not None:
+            # The fitted detector is cached too, so a hit leaves this pipeline fitted
+            with tempfile.TemporaryDirectory() as tmp:
+                detector_path = Path(tmp) / 'detector'
+                joblib.dump(self._get_state(), detector_path)
+                self.cache.store(key, {'output': output_path, 'detector': detector_path}, stage='detection',
+                                 records=len(df), anomalies=int(df['is_anomaly'].sum()))
         print(f"Detection results saved to {output_path}")
         return df
 
@@ -0,0 +1,177 @@
+"""
+Fused Pipeline - In-Memory Anonymization and Detection
+Chains the bootstrap and detection pipelines in one process
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import joblib
+import sys
+import tempfile
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pipelines.bootstrap_pipeline import BootstrapPipeline
+from pipelines.detection_pipeline import DetectionPipeline
+from src.data.pipeline_stats import publish_stats
+from src.data.storage import infer_format, iter_table, write_table, TableWriter
+
+class FusedPipeline:
+    def __init__(self, bootstrap=None, detector=None, contamination=0.1, cache=None):
+        """
+        Compose anonymization and detection in one process
+        Args:
+            bootstrap: BootstrapPipeline to reuse (created if None)
+            detector: DetectionPipeline to reuse (created if None)
+            contamination: Contamination for a newly created detector
+            cache: Optional StageCache for run_file (see BootstrapPipeline for what is cacheable)
+        """
+        self.bootstrap = bootstrap or BootstrapPipeline(cache=cache)
+        self.detector = detector or DetectionPipeline(contamination=contamination, cache=cache)
+        self.cache = cache
+        print("Fused Pipeline Initialized")
+
+    def run(self, df, output_path=None, anonymized_path=None):
+        """
+        Anonymize and label a DataFrame in memory
+        Args:
+            df: Raw input records
+            output_path: Optional sink for the detection results
+            anonymized_path: Optional sink for the anonymized records
+        """
+        anonymized = self.bootstrap.anonymize_frame(df)
+        if anonymized_path:
+            write_table(anonymized, anonymized_path)
+            print(f"Anonymized data saved to {anonymized_path}")
+        return self._detect(anonymized, output_path)
+
+    def cache_params(self):
+        bootstrap_params = self.bootstrap.cache_params()
+        detector_params = self.detector.cache_params()
+        if bootstrap_params is None or detector_params is None:
+            return None
+        return {'anonymize': bootstrap_params, 'detection': detector_params}
+
+    def run_file(self, input_path, output_path, anonymized_path=None, chunksize=100_000, fit_rows=None):
+        """
+        Stream a raw file through anonymization and detection in bounded memory
+        An unfitted detector is fitted on a uniform reservoir sample of the
+        anonymized records, which are spooled to disk (anonymized_path, or a
+        temporary file) and then scored chunk by chunk.
+        Args:
+            fit_rows: Reservoir size for fitting (default: chunksize)
+        Returns:
+            Dict with the record and anomaly counts
+        """
+        params = self.cache_params() if self.cache is not None else None
+        if params is not None:
+            key = self.cache.key('fused', [input_path], {
+                **params, 'chunksize': chunksize, 'fit_rows': fit_rows, 'format': infer_format(output_path),
+                'anonymized_format': anonymized_path and infer_format(anonymized_path)
+            })
+            meta = self.cache.lookup(key)
+            if meta is not None:
+                outputs = {'output': output_path}
+                if anonymized_path:
+                    outputs['anonymized'] = anonymized_path
+                self.cache.restore(meta, outputs)
+                self.bootstrap.restore_cached_state(meta)
+                self.detector._set_state(joblib.load(Path(meta['path']) / 'detector'))
+                publish_stats('anonymize', output_path, records=meta['records'])
+                publish_stats('detection', output_path, records=meta['records'], anomalies=meta['anomalies'])
+                print(f"Detection results restored from cache to {output_path}")
+                return {'records': meta['records'], 'anomalies': meta['anomalies']}
+
+        print(f"Streaming data from {input_path} in chunks of {chunksize:,}...")
+        chunks = self.bootstrap.iter_anonymized_chunks(input_path, chunksize)
+        with tempfile.TemporaryDirectory() as tmp:
+            if self.detector.is_fitted:
+                counts = self._score_chunks(chunks, output_path, anonymized_path)
+            else:
+                # Spool in the output's format so scored chunks keep the anonymized schema
+                spool_path = anonymized_path
+                if spool_path is None or infer_format(spool_path) != infer_format(output_path):
+                    spool_path = Path(tmp) / f'anonymized{Path(output_path).suffix}'
+                sample = self._spool(chunks, spool_path, anonymized_path, fit_rows or chunksize)
+                print(f"Fitting detector on a sample of {len(sample):,} records")
+                self.detector.fit(sample)
+                del sample
+                counts = self._score_chunks(iter_table(spool_path, chunksize), output_path)
+
+            publish_stats('anonymize', output_path, records=counts['records'])
+            publish_stats('detection', output_path, **counts)
+            self.bootstrap.pseudonym_manager.publish_count()
+            print(f"Detection results saved to {output_path}")
+            if params is not None:
+                detector_path = Path(tmp) / 'detector'
+                joblib.dump(self.detector._get_state(), detector_path)
+                files = {'output': output_path, 'detector': detector_path}
+                if anonymized_path:
+                    files['anonymized'] = anonymized_path
+                self.cache.store(key, files, stage='fused', **counts, **self.bootstrap.cached_state())
+        return counts
+
+    def _spool(self, chunks, spool_path, anonymized_path, fit_rows):
+        """Write anonymized chunks to disk, keeping a uniform random sample of fit_rows records"""
+        # Separate generator: the privacy noise stream must not depend on sampling
+        rng = np.random.default_rng(self.detector.random_state)
+        sample = None
+        writers = [TableWriter(spool_path)]
+        if anonymized_path and Path(anonymized_path) != Path(spool_path):
+            writers.append(TableWriter(anonymized_path))
+        try:
+            for chunk in chunks:
+                for writer in writers:
+                    writer.write(chunk)
+                # Bottom-k of uniform keys over all rows seen so far is a uniform sample
+                keyed = chunk.assign(_sample_key=rng.random(len(chunk)))
+                sample = keyed if sample is None else pd.concat([sample, keyed], ignore_index=True)
+                if len(sample) > fit_rows:
+                    sample = sample.nsmallest(fit_rows, '_sample_key')
+        finally:
+            for writer in writers:
+                writer.close()
+        print(f"Anonymized {writers[0].rows:,} records")
+        if anonymized_path:
+            print(f"Anonymized data saved to {anonymized_path}")
+        if sample is None:
+            return pd.DataFrame()
+        return sample.drop(columns='_sample_key')
+
+    def _score_chunks(self, chunks, output_path, anonymized_path=None):
+        """Label chunks with the fitted detector and append them to output_path"""
+        records = anomalies = 0
+        with TableWriter(output_path) as writer:
+            anonymized = TableWriter(anonymized_path) if anonymized_path else None
+            try:
+                for chunk in chunks:
+                    if anonymized is not None:
+                        anonymized.write(chunk)
+                    scores = self.detector.score(chunk)
+                    results = chunk.copy(deep=False)
+                    results['anomaly_score'] = scores
+                    results['is_anomaly'] = (scores < self.detector.threshold).astype(int)
+                    writer.write(results)
+                    records += len(results)
+                    anomalies += int(results['is_anomaly'].sum())
+            finally:
+                if anonymized is not None:
+                    anonymized.close()
+        print(f"Detected {anomalies} anomalies in {records:,} records")
+        return {'records': records, 'anomalies': anomalies}
+
+    def _detect(self, anonymized, output_path):
+        results = self.detector.detect_frame(anonymized)
+        if output_path:
+            write_table(results, output_path)
+            publish_stats('anonymize', output_path, records=len(anonymized))
+            publish_stats('detection', output_path, records=len(results),
+                          anomalies=results['is_anomaly'].sum())
+            self.bootstrap.pseudonym_manager.publish_count()
+            print(f"Detection results saved to {output_path}")
+        return results
+
+if __name__ == "__main__":
+    pipeline = FusedPipeline()
+    print("Fused Pipeline Ready!")
@@ -1 +1,206 @@
-# Inference Pipeline 
+"""
+Inference Pipeline - Low-Latency Model Serving
+Keeps the production model warm and coalesces concurrent requests into micro-batches
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+import joblib
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models.registry.model_registry import ModelRegistry
+
+def _allows_nan(model):
+    """Whether an estimator accepts NaN input (sklearn's allow_nan tag)"""
+    try:
+        return model.__sklearn_tags__().input_tags.allow_nan
+    except AttributeError:
+        return False
+
+class InferencePipeline:
+    def __init__(self, model_path='models/trained/production_model.pkl',
+                 features_path='models/trained/feature_names.pkl',
+                 max_batch_size=4096, max_wait_ms=5, latency_window=10_000,
+                 model=None, features=None):
+        """
+        Serve the model saved by TrainingPipeline
+        Args:
+            model_path: Fitted classifier written by train_anomaly_model
+            features_path: Feature names it was trained on
+            max_batch_size: Rows per coalesced predict_proba call
+            max_wait_ms: Longest a request waits for others to join its batch
+            latency_window: Recent request latencies kept for p50/p99
+            model, features: Already-loaded model and feature names; skip the files
+        """
+        self.model = model if model is not None else joblib.load(model_path)
+        self.features = list(features if features is not None else joblib.load(features_path))
+        trained_on = getattr(self.model, 'feature_names_in_', None)
+        if trained_on is not None and list(trained_on) != self.features:
+            raise ValueError("Feature names do not match the model's training columns")
+        # Models fitted on DataFrames are scored with the same column names;
+        # the estimator itself is left untouched
+        self._named = trained_on is not None
+        # Estimators that route NaN natively (forests, histogram boosting) see it as trained
+        self._allow_nan = _allows_nan(self.model)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        classes = list(getattr(self.model, 'classes_', [0, 1]))
+        self._positive = classes.index(1) if 1 in classes else None
+
+        self._requests = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._latencies = np.zeros(latency_window)
+        self._n_requests = 0
+        self._rows = 0
+        self._batches = 0
+        self._started = None
+        self._lock = threading.Lock()
+
+        # Warm-up call so the first real request does not pay for lazy setup
+        self.predict_proba(pd.DataFrame(columns=self.features, index=[0]))
+        print(f"Inference Pipeline Initialized ({len(self.features)} features)")
+
+    @classmethod
+    def from_registry(cls, name='production_model', version='production',
+                      registry_root='models/trained/registry', **kwargs):
+        """Serve a registry version, memory-mapping its arrays instead of copying them"""
+        model, manifest = ModelRegistry(registry_root).load(name, version)
+        print(f"Loaded {name} {manifest['version']} from registry")
+        return cls(model=model, features=manifest['features'], **kwargs)
+
+    def align(self, records):
+        """
+        Feature matrix in training column order
+        Missing values stay NaN; a feature column absent from every record is an error.
+        """
+        if not isinstance(records, pd.DataFrame):
+            records = pd.DataFrame([records] if isinstance(records, dict) else records)
+        missing = [col for col in self.features if col not in records.columns]
+        if missing and len(records):
+            raise ValueError(f"Records are missing model features: {missing}")
+        return records.reindex(columns=self.features).to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def _predict_matrix(self, X):
+        if self._positive is None:
+            return np.zeros(len(X))
+        if not self._allow_nan:
+            X = np.nan_to_num(X)
+        if self._named:
+            X = pd.DataFrame(X, columns=self.features, copy=False)
+        return self.model.predict_proba(X)[:, self._positive]
+
+    def predict_proba(self, records):
+        """Anomaly probability per record, computed directly in this thread"""
+        return self._predict_matrix(self.align(records))
+
+    def predict(self, records, threshold=0.5):
+        """0/1 labels per record, computed directly in this thread"""
+        return (self.predict_proba(records) >= threshold).astype(int)
+
+    def start(self):
+        """Start the dynamic batching worker (once, even when called concurrently)"""
+        with self._thread_lock:
+            if self._thread is None:
+                self._started = time.perf_counter()
+                self._thread = threading.Thread(target=self._batch_loop, daemon=True)
+                self._thread.start()
+        return self
+
+    def submit(self, records):
+        """Queue records for batched scoring; returns a Future of probabilities"""
+        self.start()
+        future = Future()
+        # Alignment happens in the caller's thread so the worker only predicts
+        self._requests.put((time.perf_counter(), self.align(records), future))
+        return future
+
+    def infer(self, records, timeout=None):
+        """Score records through the batcher and wait for the result"""
+        return self.submit(records).result(timeout)
+
+    def _batch_loop(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            batch = [request]
+            rows = len(request[1])
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while rows < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    request = (self._requests.get_nowait() if remaining <= 0
+                               else self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+                rows += len(request[1])
+
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch):
+        try:
+            probabilities = self._predict_matrix(np.concatenate([X for _, X, _ in batch]))
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        done = time.perf_counter()
+        start = 0
+        with self._lock:
+            for submitted, X, future in batch:
+                future.set_result(probabilities[start:start + len(X)])
+                start += len(X)
+                self._latencies[self._n_requests % len(self._latencies)] = done - submitted
+                self._n_requests += 1
+            self._rows += start
+            self._batches += 1
+
+    def stats(self):
+        """Request latency percentiles and throughput of the batcher"""
+        with self._lock:
+            n = min(self._n_requests, len(self._latencies))
+            latencies = self._latencies[:n] * 1000
+            elapsed = time.perf_counter() - self._started if self._started else 0
+            return {
+                'requests': self._n_requests,
+                'rows': self._rows,
+                'batches': self._batches,
+                'mean_batch_rows': self._rows / self._batches if self._batches else 0,
+                'p50_ms': float(np.percentile(latencies, 50)) if n else 0.0,
+                'p99_ms': float(np.percentile(latencies, 99)) if n else 0.0,
+                'rows_per_sec': self._rows / elapsed if elapsed else 0.0
+            }
+
+    def close(self):
+        """Finish queued requests and stop the batching worker"""
+        with self._thread_lock:
+            if self._thread is not None:
+                self._requests.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    with InferencePipeline() as pipeline:
+        print("Inference Pipeline Ready!")
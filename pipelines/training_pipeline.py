@@ -6,31 +6,92 @@ Trains models on privacy-preserved data for production use
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.ensemble import (
+    RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
+)
+from sklearn.metrics import (
+    classification_report, confusion_matrix, average_precision_score, roc_auc_score
+)
 import joblib
+import time
 from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data.storage import read_table
+from src.models.registry.model_registry import ModelRegistry
+
+METRICS = {
+    'average_precision': average_precision_score,
+    'roc_auc': roc_auc_score
+}
+
+def candidate_models(parallel=True, random_state=42):
+    """
+    Candidate classifiers to compare
+    The parallel set uses every core inside the forest and replaces the
+    single-threaded GradientBoostingClassifier with histogram boosting.
+    """
+    if not parallel:
+        return {
+            'RandomForest': RandomForestClassifier(n_estimators=100, random_state=random_state),
+            'GradientBoosting': GradientBoostingClassifier(n_estimators=100, random_state=random_state)
+        }
+    return {
+        'RandomForest': RandomForestClassifier(
+            n_estimators=100, n_jobs=-1, random_state=random_state
+        ),
+        'HistGradientBoosting': HistGradientBoostingClassifier(
+            max_iter=500, early_stopping=True, validation_fraction=0.1,
+            n_iter_no_change=10, random_state=random_state
+        )
+    }
+
+def fit_candidate(name, model, X_train, y_train, X_test, y_test, metric='average_precision'):
+    """Fit one candidate and score it on held-out data"""
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    proba = model.predict_proba(X_test)[:, -1]
+    return {
+        'name': name,
+        'model': model,
+        'score': METRICS[metric](y_test, proba),
+        'accuracy': model.score(X_test, y_test),
+        'fit_seconds': fit_seconds
+    }
 
 class TrainingPipeline:
-    def __init__(self):
+    def __init__(self, registry_root='models/trained/registry'):
         self.models = {}
+        self.registry = ModelRegistry(registry_root)
         print("Training Pipeline Initialized")
     
-    def train_anomaly_model(self, data_path='data/anonymized/sample_anonymized.csv'):
-        """Train production ML model on anonymized data"""
+    def train_anomaly_model(self, data_path='data/anonymized/sample_anonymized.csv',
+                            parallel=True, metric='average_precision', promote=True):
+        """
+        Train production ML model on anonymized data
+        Args:
+            parallel: Fit candidates concurrently with multi-core models
+            metric: Held-out metric used to pick the best model
+                ('average_precision' or 'roc_auc')
+            promote: Make the new registry version the production one
+        """
         print("="*80)
         print("TRAINING PRODUCTION ML MODEL")
         print("="*80)
         
         # Load anonymized data
         print("\n[1/5] Loading anonymized training data...")
-        df = pd.read_csv(data_path)
+        df = read_table(data_path, numeric_only=True)
         
         # Prepare features
         print("[2/5] Preparing features...")
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        if 'is_anomaly' in numeric_cols:
-            numeric_cols.remove('is_anomaly')
+        numeric_cols = [
+            col for col in df.select_dtypes(include=[np.number]).columns
+            if col not in ('is_anomaly', 'anomaly_score')
+        ]
         
         X = df[numeric_cols]
         # If we have labels from detection
@@ -49,30 +110,32 @@ class TrainingPipeline:
         )
         
         # Train multiple models
-        print("[3/5] Training models...")
-        models_to_train = {
-            'RandomForest': RandomForestClassifier(n_estimators=100, random_state=42),
-            'GradientBoosting': GradientBoostingClassifier(n_estimators=100, random_state=42)
-        }
-        
-        best_score = 0
-        best_model_name = None
-        
-        for name, model in models_to_train.items():
-            print(f"   Training {name}...")
-            model.fit(X_train, y_train)
-            score = model.score(X_test, y_test)
-            print(f"   {name} Accuracy: {score:.4f}")
-            
-            self.models[name] = {
-                'model': model,
-                'score': score,
+        print(f"[3/5] Training models ({'parallel' if parallel else 'sequential'})...")
+        candidates = candidate_models(parallel)
+        if parallel:
+            # Threads: the forest and histogram boosting release the GIL while fitting
+            results = joblib.Parallel(n_jobs=len(candidates), prefer='threads')(
+                joblib.delayed(fit_candidate)(name, model, X_train, y_train, X_test, y_test, metric)
+                for name, model in candidates.items()
+            )
+        else:
+            results = [
+                fit_candidate(name, model, X_train, y_train, X_test, y_test, metric)
+                for name, model in candidates.items()
+            ]
+
+        for result in results:
+            print(f"   {result['name']}: {metric} {result['score']:.4f} | "
+                  f"accuracy {result['accuracy']:.4f} | fit {result['fit_seconds']:.2f}s")
+            self.models[result['name']] = {
+                'model': result['model'],
+                'score': result['score'],
+                'accuracy': result['accuracy'],
                 'features': numeric_cols
             }
-            
-            if score > best_score:
-                best_score = score
-                best_model_name = name
+
+        best = max(results, key=lambda result: result['score'])
+        best_model_name, best_score = best['name'], best['score']
         
         # Evaluate best model
         print(f"\n[4/5] Evaluating best model: {best_model_name}")
@@ -93,17 +156,30 @@ class TrainingPipeline:
         # Save metadata
         metadata = {
             'model_name': best_model_name,
-            'accuracy': best_score,
+            'metric': metric,
+            'score': best_score,
+            'accuracy': best['accuracy'],
             'features': numeric_cols,
             'training_date': pd.Timestamp.now().isoformat()
         }
         pd.DataFrame([metadata]).to_csv(model_path / 'model_metadata.csv', index=False)
+
+        # Versioned copy in the registry, loadable with memory-mapped arrays
+        manifest = self.registry.register(
+            'production_model', best_model, features=numeric_cols,
+            metrics={metric: best_score, 'accuracy': best['accuracy']},
+            data_path=data_path, training_seconds=round(best['fit_seconds'], 2),
+            extra={'model_name': best_model_name}
+        )
+        if promote:
+            self.registry.promote('production_model', manifest['version'])
         
         print(f"\n{'='*80}")
         print(f"TRAINING COMPLETE!")
         print(f"Best Model: {best_model_name}")
-        print(f"Accuracy: {best_score:.4f}")
+        print(f"{metric}: {best_score:.4f} (accuracy {best['accuracy']:.4f})")
         print(f"Model saved to: {model_path / 'production_model.pkl'}")
+        print(f"Registry version: production_model {manifest['version']}")
         print(f"{'='*80}")
         
         return best_model
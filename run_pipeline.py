@@ -3,12 +3,23 @@ EPICS MBDAaaS Setup and Orchestration
 Run this to execute the complete workflow
 """
 
+import argparse
+import runpy
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-def run_full_pipeline():
+def run_full_pipeline(seed=None, use_cache=True):
+    """
+    Args:
+        seed: Seeds the sample data and the privacy noise; seeded reruns reuse
+            cached stage outputs (unseeded noise is always fresh)
+        use_cache: Reuse cached stage outputs when the inputs are unchanged
+    """
+    from src.data.stage_cache import StageCache
+    cache = StageCache() if use_cache else None
+
     print("="*70)
     print("EPICS MBDAaaS - Complete Workflow Execution")
     print("Based on: Model-Based Big Data Analytics-as-a-Service Research")
@@ -16,12 +27,17 @@ def run_full_pipeline():
     
     # Step 1: Generate sample data
     print("\n[1/4] Generating Sample Data...")
-    exec(open('src/data/generate_sample_data.py').read())
+    if seed is not None:
+        import numpy as np
+        from faker import Faker
+        np.random.seed(seed)
+        Faker.seed(seed)
+    runpy.run_path('src/data/generate_sample_data.py')
     
     # Step 2: Run bootstrap pipeline
     print("\n[2/4] Running Bootstrap Pipeline (Anonymization)...")
     from pipelines.bootstrap_pipeline import BootstrapPipeline
-    bootstrap = BootstrapPipeline()
+    bootstrap = BootstrapPipeline(seed=seed, cache=cache)
     anonymized = bootstrap.anonymize_dataset(
         'data/raw/sample_data.csv',
         'data/anonymized/sample_anonymized.csv'
@@ -30,7 +46,7 @@ def run_full_pipeline():
     # Step 3: Run detection pipeline
     print("\n[3/4] Running Detection Pipeline (Anomaly Detection)...")
     from pipelines.detection_pipeline import DetectionPipeline
-    detector = DetectionPipeline()
+    detector = DetectionPipeline(cache=cache)
     results = detector.run_detection(
         'data/anonymized/sample_anonymized.csv',
         'results/tables/anomaly_results.csv'
@@ -54,4 +70,10 @@ def run_full_pipeline():
     print("="*70)
 
 if __name__ == "__main__":
-    run_full_pipeline()
+    parser = argparse.ArgumentParser(description="Run the complete EPICS workflow")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Seed for the sample data and privacy noise; seeded runs are cached and reused")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Recompute every stage instead of reusing cached outputs")
+    args = parser.parse_args()
+    run_full_pipeline(args.seed, not args.no_cache)
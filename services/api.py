@@ -3,15 +3,25 @@ MBDAaaS REST API
 FastAPI service for pipeline orchestration
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
+import asyncio
+import io
+import queue
 import sys
+import threading
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from pipelines.bootstrap_pipeline import BootstrapPipeline
 from pipelines.detection_pipeline import DetectionPipeline
+from services.jobs import JobCancelled, JobManager, JobQueueFull
+from src.data.pipeline_stats import StatsCache
+from src.data.storage import count_rows
 
 app = FastAPI(
     title="EPICS MBDAaaS API",
@@ -27,6 +37,275 @@ class DetectionRequest(BaseModel):
     input_path: str
     output_path: str
     contamination: float = 0.1
+    # Detector file names, relative to DETECTOR_DIR
+    model_path: Optional[str] = None
+    save_model_path: Optional[str] = None
+
+# Detectors are only loaded from and saved to this directory: loading unpickles
+DETECTOR_DIR = Path('models/trained/detectors')
+
+# Pipeline work runs here so the event loop stays free for other requests
+jobs = JobManager(max_workers=2, max_queued=8)
+
+# Counts published by pipeline runs, re-read only when the stats files change
+stats_cache = StatsCache()
+
+# Fitted detectors loaded from disk: path -> (mtime, detector)
+_detector_cache = {}
+
+def detector_file(name):
+    """Resolve a detector name inside DETECTOR_DIR, rejecting anything that escapes it"""
+    relative = Path(name)
+    if not name or relative.is_absolute() or '..' in relative.parts:
+        raise HTTPException(status_code=400, detail=f"Invalid detector name: {name}")
+    root = DETECTOR_DIR.resolve()
+    path = (root / relative).resolve()
+    # Also catches symlinks pointing outside the directory
+    if not path.is_relative_to(root):
+        raise HTTPException(status_code=400, detail=f"Invalid detector name: {name}")
+    return path
+
+async def get_detector(model_path):
+    """Load a saved detector once and reuse it until the file changes"""
+    path = detector_file(model_path)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail=f"Detector not found: {model_path}")
+    key = str(path.resolve())
+    mtime = path.stat().st_mtime
+    cached = _detector_cache.get(key)
+    if cached is None or cached[0] != mtime:
+        # Unpickling a forest takes long enough to stall every other request
+        cached = (mtime, await run_in_threadpool(DetectionPipeline.load, path))
+        _detector_cache[key] = cached
+    return cached[1]
+
+def _anonymize_job(job, request):
+    job.report(0.0, "Counting records")
+    expected = count_rows(request.input_path)
+    pipeline = BootstrapPipeline()
+
+    def progress(total):
+        # Held below 1.0 until the job finishes; CSV counts can run high
+        fraction = min(total / expected, 0.99) if expected else None
+        job.report(fraction, f"{total:,} of ~{expected:,} records anonymized")
+
+    records = pipeline.stream_anonymize_dataset(
+        request.input_path,
+        request.output_path,
+        progress=progress
+    )
+    return {"records_processed": records, "output_path": request.output_path}
+
+def _detect_job(job, request, pipeline):
+    job.report(0.0, "Counting records")
+    expected = count_rows(request.input_path)
+    job.report(0.05, "Loading and fitting the detector")
+
+    def progress(total):
+        # Scoring fills 0.1-0.9; a cancel request stops the job at the next chunk
+        fraction = 0.1 + 0.8 * min(total / expected, 1.0) if expected else None
+        job.report(fraction, f"{total:,} of ~{expected:,} records scored")
+
+    result = pipeline.run_detection(
+        request.input_path,
+        request.output_path,
+        progress=progress
+    )
+    if request.save_model_path:
+        job.report(0.9, "Saving detector")
+        pipeline.save(detector_file(request.save_model_path))
+    return {
+        "total_records": len(result),
+        "anomalies_detected": int(result['is_anomaly'].sum()),
+        "output_path": request.output_path
+    }
+
+async def _detection_pipeline(request):
+    if request.save_model_path:
+        # Reject a bad name before the job is queued
+        detector_file(request.save_model_path)
+    if request.model_path:
+        return await get_detector(request.model_path)
+    return DetectionPipeline(contamination=request.contamination)
+
+def submit_job(kind, fn, *args):
+    """Queue a job, or answer 429 when the job queue is full"""
+    try:
+        return jobs.submit(kind, fn, *args)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+async def run_job(kind, fn, *args):
+    """Run a job in the worker pool and wait for it without blocking the loop"""
+    job = submit_job(kind, fn, *args)
+    try:
+        return await asyncio.wrap_future(job.future)
+    except asyncio.CancelledError:
+        # Only a job cancelled through DELETE /api/jobs; a disconnected client
+        # cancels this coroutine itself, and that must propagate
+        if not job.future.cancelled():
+            raise
+        raise HTTPException(status_code=409, detail=f"Job {job.id} was cancelled")
+    except JobCancelled:
+        raise HTTPException(status_code=409, detail=f"Job {job.id} was cancelled")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+NDJSON_TYPE = 'application/x-ndjson'
+ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream'
+
+def _parse_lines(lines):
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+    return pa_json.read_json(pa.BufferReader(b'\n'.join(lines)))
+
+def _ndjson_schema(table, features):
+    """
+    Schema for every batch of a stream, fixed by the first
+    A later batch may hold decimals where the first had only integers, so
+    detector features and integers widen to float64; all-null fields become strings.
+    """
+    import pyarrow as pa
+    fields = []
+    for field in table.schema:
+        if field.name in features or pa.types.is_integer(field.type):
+            field = pa.field(field.name, pa.float64())
+        elif pa.types.is_null(field.type):
+            field = pa.field(field.name, pa.string())
+        fields.append(field)
+    return pa.schema(fields)
+
+def _conform(table, schema):
+    """Cast a batch to the stream's schema; absent fields become nulls, new ones are dropped"""
+    import pyarrow as pa
+    columns = [
+        table[field.name].cast(field.type) if field.name in table.column_names
+        else pa.nulls(len(table), field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+async def _ndjson_frames(request, batch_size, features):
+    """Parse a JSON-lines body into DataFrames as the bytes arrive, off the event loop"""
+    schema = None
+
+    def frame(lines):
+        nonlocal schema
+        table = _parse_lines(lines)
+        if schema is None:
+            schema = _ndjson_schema(table, features)
+        return _conform(table, schema).to_pandas()
+
+    pending, lines = b'', []
+    async for chunk in request.stream():
+        *complete, pending = (pending + chunk).split(b'\n')
+        lines.extend(line for line in complete if line.strip())
+        while len(lines) >= batch_size:
+            yield await asyncio.to_thread(frame, lines[:batch_size])
+            lines = lines[batch_size:]
+    if pending.strip():
+        lines.append(pending)
+    if lines:
+        yield await asyncio.to_thread(frame, lines)
+
+class _BodyReader(io.RawIOBase):
+    """
+    Blocking file-like view of a request body fed chunk by chunk from the event loop
+    Lets pyarrow's synchronous IPC reader run in a thread while the body is
+    still arriving; the bounded queue holds back the upload when scoring lags.
+    """
+
+    def __init__(self, max_chunks=16):
+        self.chunks = queue.Queue(maxsize=max_chunks)
+        self.pending = b''
+        self.finished = threading.Event()
+        self.abandoned = threading.Event()
+
+    def readable(self):
+        return True
+
+    def feed(self, chunk):
+        """Queue a body chunk, blocking while the queue is full (call from a thread)"""
+        while not self.abandoned.is_set():
+            try:
+                self.chunks.put(chunk, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def readinto(self, buffer):
+        while not self.pending:
+            try:
+                self.pending = self.chunks.get(timeout=0.1)
+            except queue.Empty:
+                if self.finished.is_set() and self.chunks.empty():
+                    return 0
+        n = min(len(buffer), len(self.pending))
+        buffer[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+def _next_batch(reader):
+    try:
+        return reader.read_next_batch()
+    except StopIteration:
+        return None
+
+async def _arrow_frames(request, batch_size):
+    """Split an Arrow IPC stream body into DataFrames of at most batch_size rows as it arrives"""
+    import pyarrow.ipc as ipc
+    body = _BodyReader()
+
+    async def pump():
+        try:
+            async for chunk in request.stream():
+                if chunk:
+                    await asyncio.to_thread(body.feed, chunk)
+        finally:
+            body.finished.set()
+
+    pumping = asyncio.create_task(pump())
+    try:
+        reader = await asyncio.to_thread(ipc.open_stream, io.BufferedReader(body))
+        while (batch := await asyncio.to_thread(_next_batch, reader)) is not None:
+            for start in range(0, batch.num_rows, batch_size):
+                yield batch.slice(start, batch_size).to_pandas()
+    finally:
+        body.abandoned.set()
+        pumping.cancel()
+
+class _ArrowStreamEncoder:
+    """Encode scored frames as one Arrow IPC stream, a message at a time"""
+
+    def __init__(self):
+        self.sink = io.BytesIO()
+        self.writer = None
+        self.schema = None
+
+    def _drain(self):
+        data = self.sink.getvalue()
+        self.sink.seek(0)
+        self.sink.truncate()
+        return data
+
+    def encode(self, frame):
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = ipc.new_stream(self.sink, self.schema)
+        self.writer.write_table(table)
+        return self._drain()
+
+    def close(self):
+        if self.writer is None:
+            return b''
+        self.writer.close()
+        return self._drain()
+
+def _ndjson_bytes(frame):
+    return frame.to_json(orient='records', lines=True, date_format='iso').encode()
 
 @app.get("/")
 async def root():
@@ -38,46 +317,107 @@ async def root():
             "docs": "/docs",
             "health": "/api/health",
             "anonymize": "/api/anonymize",
-            "detect": "/api/detect"
+            "detect": "/api/detect",
+            "detect_stream": "/api/detect/stream",
+            "jobs": "/api/jobs"
         }
     }
 
 @app.post("/api/anonymize")
 async def anonymize_data(request: AnonymizeRequest):
     """Anonymize dataset using bootstrap pipeline"""
-    try:
-        pipeline = BootstrapPipeline()
-        result = pipeline.anonymize_dataset(
-            request.input_path,
-            request.output_path
-        )
-        return {
-            "status": "success",
-            "records_processed": len(result),
-            "output_path": request.output_path,
-            "message": "Data anonymized successfully"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await run_job('anonymize', _anonymize_job, request)
+    return {
+        "status": "success",
+        **result,
+        "message": "Data anonymized successfully"
+    }
 
 @app.post("/api/detect")
 async def detect_anomalies(request: DetectionRequest):
     """Detect anomalies using detection pipeline"""
+    pipeline = await _detection_pipeline(request)
+    result = await run_job('detect', _detect_job, request, pipeline)
+    return {
+        "status": "success",
+        **result,
+        "message": "Anomaly detection completed"
+    }
+
+@app.post("/api/detect/stream")
+async def detect_stream(request: Request, model_path: str, batch_size: int = Query(10_000, gt=0)):
+    """
+    Score records sent in the request body with a detector saved in DETECTOR_DIR
+    The body is JSON lines or an Arrow IPC stream (by Content-Type); results
+    stream back per batch as JSON lines, or as Arrow when the client accepts it.
+    """
+    detector = await get_detector(model_path)
+    if request.headers.get('content-type', '').startswith(ARROW_STREAM_TYPE):
+        frames = _arrow_frames(request, batch_size)
+    else:
+        frames = _ndjson_frames(request, batch_size, detector.features)
+    as_arrow = ARROW_STREAM_TYPE in request.headers.get('accept', '')
+
+    # Score the first batch up front so bad input still gets an error status
     try:
-        pipeline = DetectionPipeline(contamination=request.contamination)
-        result = pipeline.run_detection(
-            request.input_path,
-            request.output_path
-        )
-        return {
-            "status": "success",
-            "total_records": len(result),
-            "anomalies_detected": int(result['is_anomaly'].sum()),
-            "output_path": request.output_path,
-            "message": "Anomaly detection completed"
-        }
+        first = await anext(frames, None)
+        first = await asyncio.to_thread(detector.detect_frame, first) if first is not None else None
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def results():
+        encoder = _ArrowStreamEncoder() if as_arrow else None
+        scored = first
+        while scored is not None:
+            # Encoding a large batch would otherwise stall every other request
+            if encoder is not None:
+                yield await asyncio.to_thread(encoder.encode, scored)
+            else:
+                yield await asyncio.to_thread(_ndjson_bytes, scored)
+            frame = await anext(frames, None)
+            scored = await asyncio.to_thread(detector.detect_frame, frame) if frame is not None else None
+        if encoder is not None:
+            yield encoder.close()
+
+    return StreamingResponse(results(), media_type=ARROW_STREAM_TYPE if as_arrow else NDJSON_TYPE)
+
+@app.post("/api/jobs/anonymize", status_code=202)
+async def submit_anonymize_job(request: AnonymizeRequest):
+    """Queue an anonymization job and return its id immediately"""
+    return submit_job('anonymize', _anonymize_job, request).to_dict()
+
+@app.post("/api/jobs/detect", status_code=202)
+async def submit_detect_job(request: DetectionRequest):
+    """Queue a detection job and return its id immediately"""
+    pipeline = await _detection_pipeline(request)
+    return submit_job('detect', _detect_job, request, pipeline).to_dict()
+
+@app.get("/api/jobs")
+async def list_jobs():
+    """Status of recent jobs and worker pool usage"""
+    return {
+        "jobs": [job.to_dict() for job in jobs.list()],
+        **jobs.stats()
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, progress and result of one job"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued job, or stop a running one at its next progress update
+    Running jobs check between chunks; loading and fitting are not interrupted.
+    """
+    job = jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job.to_dict()
 
 @app.get("/api/health")
 async def health_check():
@@ -90,31 +430,22 @@ async def health_check():
             "bootstrap_pipeline": "operational",
             "detection_pipeline": "operational",
             "dashboard": "running"
-        }
+        },
+        "jobs": jobs.stats()
     }
 
 @app.get("/api/stats")
 async def get_stats():
-    """Get system statistics"""
-    import pandas as pd
-    try:
-        # Load recent data
-        raw = pd.read_csv('data/raw/sample_data.csv')
-        anonymized = pd.read_csv('data/anonymized/sample_anonymized.csv')
-        results = pd.read_csv('results/tables/anomaly_results.csv')
-        
-        return {
-            "total_records": len(raw),
-            "anonymized_records": len(anonymized),
-            "anomalies_detected": int(results['is_anomaly'].sum()),
-            "privacy_level": "High (epsilon=0.1)",
-            "pseudonym_mappings": 201
-        }
-    except Exception as e:
-        return {
-            "error": str(e),
-            "message": "No data available yet. Run pipeline first."
-        }
+    """Get system statistics published by the pipelines"""
+    stats = await asyncio.to_thread(stats_cache.get)
+    return {
+        "total_records": stats['total_records'],
+        "anonymized_records": stats['anonymized_records'],
+        "anomalies_detected": stats['anomalies_detected'],
+        "privacy_level": "High (epsilon=0.1)",
+        "pseudonym_mappings": stats['pseudonym_mappings'],
+        "updated_at": stats['updated_at']
+    }
 
 if __name__ == "__main__":
     import uvicorn
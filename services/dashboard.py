@@ -4,13 +4,15 @@ Web interface for monitoring and managing analytics workflows
 """
 
 from flask import Flask, jsonify, render_template_string
-import pandas as pd
 from pathlib import Path
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.data.pipeline_stats import StatsCache
+
 app = Flask(__name__)
+stats_cache = StatsCache()
 
 DASHBOARD_HTML = '''
 <!DOCTYPE html>
@@ -47,6 +49,9 @@ DASHBOARD_HTML = '''
         <br>
         <div class="metric">{{ anomalies }}</div>
         <div class="label">Anomalies Detected</div>
+        <br>
+        <div class="metric">{{ pseudonym_mappings }}</div>
+        <div class="label">Pseudonym Mappings</div>
     </div>
     
     <div class="card">
@@ -62,23 +67,13 @@ DASHBOARD_HTML = '''
 @app.route('/')
 def dashboard():
     """Main dashboard view"""
-    try:
-        raw = pd.read_csv('data/raw/sample_data.csv')
-        anonymized = pd.read_csv('data/anonymized/sample_anonymized.csv')
-        results = pd.read_csv('results/tables/anomaly_results.csv')
-        
-        metrics = {
-            'total_records': len(raw),
-            'anonymized_records': len(anonymized),
-            'anomalies': int(results['is_anomaly'].sum())
-        }
-    except:
-        metrics = {
-            'total_records': 0,
-            'anonymized_records': 0,
-            'anomalies': 0
-        }
-    
+    stats = stats_cache.get()
+    metrics = {
+        'total_records': stats['total_records'],
+        'anonymized_records': stats['anonymized_records'],
+        'anomalies': stats['anomalies_detected'],
+        'pseudonym_mappings': stats['pseudonym_mappings']
+    }
     return render_template_string(DASHBOARD_HTML, **metrics)
 
 @app.route('/api/status')
@@ -0,0 +1,161 @@
+"""
+Job Manager
+Runs pipeline work in a bounded worker pool with status, progress and cancellation
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+class JobQueueFull(Exception):
+    """Raised when every worker is busy and the wait queue is at capacity"""
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested"""
+
+class Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in ('succeeded', 'failed', 'cancelled')
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def report(self, progress=None, message=None):
+        """Update progress from inside the job; raises JobCancelled if cancelled"""
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+        if progress is not None:
+            self.progress = progress
+        if message is not None:
+            self.message = message
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+class JobManager:
+    def __init__(self, max_workers=2, max_queued=8, max_history=1000):
+        """
+        Bounded job executor
+        Args:
+            max_workers: Jobs running at once
+            max_queued: Jobs allowed to wait for a worker; more are rejected
+            max_history: Finished jobs kept for status polling
+        """
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_history = max_history
+        self.jobs = OrderedDict()
+        self._active = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """
+        Queue fn(job, *args, **kwargs) and return its Job immediately
+        Raises:
+            JobQueueFull: If running plus queued jobs are at capacity
+        """
+        job = Job(kind)
+        with self._lock:
+            if self._active >= self.max_workers + self.max_queued:
+                raise JobQueueFull(
+                    f"{self._active} jobs active; capacity is "
+                    f"{self.max_workers} running + {self.max_queued} queued"
+                )
+            self._active += 1
+            self.jobs[job.id] = job
+            self._prune()
+        job.future = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            if job.cancel_requested:
+                raise JobCancelled(job.id)
+            job.status = 'running'
+            job.started_at = time.time()
+            job.result = fn(job, *args, **kwargs)
+            job.progress = 1.0
+            job.status = 'succeeded'
+            return job.result
+        except JobCancelled:
+            job.status = 'cancelled'
+            raise
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            raise
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._active -= 1
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(self.jobs) - self.max_history)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list(self):
+        return list(self.jobs.values())
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or ask a running one to stop at its next report()"""
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return job
+        job._cancel.set()
+        if job.future is not None and job.future.cancel():
+            # Never started, so _run will not do the bookkeeping
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            with self._lock:
+                self._active -= 1
+        return job
+
+    def stats(self):
+        with self._lock:
+            active = self._active
+        return {
+            'active': active,
+            'running': sum(job.status == 'running' for job in self.jobs.values()),
+            'capacity': self.max_workers + self.max_queued,
+            'max_workers': self.max_workers
+        }
+
+    def shutdown(self, wait=True):
+        for job in self.jobs.values():
+            if not job.done:
+                job._cancel.set()
+        self._pool.shutdown(wait=wait)
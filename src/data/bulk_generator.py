@@ -0,0 +1,148 @@
+"""
+Bulk Log Generator
+Vectorized synthetic admin-access and account-activity logs for load tests
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.data.storage import TableWriter
+
+DATABASES = np.array(['customers_db', 'orders_db', 'products_db', 'analytics_db'])
+TABLES = np.array(['users', 'orders', 'payments', 'products', 'sessions'])
+NORMAL_ACTIVITIES = np.array(['backup', 'schema_update', 'index_optimization', 'health_check'])
+SUSPICIOUS_ACTIVITIES = np.array(['customer_table_scan', 'credit_card_query', 'email_export',
+                                  'bulk_data_download'])
+
+_HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+# Positions of the 32 hex digits in the 36-character 8-4-4-4-12 layout
+_UUID_DIGITS = np.array([i for i in range(36) if i not in (8, 13, 18, 23)])
+_OCTETS = np.array([str(i) for i in range(256)], dtype=object)
+
+class IdentityPool:
+    def __init__(self, size=10_000, seed=None):
+        """
+        Pre-generated Faker identities that bulk rows draw from by index
+        Faker is called `size` times per field, never once per row.
+        """
+        from faker import Faker
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.names = np.array([fake.name() for _ in range(size)], dtype=object)
+        self.emails = np.array([fake.email() for _ in range(size)], dtype=object)
+        self.user_agents = np.array([fake.user_agent() for _ in range(size)], dtype=object)
+
+    def draw(self, field, rng, n):
+        values = getattr(self, field)
+        return values[rng.integers(0, len(values), n)]
+
+def uuid4_strings(rng, n):
+    """n random version-4 UUID strings built from one block of random bytes"""
+    raw = rng.integers(0, 256, (n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    digits = np.empty((n, 32), dtype=np.uint8)
+    digits[:, 0::2] = raw >> 4
+    digits[:, 1::2] = raw & 0x0F
+    chars = np.full((n, 36), ord('-'), dtype=np.uint8)
+    chars[:, _UUID_DIGITS] = _HEX[digits]
+    return chars.view('S36').ravel().astype(str).astype(object)
+
+def ipv4_strings(rng, n):
+    """n random dotted-quad addresses"""
+    octets = _OCTETS[rng.integers(0, 256, (4, n))]
+    return octets[0] + '.' + octets[1] + '.' + octets[2] + '.' + octets[3]
+
+def _chunk_sizes(total, chunksize):
+    for start in range(0, total, chunksize):
+        yield min(chunksize, total - start)
+
+def iter_admin_access_logs(num_records, chunksize=100_000, seed=None, pool=None, now=None):
+    """
+    Admin access logs in the NosyAdminDetector schema, one DataFrame per chunk
+    About 5% of records are suspicious (label 1) with larger, longer accesses.
+    Output is reproducible for a given seed and chunksize.
+    """
+    rng = np.random.default_rng(seed)
+    pool = pool or IdentityPool(min(num_records, 10_000), seed=seed)
+    now = np.datetime64(now or pd.Timestamp.now(), 'us')
+    for n in _chunk_sizes(num_records, chunksize):
+        suspicious = rng.random(n) < 0.05
+        activity = rng.integers(0, len(NORMAL_ACTIVITIES), n)
+        yield pd.DataFrame({
+            'admin_id': uuid4_strings(rng, n),
+            'admin_name': pool.draw('names', rng, n),
+            'timestamp': now - rng.integers(0, 720, n).astype('timedelta64[h]'),
+            'database': DATABASES[rng.integers(0, len(DATABASES), n)],
+            'table_accessed': TABLES[rng.integers(0, len(TABLES), n)],
+            'operation': np.where(suspicious, SUSPICIOUS_ACTIVITIES[activity],
+                                  NORMAL_ACTIVITIES[activity]),
+            'rows_accessed': np.where(suspicious, rng.integers(1, 100_000, n), rng.integers(1, 1000, n)),
+            'access_duration_seconds': np.where(suspicious, rng.integers(300, 3600, n),
+                                                rng.integers(1, 300, n)),
+            'ip_address': ipv4_strings(rng, n),
+            'is_after_hours': rng.random(n) < 0.5,
+            'label': suspicious.astype(int)  # Ground truth for evaluation
+        })
+
+def iter_account_activity_logs(num_accounts, chunksize=100_000, seed=None, pool=None, now=None):
+    """
+    Account activity logs in the DormantAccountDetector schema, one DataFrame per chunk
+    About 10% of accounts are dormant: inactive 180-720 days, then a burst of activity.
+    """
+    rng = np.random.default_rng(seed)
+    pool = pool or IdentityPool(min(num_accounts, 10_000), seed=seed)
+    now = np.datetime64(now or pd.Timestamp.now(), 'us')
+    for n in _chunk_sizes(num_accounts, chunksize):
+        dormant = rng.random(n) < 0.1
+        days_inactive = np.where(dormant, rng.integers(180, 720, n), rng.integers(1, 30, n))
+        yield pd.DataFrame({
+            'account_id': uuid4_strings(rng, n),
+            'user_name': pool.draw('names', rng, n),
+            'email': pool.draw('emails', rng, n),
+            'last_login': now - days_inactive.astype('timedelta64[D]'),
+            'current_login': np.full(n, now),
+            'days_inactive': days_inactive,
+            'login_count_last_month': np.where(dormant, 0, rng.integers(5, 50, n)),
+            'data_accessed_mb': np.where(dormant, rng.integers(1000, 10000, n), rng.integers(1, 100, n)),
+            'actions_performed': np.where(dormant, rng.integers(50, 500, n), rng.integers(1, 20, n)),
+            'ip_address': ipv4_strings(rng, n),
+            'user_agent': pool.draw('user_agents', rng, n),
+            'is_dormant': dormant.astype(int)
+        })
+
+GENERATORS = {
+    'admin_access': iter_admin_access_logs,
+    'account_activity': iter_account_activity_logs
+}
+
+def generate_logs(kind, num_records, seed=None, chunksize=100_000):
+    """Whole log as one DataFrame"""
+    return pd.concat(list(GENERATORS[kind](num_records, chunksize, seed)), ignore_index=True)
+
+def write_logs(kind, num_records, output_path, seed=None, chunksize=100_000):
+    """Stream a log to disk chunk by chunk; memory stays bounded by chunksize"""
+    start = time.perf_counter()
+    with TableWriter(output_path) as writer:
+        for chunk in GENERATORS[kind](num_records, chunksize, seed):
+            writer.write(chunk)
+    elapsed = time.perf_counter() - start
+    print(f"Generated {writer.rows:,} {kind} records in {elapsed:.1f}s "
+          f"({writer.rows / elapsed * 60:,.0f} rows/min) -> {output_path}")
+    return writer.rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic security logs in bulk")
+    parser.add_argument('kind', choices=list(GENERATORS))
+    parser.add_argument('--records', type=int, default=1_000_000)
+    parser.add_argument('--output', required=True, help="Output file (.parquet, .arrow or .csv)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args()
+    write_logs(args.kind, args.records, args.output, args.seed, args.chunksize)
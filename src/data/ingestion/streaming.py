@@ -0,0 +1,279 @@
+"""
+Streaming Ingestion Engine
+In-process stand-in for Kafka: topics, partitions, consumer offsets and
+asyncio producers/consumers that move records in micro-batches
+"""
+
+import asyncio
+import json
+import time
+import zlib
+from pathlib import Path
+
+class Partition:
+    """Append-only record log for one topic partition"""
+
+    def __init__(self, log_path=None, retention=None):
+        self.records = []
+        self.base_offset = 0
+        self.retention = retention
+        self.log_path = Path(log_path) if log_path else None
+        self._log = None
+        if self.log_path is not None:
+            if self.log_path.exists():
+                with open(self.log_path) as f:
+                    self.records = [tuple(json.loads(line)) for line in f]
+                self._trim()
+            self._log = open(self.log_path, 'a')
+
+    @property
+    def end_offset(self):
+        return self.base_offset + len(self.records)
+
+    def append(self, records):
+        """Append (timestamp, key, value) records and return the first offset"""
+        offset = self.end_offset
+        self.records.extend(records)
+        if self._log is not None:
+            self._log.write(''.join(json.dumps(r, default=str) + '\n' for r in records))
+            self._log.flush()
+        self._trim()
+        return offset
+
+    def read(self, offset, max_records):
+        start = max(offset, self.base_offset) - self.base_offset
+        return self.records[start:start + max_records]
+
+    def _trim(self):
+        if self.retention and len(self.records) > self.retention:
+            dropped = len(self.records) - self.retention
+            del self.records[:dropped]
+            self.base_offset += dropped
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+class LocalBroker:
+    def __init__(self, log_dir=None, retention=None):
+        """
+        In-process broker standing in for Kafka
+        Args:
+            log_dir: Optional directory for file-backed partition logs and offsets
+            retention: Optional max records kept per partition
+        """
+        self.log_dir = Path(log_dir) if log_dir else None
+        self.retention = retention
+        self.topics = {}
+        self._conditions = {}
+        self._offsets = {}
+        if self.log_dir is not None:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            offsets_file = self.log_dir / 'offsets.json'
+            if offsets_file.exists():
+                with open(offsets_file) as f:
+                    self._offsets = json.load(f)
+        print("Local Broker Initialized")
+
+    def create_topic(self, name, partitions=1):
+        """Create a topic (no-op if it already exists)"""
+        if name not in self.topics:
+            self.topics[name] = [
+                Partition(
+                    self.log_dir / f'{name}-{i}.log' if self.log_dir else None,
+                    self.retention
+                )
+                for i in range(partitions)
+            ]
+        return self.topics[name]
+
+    def _condition(self, topic):
+        # Created lazily so the condition binds to the running event loop
+        if topic not in self._conditions:
+            self._conditions[topic] = asyncio.Condition()
+        return self._conditions[topic]
+
+    async def append(self, topic, partition, records):
+        offset = self.topics[topic][partition].append(records)
+        condition = self._condition(topic)
+        async with condition:
+            condition.notify_all()
+        return offset
+
+    def read(self, topic, partition, offset, max_records):
+        return self.topics[topic][partition].read(offset, max_records)
+
+    def end_offset(self, topic, partition):
+        return self.topics[topic][partition].end_offset
+
+    def base_offset(self, topic, partition):
+        """Oldest offset still retained"""
+        return self.topics[topic][partition].base_offset
+
+    async def wait_for_data(self, topic, timeout):
+        """Wait until any partition of the topic receives records"""
+        condition = self._condition(topic)
+        async with condition:
+            try:
+                await asyncio.wait_for(condition.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def commit(self, group, topic, partition, offset):
+        self._offsets.setdefault(group, {}).setdefault(topic, {})[str(partition)] = offset
+        if self.log_dir is not None:
+            with open(self.log_dir / 'offsets.json', 'w') as f:
+                json.dump(self._offsets, f)
+
+    def committed(self, group, topic, partition):
+        return self._offsets.get(group, {}).get(topic, {}).get(str(partition), 0)
+
+    def close(self):
+        for partitions in self.topics.values():
+            for partition in partitions:
+                partition.close()
+
+class StreamProducer:
+    def __init__(self, broker, topic, batch_size=500, linger_ms=5, max_queue=10_000):
+        """
+        Asyncio producer that micro-batches records into the broker
+        Args:
+            batch_size: Max records per broker append
+            linger_ms: How long a partial batch waits for more records
+            max_queue: Bound on buffered records; send() waits when full
+        """
+        self.broker = broker
+        self.topic = topic
+        self.partitions = len(broker.topics[topic])
+        self.batch_size = batch_size
+        self.linger = linger_ms / 1000
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.sent = 0
+        self._round_robin = 0
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._flush_loop())
+        return self
+
+    async def send(self, value, key=None):
+        """Queue one record; waits (backpressure) while the buffer is full"""
+        record = (time.time(), key, value)
+        if self.queue.full():
+            await self._unless_failed(self.queue.put(record))
+        else:
+            self._check()
+            self.queue.put_nowait(record)
+
+    def _check(self):
+        """Re-raise the error that stopped the flush task"""
+        if self._task is not None and self._task.done():
+            if self._task.cancelled():
+                raise RuntimeError("Producer is closed")
+            raise self._task.exception()
+
+    async def _unless_failed(self, awaitable):
+        """Await awaitable, unless the flush task dies first"""
+        self._check()
+        waiter = asyncio.ensure_future(awaitable)
+        tasks = {waiter} if self._task is None else {waiter, self._task}
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        if not waiter.done():
+            waiter.cancel()
+            self._check()
+        return waiter.result()
+
+    def _partition_for(self, key):
+        if key is None:
+            self._round_robin = (self._round_robin + 1) % self.partitions
+            return self._round_robin
+        return zlib.crc32(str(key).encode()) % self.partitions
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.linger
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+            by_partition = {}
+            for record in batch:
+                by_partition.setdefault(self._partition_for(record[1]), []).append(record)
+            for partition, records in by_partition.items():
+                await self.broker.append(self.topic, partition, records)
+            self.sent += len(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    async def flush(self):
+        """Wait until every queued record is appended; raises if appending failed"""
+        await self._unless_failed(self.queue.join())
+
+    async def close(self):
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+class StreamConsumer:
+    def __init__(self, broker, topic, group, partitions=None, batch_size=1000, max_wait_ms=50):
+        """
+        Asyncio consumer returning micro-batches from committed offsets
+        Args:
+            group: Consumer group whose offsets are tracked in the broker
+            partitions: Assigned partitions (default: all)
+            batch_size: Max records per micro-batch
+            max_wait_ms: How long poll() waits for records when caught up
+        """
+        self.broker = broker
+        self.topic = topic
+        self.group = group
+        self.partitions = partitions if partitions is not None else range(len(broker.topics[topic]))
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.positions = {p: broker.committed(group, topic, p) for p in self.partitions}
+
+    def lag(self):
+        return sum(
+            self.broker.end_offset(self.topic, p)
+            - max(offset, self.broker.base_offset(self.topic, p))
+            for p, offset in self.positions.items()
+        )
+
+    def _drain(self):
+        batch = []
+        share = max(1, self.batch_size // len(self.positions))
+        for partition, offset in self.positions.items():
+            # Records trimmed by retention are skipped, not re-read
+            offset = max(offset, self.broker.base_offset(self.topic, partition))
+            records = self.broker.read(self.topic, partition, offset, share)
+            self.positions[partition] = offset + len(records)
+            batch.extend(records)
+        return batch
+
+    async def poll(self):
+        """Next micro-batch of (timestamp, key, value) records; [] on timeout"""
+        batch = self._drain()
+        if not batch:
+            await self.broker.wait_for_data(self.topic, self.max_wait)
+            batch = self._drain()
+        return batch
+
+    def commit(self, positions=None):
+        """Commit positions for this group (default: everything polled so far)"""
+        for partition, offset in (positions or self.positions).items():
+            self.broker.commit(self.group, self.topic, partition, offset)
@@ -0,0 +1,126 @@
+"""
+Pipeline Statistics
+Stages publish their counts when they finish; services serve them from memory
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+STATS_DIR = 'results/stats'
+PSEUDONYM_DB = 'data/hive/pseudonym_mappings/mappings.db'
+
+# Outputs of the sample workflow (run_pipeline.py) that the headline totals describe
+SAMPLE_OUTPUTS = {
+    'anonymize': 'data/anonymized/sample_anonymized.csv',
+    'detection': 'results/tables/anomaly_results.csv'
+}
+
+def publish_stats(stage, output_path, stats_dir=STATS_DIR, **counts):
+    """
+    Record a stage's counts for one output file
+    Each (stage, output) pair has its own file, replaced atomically, so
+    parallel workers never overwrite each other and re-runs stay idempotent.
+    """
+    stats_dir = Path(stats_dir)
+    stats_dir.mkdir(parents=True, exist_ok=True)
+    output_key = hashlib.sha1(str(Path(output_path).resolve()).encode()).hexdigest()[:10]
+    path = stats_dir / f"{stage}_{Path(output_path).stem}_{output_key}.json"
+    entry = {
+        'stage': stage,
+        'output': str(output_path),
+        'updated_at': time.time(),
+        **{key: int(value) for key, value in counts.items()}
+    }
+    tmp = path.with_suffix(f'.{os.getpid()}-{threading.get_ident()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(entry, f)
+    os.replace(tmp, path)
+    return path
+
+def _signature(path):
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class StatsCache:
+    def __init__(self, stats_dir=STATS_DIR, pseudonym_db=PSEUDONYM_DB, outputs=SAMPLE_OUTPUTS,
+                 refresh_interval=1.0):
+        """
+        In-memory view of published pipeline stats
+        Args:
+            stats_dir: Directory stages publish to
+            pseudonym_db: Pseudonym store whose published mapping count is reported
+            outputs: {stage: output path} the record and anomaly totals come from
+            refresh_interval: Seconds between checks of file mtimes/sizes
+        """
+        self.stats_dir = Path(stats_dir)
+        self.pseudonym_db = Path(pseudonym_db).resolve()
+        self.outputs = {stage: Path(path).resolve() for stage, path in outputs.items()}
+        self.refresh_interval = refresh_interval
+        self._entries = {}
+        self._summary = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh_entries(self):
+        changed = False
+        seen = set()
+        for path in self.stats_dir.glob('*.json') if self.stats_dir.exists() else []:
+            seen.add(path)
+            signature = _signature(path)
+            cached = self._entries.get(path)
+            if signature is None or (cached and cached[0] == signature):
+                continue
+            try:
+                with open(path) as f:
+                    self._entries[path] = (signature, json.load(f))
+                changed = True
+            except (OSError, ValueError):
+                continue
+        for path in set(self._entries) - seen:
+            del self._entries[path]
+            changed = True
+        return changed
+
+    def _current(self):
+        """Published entries whose output file still exists"""
+        return [entry for _, entry in self._entries.values() if Path(entry['output']).exists()]
+
+    def _summarize(self, entries):
+        def published(stage, path):
+            return [e for e in entries if e['stage'] == stage and Path(e['output']).resolve() == path]
+
+        anonymize = published('anonymize', self.outputs.get('anonymize'))
+        detection = published('detection', self.outputs.get('detection'))
+        pseudonyms = published('pseudonyms', self.pseudonym_db)
+        return {
+            'total_records': sum(e.get('records', 0) for e in detection),
+            'anonymized_records': sum(e.get('records', 0) for e in anonymize),
+            'anomalies_detected': sum(e.get('anomalies', 0) for e in detection),
+            'pseudonym_mappings': sum(e.get('mappings', 0) for e in pseudonyms),
+            'stages': sorted(entries, key=lambda e: e['updated_at']),
+            'updated_at': max((e['updated_at'] for e in entries), default=None)
+        }
+
+    def get(self):
+        """
+        Current stats; files are only re-checked once per refresh_interval
+        Reads only the small published JSON files, never the pipeline outputs
+        or the pseudonym store.
+        """
+        now = time.monotonic()
+        if self._summary is not None and now - self._checked_at < self.refresh_interval:
+            return self._summary
+        with self._lock:
+            if self._summary is None or now - self._checked_at >= self.refresh_interval:
+                self._refresh_entries()
+                # Entries for deleted outputs drop out even when no stats file changed
+                self._summary = self._summarize(self._current())
+                self._checked_at = now
+            return self._summary
@@ -4,62 +4,203 @@ Manages mapping between original and pseudonymized data
 Simulates HIVE data warehouse functionality
 """
 
-import pandas as pd
 import hashlib
 import json
+import sqlite3
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+from src.data.pipeline_stats import publish_stats
+
+class PseudonymStore:
+    """Append-only mapping store backed by SQLite in write-ahead-log mode"""
+
+    def __init__(self, db_path, timeout=30.0):
+        self.db_path = Path(db_path)
+        # Pipelines may hand the store to a worker thread (e.g. stream processing);
+        # callers use it from one thread at a time
+        self.conn = sqlite3.connect(str(self.db_path), timeout=timeout, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS mappings ("
+            " column_name TEXT NOT NULL,"
+            " pseudonym TEXT NOT NULL,"
+            " original TEXT NOT NULL,"
+            " PRIMARY KEY (column_name, pseudonym)"
+            ") WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        # Identifies this store's contents; a reset store gets a new id
+        self.conn.execute(
+            "INSERT OR IGNORE INTO meta VALUES ('store_id', ?)", (uuid.uuid4().hex,)
+        )
+        self.conn.commit()
+        self.store_id = self.get_meta('store_id')
+
+    def put_many(self, rows):
+        """Append (column_name, pseudonym, original) rows, skipping known ones"""
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO mappings VALUES (?, ?, ?)", rows
+        )
+
+    def get(self, column_name, pseudonym):
+        """Look up the original value for a pseudonym"""
+        row = self.conn.execute(
+            "SELECT original FROM mappings WHERE column_name = ? AND pseudonym = ?",
+            (column_name, pseudonym)
+        ).fetchone()
+        return row[0] if row else None
+
+    def count(self):
+        """Count stored mappings"""
+        return self.conn.execute("SELECT COUNT(*) FROM mappings").fetchone()[0]
+
+    def get_meta(self, key):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value)
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def checkpoint(self):
+        """Fold the write-ahead log back into the main index file"""
+        self.conn.commit()
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def _hash_value(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
 class PseudonymManager:
-    def __init__(self, storage_path='data/hive/pseudonym_mappings'):
+    def __init__(self, storage_path='data/hive/pseudonym_mappings', cache_size=1_000_000):
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
         self.mapping_file = self.storage_path / 'mappings.json'
-        self.mappings = self._load_mappings()
+        self.store = PseudonymStore(self.storage_path / 'mappings.db')
+        self.cache_size = cache_size
+        self._cache = {}
+        self._batch_depth = 0
+        self._migrate_json()
         print("Pseudonym Manager Initialized")
-    
-    def _load_mappings(self):
-        """Load existing mappings"""
-        if self.mapping_file.exists():
-            with open(self.mapping_file, 'r') as f:
-                return json.load(f)
-        return {}
-    
-    def _save_mappings(self):
-        """Save mappings to disk"""
-        with open(self.mapping_file, 'w') as f:
-            json.dump(self.mappings, f, indent=2)
-    
+
+    def _migrate_json(self):
+        """One-time import of the legacy mappings.json file into the store"""
+        if not self.mapping_file.exists() or self.store.get_meta('json_migrated'):
+            return
+        with open(self.mapping_file, 'r') as f:
+            mappings = json.load(f)
+        self.store.put_many(
+            (column_name, pseudo, str(original))
+            for column_name, column_mappings in mappings.items()
+            for pseudo, original in column_mappings.items()
+        )
+        self.store.set_meta('json_migrated', str(self.mapping_file))
+        self.store.commit()
+        print(f"Migrated legacy mappings from {self.mapping_file}")
+
+    @contextmanager
+    def batch(self):
+        """Group mapping writes into a single transaction committed on exit"""
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.store.rollback()
+                self._cache = {}
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.store.commit()
+
+    def commit(self):
+        """Durably commit pending mappings"""
+        self.store.commit()
+
+    def close(self):
+        self.store.close()
+
     def create_pseudonym(self, original_value, column_name):
         """Create and store pseudonym mapping"""
         pseudo = hashlib.sha256(str(original_value).encode()).hexdigest()
-        
-        if column_name not in self.mappings:
-            self.mappings[column_name] = {}
-        
-        self.mappings[column_name][pseudo] = original_value
-        self._save_mappings()
+        self.store.put_many([(column_name, pseudo, str(original_value))])
+        if not self._batch_depth:
+            self.store.commit()
         return pseudo
-    
+
+    def create_pseudonyms(self, values, column_name):
+        """
+        Pseudonymize a whole column, hashing each distinct value only once
+        Args:
+            values: Series or array of original values
+            column_name: Column the mappings are registered under
+        Returns:
+            Object array of pseudonyms aligned with values
+        """
+        codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+        keys = [str(value) for value in uniques]
+
+        cache = self._cache.setdefault(column_name, {})
+        missing = [key for key in keys if key not in cache]
+        if missing:
+            # SHA-256 of short keys is cheaper than handing them to a thread pool
+            hashed = [_hash_value(key) for key in missing]
+            self.store.put_many(zip([column_name] * len(missing), hashed, missing))
+            if not self._batch_depth:
+                self.store.commit()
+
+            cache.update(zip(missing, hashed))
+
+        tokens = np.array([cache[key] for key in keys], dtype=object)
+        if sum(len(entries) for entries in self._cache.values()) > self.cache_size:
+            self._cache = {}
+        return tokens[codes]
+
     def reverse_pseudonym(self, pseudonym, column_name):
         """Reverse pseudonym to original value (for authorized access)"""
-        if column_name in self.mappings:
-            return self.mappings[column_name].get(pseudonym, "UNKNOWN")
-        return "UNKNOWN"
-    
+        original = self.store.get(column_name, pseudonym)
+        return original if original is not None else "UNKNOWN"
+
     def get_mapping_count(self):
         """Get total number of mappings"""
-        total = sum(len(mappings) for mappings in self.mappings.values())
-        return total
+        return self.store.count()
+
+    def publish_count(self):
+        """Publish the mapping count with the pipeline stats and return it"""
+        count = self.get_mapping_count()
+        publish_stats('pseudonyms', self.store.db_path, mappings=count)
+        return count
 
 if __name__ == "__main__":
     manager = PseudonymManager()
-    
+
     # Test pseudonym creation
     pseudo = manager.create_pseudonym("john.doe@example.com", "email")
     print(f"Created pseudonym: {pseudo}")
-    
+
     # Test reverse lookup
     original = manager.reverse_pseudonym(pseudo, "email")
     print(f"Reversed to: {original}")
-    
+
     print(f"Total mappings: {manager.get_mapping_count()}")
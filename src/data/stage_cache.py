@@ -0,0 +1,172 @@
+"""
+Stage Cache
+Content-addressed memoization of pipeline stage outputs with LRU eviction
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+CACHE_DIR = 'data/cache/stages'
+MAX_BYTES = 5 * 1024**3
+
+def _sha256_file(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def code_version(*objects):
+    """Hash of the source files defining the given modules, classes or functions"""
+    digest = hashlib.sha256()
+    for path in sorted({inspect.getsourcefile(obj) for obj in objects}):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def rng_state(rng):
+    """JSON-safe state of a numpy Generator"""
+    return rng.bit_generator.state
+
+class StageCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        """
+        Cache of stage output files keyed by input content, code and parameters
+        Each entry is a directory holding the output files and meta.json; its
+        mtime marks the last use. Entries are published with an atomic rename,
+        so concurrent workers can share one cache directory.
+        Args:
+            cache_dir: Where entries are stored
+            max_bytes: Size cap; least recently used entries are evicted beyond it
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        (self.cache_dir / 'entries').mkdir(parents=True, exist_ok=True)
+        (self.cache_dir / 'hashes').mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def input_hash(self, path):
+        """
+        Content hash of an input file
+        One memo per path records the hash with the file's size and mtime, so an
+        unchanged file is not read again on the next run; a changed file
+        overwrites the memo instead of adding another.
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        signature = f'{stat.st_size}|{stat.st_mtime_ns}'
+        memo = self.cache_dir / 'hashes' / hashlib.sha256(str(path).encode()).hexdigest()
+        try:
+            memo_signature, content_hash = memo.read_text().split(' ')
+            if memo_signature == signature:
+                return content_hash
+        except (FileNotFoundError, ValueError):
+            pass
+        content_hash = _sha256_file(path)
+        tmp = memo.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+        tmp.write_text(f'{signature} {content_hash}')
+        os.replace(tmp, memo)
+        return content_hash
+
+    def key(self, stage, inputs, params):
+        """
+        Cache key for a stage run over input files
+        params must hold everything else the output depends on, including the
+        stage's code_version().
+        """
+        payload = {
+            'stage': stage,
+            'inputs': [self.input_hash(path) for path in inputs],
+            'params': params
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _entry(self, key):
+        return self.cache_dir / 'entries' / key
+
+    def lookup(self, key):
+        """Entry metadata (with its directory under 'path') on a hit, else None"""
+        entry = self._entry(key)
+        try:
+            with open(entry / 'meta.json') as f:
+                meta = json.load(f)
+            os.utime(entry)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        meta['path'] = str(entry)
+        return meta
+
+    def restore(self, meta, outputs):
+        """Copy cached files to their output paths, e.g. {'output': 'results/x.csv'}"""
+        for name, dest in outputs.items():
+            dest = Path(dest)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(f'.{dest.name}.{uuid.uuid4().hex}.tmp')
+            shutil.copyfile(Path(meta['path']) / name, tmp)
+            os.replace(tmp, dest)
+
+    def store(self, key, files, **meta):
+        """Save output files (name -> path) and metadata under key, then enforce the size cap"""
+        entry = self._entry(key)
+        if entry.exists():
+            return
+        size = sum(Path(path).stat().st_size for path in files.values())
+        if size > self.max_bytes:
+            # It would be the first entry evicted
+            print(f"Stage output of {size:,} bytes exceeds the cache cap; not cached")
+            return
+        staging = self.cache_dir / 'entries' / f'.staging-{uuid.uuid4().hex}'
+        staging.mkdir()
+        try:
+            size = 0
+            for name, path in files.items():
+                shutil.copyfile(path, staging / name)
+                size += (staging / name).stat().st_size
+            with open(staging / 'meta.json', 'w') as f:
+                json.dump({**meta, 'files': list(files), 'bytes': size,
+                           'created_at': time.time()}, f, default=str)
+            os.rename(staging, entry)
+        except OSError:
+            # Another worker stored the same key first, or the disk is full
+            shutil.rmtree(staging, ignore_errors=True)
+            if not entry.exists():
+                raise
+            return
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for entry in (self.cache_dir / 'entries').iterdir():
+            if entry.name.startswith('.'):
+                continue
+            try:
+                with open(entry / 'meta.json') as f:
+                    size = json.load(f)['bytes']
+                entries.append((entry.stat().st_mtime, size, entry))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+        return total
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self.__init__(self.cache_dir, self.max_bytes)
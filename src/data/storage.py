@@ -0,0 +1,206 @@
+"""
+Table Storage
+Hands DataFrames between pipeline stages as Parquet, Arrow IPC or CSV
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+FORMAT_EXTENSIONS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+    '.csv': 'csv',
+}
+
+DEFAULT_COMPRESSION = {'parquet': 'snappy', 'arrow': 'lz4', 'csv': None}
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Parquet and Arrow storage need pyarrow: pip install pyarrow"
+        ) from e
+    return pyarrow
+
+def infer_format(path, fmt=None):
+    """Storage format from an explicit name or the file extension"""
+    if fmt is not None:
+        return fmt
+    suffix = Path(path).suffix.lower()
+    if suffix not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown table format for {path}")
+    return FORMAT_EXTENSIONS[suffix]
+
+def find_table(stem):
+    """Locate the most recently written stage output in any supported format"""
+    stem = Path(stem)
+    if stem.suffix.lower() in FORMAT_EXTENSIONS:
+        stem = stem.with_suffix('')
+    candidates = [
+        stem.with_name(stem.name + ext) for ext in FORMAT_EXTENSIONS
+        if stem.with_name(stem.name + ext).exists()
+    ]
+    if not candidates:
+        raise FileNotFoundError(f"No table found for {stem}")
+    return max(candidates, key=lambda path: path.stat().st_mtime)
+
+def _arrow_schema(path, fmt):
+    pa = _require_pyarrow()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(path)
+    import pyarrow.ipc as ipc
+    with pa.memory_map(str(path), 'r') as source:
+        return ipc.open_file(source).schema
+
+def numeric_columns(path, fmt=None):
+    """Names of numeric columns, read from the schema without loading data"""
+    fmt = infer_format(path, fmt)
+    if fmt == 'csv':
+        sample = pd.read_csv(path, nrows=1000)
+        return sample.select_dtypes(include=[np.number]).columns.tolist()
+    pa = _require_pyarrow()
+    schema = _arrow_schema(path, fmt)
+    return [
+        field.name for field in schema
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+    ]
+
+def count_rows(path, fmt=None):
+    """
+    Number of rows in a table without parsing it
+    Parquet and Arrow files are counted from their metadata. CSV rows are
+    counted as lines, so quoted newlines make the count an overestimate.
+    """
+    fmt = infer_format(path, fmt)
+    if fmt == 'csv':
+        lines = 0
+        last = b'\n'
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                lines += block.count(b'\n')
+                last = block[-1:]
+        # A final line without a newline still counts; the header does not
+        return max(0, lines + (last != b'\n') - 1)
+    pa = _require_pyarrow()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    import pyarrow.ipc as ipc
+    with pa.memory_map(str(path), 'r') as source:
+        reader = ipc.open_file(source)
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+def read_table(path, columns=None, numeric_only=False, fmt=None, **csv_kwargs):
+    """
+    Read a stage output into a DataFrame
+    Args:
+        path: File to read; the format follows the extension unless fmt is set
+        columns: Optional column projection
+        numeric_only: Read only numeric columns
+        fmt: 'parquet', 'arrow' or 'csv'
+    """
+    fmt = infer_format(path, fmt)
+    if numeric_only:
+        numeric = numeric_columns(path, fmt)
+        columns = [c for c in columns if c in numeric] if columns is not None else numeric
+
+    if fmt == 'csv':
+        return pd.read_csv(path, usecols=columns, **csv_kwargs)
+    _require_pyarrow()
+    if fmt == 'parquet':
+        return pd.read_parquet(path, columns=columns)
+    import pyarrow.feather as feather
+    return feather.read_table(str(path), columns=columns, memory_map=True).to_pandas()
+
+def write_table(df, path, fmt=None, compression='default'):
+    """Write a DataFrame in the format given by fmt or the extension"""
+    fmt = infer_format(path, fmt)
+    if compression == 'default':
+        compression = DEFAULT_COMPRESSION[fmt]
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    if fmt == 'csv':
+        df.to_csv(path, index=False, compression=compression)
+    elif fmt == 'parquet':
+        _require_pyarrow()
+        df.to_parquet(path, index=False, compression=compression)
+    else:
+        _require_pyarrow()
+        import pyarrow.feather as feather
+        feather.write_feather(df, str(path), compression=compression or 'uncompressed')
+    return Path(path)
+
+def iter_table(path, chunksize, columns=None, fmt=None, **csv_kwargs):
+    """Yield a stage output as DataFrame chunks of at most chunksize rows"""
+    fmt = infer_format(path, fmt)
+    if fmt == 'csv':
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize, **csv_kwargs)
+        return
+    pa = _require_pyarrow()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+    import pyarrow.ipc as ipc
+    with pa.memory_map(str(path), 'r') as source:
+        reader = ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            if columns is not None:
+                batch = batch.select(columns)
+            for start in range(0, batch.num_rows, chunksize):
+                yield batch.slice(start, chunksize).to_pandas()
+
+class TableWriter:
+    """Append DataFrame chunks to one output file under a fixed schema"""
+
+    def __init__(self, path, fmt=None, compression='default'):
+        self.path = Path(path)
+        self.fmt = infer_format(path, fmt)
+        self.compression = (
+            DEFAULT_COMPRESSION[self.fmt] if compression == 'default' else compression
+        )
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, chunk):
+        if self.fmt == 'csv':
+            chunk.to_csv(
+                self.path, mode='w' if self.rows == 0 else 'a',
+                header=(self.rows == 0), index=False
+            )
+        else:
+            pa = _require_pyarrow()
+            table = pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                if self.fmt == 'parquet':
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(
+                        str(self.path), self._schema, compression=self.compression or 'none'
+                    )
+                else:
+                    import pyarrow.ipc as ipc
+                    options = ipc.IpcWriteOptions(compression=self.compression)
+                    self._writer = ipc.new_file(str(self.path), self._schema, options=options)
+            self._writer.write_table(table)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
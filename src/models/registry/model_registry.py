@@ -0,0 +1,153 @@
+"""
+Model Registry
+Versioned model artifacts with manifests, content hashes and atomic promotion
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+import joblib
+from pathlib import Path
+
+REGISTRY_ROOT = 'models/trained/registry'
+ARTIFACT_NAME = 'model.joblib'
+MANIFEST_NAME = 'manifest.json'
+
+def file_sha256(path, block_size=1 << 20):
+    """Content hash of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _write_json(path, data):
+    tmp = Path(path).with_suffix(f'.{uuid.uuid4().hex}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp, path)
+
+class ModelRegistry:
+    def __init__(self, root=REGISTRY_ROOT):
+        """
+        Registry of named models, each with immutable numbered versions
+        Layout: <root>/<name>/v0001/{model.joblib, manifest.json} and
+        <root>/<name>/production.json pointing at the promoted version.
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _model_dir(self, name):
+        return self.root / name
+
+    def versions(self, name):
+        """Registered versions of a model, oldest first"""
+        directory = self._model_dir(name)
+        if not directory.exists():
+            return []
+        return sorted(p.name for p in directory.iterdir() if p.is_dir() and p.name.startswith('v'))
+
+    def models(self):
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    def register(self, name, model, features=None, metrics=None, data_path=None,
+                 training_seconds=None, extra=None):
+        """
+        Store a fitted model as the next version of `name`
+        The artifact is written uncompressed so its arrays can be memory-mapped
+        on load. The version directory appears atomically with its manifest.
+        Returns:
+            The manifest of the new version
+        """
+        model_dir = self._model_dir(name)
+        model_dir.mkdir(parents=True, exist_ok=True)
+        staging = model_dir / f'.staging-{uuid.uuid4().hex}'
+        staging.mkdir()
+        try:
+            artifact = staging / ARTIFACT_NAME
+            joblib.dump(model, artifact)
+            manifest = {
+                'name': name,
+                'model_class': f"{type(model).__module__}.{type(model).__name__}",
+                'features': list(features) if features is not None else None,
+                'metrics': metrics or {},
+                'data_path': str(data_path) if data_path else None,
+                'data_sha256': file_sha256(data_path) if data_path else None,
+                'artifact_sha256': file_sha256(artifact),
+                'artifact_bytes': artifact.stat().st_size,
+                'training_seconds': training_seconds,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                **(extra or {})
+            }
+
+            # Claim the next free version number; rename fails if another writer won it
+            while True:
+                existing = self.versions(name)
+                version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+                manifest['version'] = version
+                _write_json(staging / MANIFEST_NAME, manifest)
+                try:
+                    os.rename(staging, model_dir / version)
+                    break
+                except OSError:
+                    if not (model_dir / version).exists():
+                        raise
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        print(f"Registered {name} {version} ({manifest['artifact_bytes']:,} bytes)")
+        return manifest
+
+    def resolve(self, name, version='production'):
+        """Concrete version for 'production', 'latest' or an explicit version"""
+        if version == 'latest':
+            versions = self.versions(name)
+            if not versions:
+                raise FileNotFoundError(f"No versions registered for {name}")
+            return versions[-1]
+        if version == 'production':
+            pointer = self._model_dir(name) / 'production.json'
+            if not pointer.exists():
+                raise FileNotFoundError(f"No production version promoted for {name}")
+            with open(pointer) as f:
+                return json.load(f)['version']
+        return version
+
+    def manifest(self, name, version='production'):
+        version = self.resolve(name, version)
+        with open(self._model_dir(name) / version / MANIFEST_NAME) as f:
+            return json.load(f)
+
+    def load(self, name, version='production', mmap=True, verify=False):
+        """
+        Load a registered model
+        Args:
+            mmap: Memory-map the artifact's arrays instead of reading them into memory
+            verify: Check the artifact against its manifest hash first
+        Returns:
+            (model, manifest)
+        """
+        manifest = self.manifest(name, version)
+        artifact = self._model_dir(name) / manifest['version'] / ARTIFACT_NAME
+        if verify and file_sha256(artifact) != manifest['artifact_sha256']:
+            raise ValueError(f"Artifact hash mismatch for {name} {manifest['version']}")
+        model = joblib.load(artifact, mmap_mode='r' if mmap else None)
+        return model, manifest
+
+    def promote(self, name, version='latest'):
+        """Atomically point `production` at a version"""
+        version = self.resolve(name, version)
+        if not (self._model_dir(name) / version / MANIFEST_NAME).exists():
+            raise FileNotFoundError(f"{name} has no version {version}")
+        pointer = self._model_dir(name) / 'production.json'
+        history = []
+        if pointer.exists():
+            with open(pointer) as f:
+                history = json.load(f).get('history', [])
+        history.append({'version': version, 'promoted_at': time.strftime('%Y-%m-%dT%H:%M:%S')})
+        _write_json(pointer, {'version': version, 'history': history})
+        print(f"Promoted {name} {version} to production")
+        return version
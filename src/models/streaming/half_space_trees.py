@@ -0,0 +1,145 @@
+"""
+Streaming Half-Space Trees
+Online anomaly detector (Tan, Ting & Liu, 2011) with fixed memory and
+vectorized micro-batch scoring
+"""
+
+import numpy as np
+
+class HalfSpaceTrees:
+    def __init__(self, n_trees=25, height=10, window_size=1000, size_limit=None, random_state=None):
+        """
+        Ensemble of random half-space trees over sliding mass windows
+        Args:
+            n_trees: Number of trees
+            height: Depth of every tree (2**(height+1)-1 nodes each)
+            window_size: Events per window; the latest window's mass replaces
+                the reference mass each time it fills
+            size_limit: Stop descending at nodes with less reference mass
+                (default: 10% of the window)
+            random_state: Seed for the tree structure
+        """
+        self.n_trees = n_trees
+        self.height = height
+        self.window_size = window_size
+        self.size_limit = size_limit if size_limit is not None else 0.1 * window_size
+        self.random_state = random_state
+        self.n_nodes = 2 ** (height + 1) - 1
+        self.split_dim = None
+        self.split_value = None
+        self.reference = None
+        self.latest = None
+        self.window_count = 0
+
+    @property
+    def is_fitted(self):
+        return self.split_dim is not None
+
+    def _build(self, X):
+        """Draw random tree structures over work ranges around the data range"""
+        rng = np.random.default_rng(self.random_state)
+        n_features = X.shape[1]
+        low, high = np.nanmin(X, axis=0), np.nanmax(X, axis=0)
+        span = np.where(high > low, high - low, 1.0)
+        n_internal = 2 ** self.height - 1
+
+        self.split_dim = np.zeros((self.n_trees, n_internal), dtype=np.intp)
+        self.split_value = np.zeros((self.n_trees, n_internal))
+        for t in range(self.n_trees):
+            # Work range: a random split point, widened so both halves cover the data
+            s = low + rng.random(n_features) * span
+            radius = 2 * np.maximum(s - low, high - s)
+            radius = np.where(radius > 0, radius, 1.0)
+            node_low = np.empty((self.n_nodes, n_features))
+            node_high = np.empty((self.n_nodes, n_features))
+            node_low[0], node_high[0] = s - radius, s + radius
+            dims = rng.integers(0, n_features, n_internal)
+            for node in range(n_internal):
+                q = dims[node]
+                mid = (node_low[node, q] + node_high[node, q]) / 2
+                left, right = 2 * node + 1, 2 * node + 2
+                node_low[left], node_high[left] = node_low[node], node_high[node]
+                node_low[right], node_high[right] = node_low[node], node_high[node]
+                node_high[left, q] = mid
+                node_low[right, q] = mid
+                self.split_value[t, node] = mid
+            self.split_dim[t] = dims
+
+        self.reference = np.zeros((self.n_trees, self.n_nodes))
+        self.latest = np.zeros((self.n_trees, self.n_nodes))
+        self.window_count = 0
+
+    def _paths(self, X):
+        """Node index at every depth for every (tree, sample): (height+1, trees, n)"""
+        n = len(X)
+        X = np.nan_to_num(X)
+        rows = np.arange(n)
+        trees = np.arange(self.n_trees)[:, None]
+        paths = np.zeros((self.height + 1, self.n_trees, n), dtype=np.intp)
+        node = paths[0]
+        for depth in range(self.height):
+            dims = self.split_dim[trees, node]
+            right = X[rows, dims] >= self.split_value[trees, node]
+            node = 2 * node + 1 + right
+            paths[depth + 1] = node
+        return paths
+
+    def _score_paths(self, paths):
+        mass = self.reference[np.arange(self.n_trees)[None, :, None], paths]
+        # Terminal node: the first one on the path whose mass is below the limit
+        below = mass < self.size_limit
+        depth = np.where(below.any(axis=0), below.argmax(axis=0), self.height)
+        terminal = np.take_along_axis(mass, depth[None], axis=0)[0]
+        return (terminal * 2.0 ** depth).sum(axis=0)
+
+    def _learn_paths(self, paths):
+        offsets = (np.arange(self.n_trees) * self.n_nodes)[None, :, None]
+        counts = np.bincount((paths + offsets).ravel(), minlength=self.n_trees * self.n_nodes)
+        self.latest += counts.reshape(self.n_trees, self.n_nodes)
+
+    def _close_window(self):
+        self.reference, self.latest = self.latest, self.reference
+        self.latest[:] = 0
+        self.window_count = 0
+
+    def fit(self, X):
+        """Build the trees and learn X as the initial reference window(s)"""
+        X = np.asarray(X, dtype=np.float64)
+        self._build(X)
+        self.partial_fit(X)
+        if not self.reference.any():
+            # Less than one window seen: promote what we have so scoring works
+            self._close_window()
+        return self
+
+    def score(self, X):
+        """Mass scores against the reference window (lower = more anomalous)"""
+        if not self.is_fitted:
+            raise ValueError("HalfSpaceTrees must be fitted before scoring")
+        return self._score_paths(self._paths(np.asarray(X, dtype=np.float64)))
+
+    def partial_fit(self, X):
+        """Add events to the latest window, rolling windows as they fill"""
+        self.score_partial_fit(X)
+        return self
+
+    def score_partial_fit(self, X):
+        """
+        Score each event against the current reference window, then learn it
+        Windows that fill mid-batch roll over before the rest is scored.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if not self.is_fitted:
+            self._build(X)
+        scores = np.empty(len(X))
+        start = 0
+        while start < len(X):
+            stop = min(len(X), start + self.window_size - self.window_count)
+            paths = self._paths(X[start:stop])
+            scores[start:stop] = self._score_paths(paths)
+            self._learn_paths(paths)
+            self.window_count += stop - start
+            if self.window_count >= self.window_size:
+                self._close_window()
+            start = stop
+        return scores
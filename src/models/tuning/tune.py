@@ -1 +1,353 @@
-# Model Tuning 
+"""
+Hyperparameter Tuning
+Successive halving / Hyperband over models and contamination, with trials in
+a process pool, cached folds and features, and resumable search state
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from sklearn.ensemble import (
+    RandomForestClassifier, HistGradientBoostingClassifier, IsolationForest
+)
+from sklearn.metrics import average_precision_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+from src.data.storage import read_table
+
+CACHE_DIR = 'models/checkpoints/tuning'
+
+DEFAULT_SPACE = {
+    'random_forest': {
+        'n_estimators': [50, 100, 200, 400],
+        'max_depth': [None, 8, 16, 32],
+        'min_samples_leaf': [1, 2, 5, 10],
+        'max_features': ['sqrt', 0.5, 1.0]
+    },
+    'hist_gradient_boosting': {
+        'learning_rate': [0.03, 0.1, 0.3],
+        'max_leaf_nodes': [15, 31, 63],
+        'l2_regularization': [0.0, 0.1, 1.0],
+        'max_iter': [100, 200, 400]
+    },
+    'isolation_forest': {
+        'contamination': [0.01, 0.02, 0.03, 0.05, 0.1],
+        'n_estimators': [100, 200],
+        'max_samples': [256, 1024, 'auto']
+    }
+}
+
+MODELS = {
+    'random_forest': RandomForestClassifier,
+    'hist_gradient_boosting': HistGradientBoostingClassifier,
+    'isolation_forest': IsolationForest
+}
+
+def build_model(config, random_state=42):
+    """Instantiate the estimator described by a trial config"""
+    return MODELS[config['model']](random_state=random_state, **config['params'])
+
+def _config_key(config):
+    return json.dumps(config, sort_keys=True)
+
+def _trial_key(config, resource):
+    return f"{_config_key(config)}@{resource}"
+
+def sample_configs(space, n, rng):
+    """Draw n random configs, spreading them across the models in the space"""
+    models = sorted(space)
+    configs = []
+    for i in range(n):
+        model = models[i % len(models)]
+        params = {
+            name: values[rng.integers(len(values))]
+            for name, values in sorted(space[model].items())
+        }
+        configs.append({'model': model, 'params': params})
+    return configs
+
+def prepare_features(data_path, label_column='is_anomaly', n_splits=3,
+                     cache_dir=CACHE_DIR, seed=42):
+    """
+    Build (or reuse) the preprocessed arrays every trial shares
+    Features are median-imputed float32, folds are stratified and the row
+    order used for subsampling is fixed; all are saved as .npy so workers
+    memory-map them instead of receiving copies.
+    Returns:
+        Dict with the cache key, array paths and feature names
+    """
+    data_path = Path(data_path)
+    stat = data_path.stat()
+    key = hashlib.sha1(json.dumps([
+        str(data_path.resolve()), stat.st_mtime_ns, stat.st_size, label_column, n_splits, seed
+    ]).encode()).hexdigest()[:16]
+    directory = Path(cache_dir) / key
+    manifest_path = directory / 'features.json'
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            return json.load(f)
+
+    print(f"Preparing cached features for {data_path}...")
+    df = read_table(data_path, numeric_only=True)
+    if label_column not in df.columns:
+        raise ValueError(f"Tuning needs a numeric label column '{label_column}'")
+    y = df.pop(label_column).to_numpy(dtype=np.int8)
+    features = [col for col in df.columns if col != 'anomaly_score']
+    X = df[features].to_numpy(dtype=np.float32)
+    medians = np.nanmedian(X, axis=0)
+    missing = np.isnan(X)
+    if missing.any():
+        X[missing] = np.take(np.nan_to_num(medians), np.nonzero(missing)[1])
+
+    folds = np.zeros(len(y), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    for fold, (_, test_index) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        folds[test_index] = fold
+    order = np.random.default_rng(seed).permutation(len(y)).astype(np.int64)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for name, array in (('X', X), ('y', y), ('folds', folds), ('order', order)):
+        paths[name] = str(directory / f'{name}.npy')
+        np.save(paths[name], array)
+    manifest = {
+        'key': key, 'paths': paths, 'features': features,
+        'rows': len(y), 'n_splits': n_splits
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    return manifest
+
+# Memory-mapped arrays per worker process, opened once per cache
+_worker_arrays = {}
+
+def _arrays(manifest):
+    key = manifest['key']
+    if key not in _worker_arrays:
+        _worker_arrays.clear()
+        _worker_arrays[key] = {
+            name: np.load(path, mmap_mode='r') for name, path in manifest['paths'].items()
+        }
+    return _worker_arrays[key]
+
+def evaluate_trial(config, resource, manifest, metric='f1', max_eval_rows=200_000, seed=42):
+    """
+    Cross-validated score of one config trained on `resource` rows per fold
+    Runs in a worker process; arrays come from the shared memory-mapped cache.
+    """
+    start = time.perf_counter()
+    arrays = _arrays(manifest)
+    X, y, folds, order = arrays['X'], arrays['y'], arrays['folds'], arrays['order']
+    scores = []
+    for fold in range(manifest['n_splits']):
+        train = order[folds[order] != fold][:resource]
+        # Held-out rows grow with the rung so cheap rungs stay cheap
+        test = np.flatnonzero(folds == fold)[:min(max_eval_rows, max(resource, 10_000))]
+        model = build_model(config, seed)
+        if config['model'] == 'isolation_forest':
+            model.fit(X[train])
+            ranking = -model.score_samples(X[test])
+            labels = (model.predict(X[test]) == -1).astype(int)
+        else:
+            if len(np.unique(y[train])) < 2:
+                scores.append(0.0)
+                continue
+            model.fit(X[train], y[train])
+            ranking = model.predict_proba(X[test])[:, -1]
+            labels = (ranking >= 0.5).astype(int)
+        if metric == 'average_precision':
+            scores.append(average_precision_score(y[test], ranking))
+        else:
+            scores.append(f1_score(y[test], labels, zero_division=0))
+    return {
+        'config': config,
+        'resource': int(resource),
+        'score': float(np.mean(scores)),
+        'seconds': time.perf_counter() - start
+    }
+
+class HyperparameterTuner:
+    def __init__(self, space=None, method='hyperband', metric='f1', eta=3,
+                 min_resource=10_000, max_resource=None, n_configs=27, max_workers=None,
+                 time_budget=None, n_splits=3, cache_dir=CACHE_DIR, seed=42):
+        """
+        Successive halving / Hyperband search
+        Args:
+            space: {model: {param: [choices]}}; defaults to DEFAULT_SPACE
+            method: 'hyperband' or 'halving'
+            metric: 'f1' (uses contamination / 0.5 threshold) or 'average_precision'
+            eta: Keep 1/eta of configs per rung and grow rows by eta
+            min_resource, max_resource: Training rows per fold at the first and last rung
+            n_configs: Configs in the first rung of plain successive halving
+            max_workers: Trial processes (default: all cores)
+            time_budget: Seconds after which running trials are stopped and the
+                best result so far is returned
+        """
+        self.space = space or DEFAULT_SPACE
+        self.method = method
+        self.metric = metric
+        self.eta = eta
+        self.min_resource = min_resource
+        self.max_resource = max_resource
+        self.n_configs = n_configs
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.time_budget = time_budget
+        self.n_splits = n_splits
+        self.cache_dir = cache_dir
+        self.seed = seed
+        self.trials = {}
+        self.deadline = None
+        print("Hyperparameter Tuner Initialized")
+
+    def _load_state(self, state_path, manifest):
+        if state_path.exists():
+            with open(state_path) as f:
+                state = json.load(f)
+            if state.get('cache_key') == manifest['key'] and state.get('metric') == self.metric:
+                self.trials = state['trials']
+                print(f"Resuming search: {len(self.trials)} trials already done")
+                return
+        self.trials = {}
+
+    def _save_state(self, state_path, manifest, best=None):
+        state = {
+            'cache_key': manifest['key'],
+            'method': self.method,
+            'metric': self.metric,
+            'trials': self.trials,
+            'best': best
+        }
+        tmp = state_path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, state_path)
+
+    def _run_rung(self, pool, configs, resource, manifest, state_path):
+        """Evaluate configs at one resource level; returns (config, score) pairs"""
+        pending = {}
+        for config in configs:
+            key = _trial_key(config, resource)
+            if key not in self.trials:
+                pending[key] = pool.apply_async(
+                    evaluate_trial, (config, resource, manifest, self.metric, 200_000, self.seed)
+                )
+        for key, result in pending.items():
+            remaining = None if self.deadline is None else self.deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                self.trials[key] = result.get(remaining)
+            except multiprocessing.TimeoutError:
+                break
+            except Exception as e:
+                # A failing config is ranked last instead of aborting the search
+                config, resource_rows = key.rsplit('@', 1)
+                self.trials[key] = {
+                    'config': json.loads(config), 'resource': int(resource_rows),
+                    'score': -1.0, 'seconds': 0.0, 'error': str(e)
+                }
+            self._save_state(state_path, manifest)
+        return [
+            (config, self.trials[_trial_key(config, resource)]['score'])
+            for config in configs if _trial_key(config, resource) in self.trials
+        ]
+
+    def _halving(self, pool, configs, rungs, manifest, state_path):
+        for i, resource in enumerate(rungs):
+            print(f"   Rung: {len(configs)} configs x {resource:,} rows")
+            scored = self._run_rung(pool, configs, resource, manifest, state_path)
+            if self._out_of_time() or i == len(rungs) - 1 or len(scored) <= 1:
+                return
+            scored.sort(key=lambda item: item[1], reverse=True)
+            configs = [config for config, _ in scored[:max(1, len(scored) // self.eta)]]
+
+    def _brackets(self, max_resource, rng):
+        """(configs, rows per rung) for each bracket of the chosen method"""
+        s_max = max(0, int(math.log(max_resource / self.min_resource, self.eta) + 1e-9))
+        # Rungs sit at max_resource / eta**k so brackets share trial results
+        rungs = [int(max_resource / self.eta ** k) for k in range(s_max, -1, -1)]
+        if self.method == 'halving':
+            # Just enough rungs for the last survivor to reach max_resource
+            n_rungs = int(math.ceil(math.log(self.n_configs, self.eta) - 1e-9)) + 1
+            return [(sample_configs(self.space, self.n_configs, rng), rungs[-n_rungs:])]
+        return [
+            (sample_configs(self.space, math.ceil((s_max + 1) / (s + 1) * self.eta ** s), rng),
+             rungs[s_max - s:])
+            for s in range(s_max, -1, -1)
+        ]
+
+    def _out_of_time(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def best(self):
+        """Best trial, preferring those trained on the most rows; failed trials never win"""
+        completed = [trial for trial in self.trials.values() if 'error' not in trial]
+        if not completed:
+            return None
+        return max(completed, key=lambda t: (t['resource'], t['score']))
+
+    def fit(self, data_path, label_column='is_anomaly', state_path=None):
+        """
+        Search the space on a table and return the best trial
+        Re-running with the same data, seed and state_path resumes the search.
+        """
+        start = time.monotonic()
+        self.deadline = start + self.time_budget if self.time_budget else None
+        print("="*80)
+        print(f"HYPERPARAMETER SEARCH ({self.method}, {self.metric})")
+        print("="*80)
+
+        manifest = prepare_features(data_path, label_column, self.n_splits, self.cache_dir, self.seed)
+        train_rows = manifest['rows'] * (self.n_splits - 1) // self.n_splits
+        max_resource = min(self.max_resource or train_rows, train_rows)
+        state_path = Path(state_path or Path(self.cache_dir) / f"{manifest['key']}_state.json")
+        self._load_state(state_path, manifest)
+
+        rng = np.random.default_rng(self.seed)
+        pool = multiprocessing.Pool(self.max_workers)
+        try:
+            for configs, rungs in self._brackets(max_resource, rng):
+                if self._out_of_time():
+                    break
+                self._halving(pool, configs, rungs, manifest, state_path)
+        finally:
+            # Stops trials still running when the budget ran out
+            pool.terminate()
+            pool.join()
+
+        best = self.best()
+        self._save_state(state_path, manifest, best)
+        elapsed = time.monotonic() - start
+        print(f"\n{len(self.trials)} trials in {elapsed:.1f}s"
+              f"{' (time budget reached)' if self._out_of_time() else ''}")
+        if best:
+            print(f"Best: {best['config']['model']} {best['config']['params']}")
+            print(f"{self.metric}: {best['score']:.4f} on {best['resource']:,} rows per fold")
+        print(f"Search state: {state_path}")
+        return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune anomaly models with successive halving")
+    parser.add_argument('data', help="Table with features and a label column")
+    parser.add_argument('--label', default='is_anomaly')
+    parser.add_argument('--method', choices=['hyperband', 'halving'], default='hyperband')
+    parser.add_argument('--metric', choices=['f1', 'average_precision'], default='f1')
+    parser.add_argument('--time-budget', type=float, default=None, help="Seconds")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--state', default=None, help="Search state file for resuming")
+    args = parser.parse_args()
+
+    tuner = HyperparameterTuner(
+        method=args.method, metric=args.metric,
+        max_workers=args.workers, time_budget=args.time_budget
+    )
+    tuner.fit(args.data, args.label, args.state)
@@ -1 +1,52 @@
-# Test Data Processing 
+"""
+Test Data Processing
+Streaming ingestion: retention and producer failures
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data.ingestion.streaming import LocalBroker, StreamConsumer, StreamProducer
+
+def test_consumer_skips_records_trimmed_by_retention():
+    async def run():
+        broker = LocalBroker(retention=100)
+        broker.create_topic('events')
+        for i in range(3):
+            await broker.append('events', 0, [(0.0, None, i * 100 + j) for j in range(100)])
+        consumer = StreamConsumer(broker, 'events', 'group', batch_size=150)
+        assert consumer.lag() == 100
+        delivered = []
+        while batch := await consumer.poll():
+            delivered.extend(value for _, _, value in batch)
+        return delivered, consumer.lag()
+
+    delivered, lag = asyncio.run(run())
+    assert delivered == list(range(200, 300))
+    assert lag == 0
+
+class BrokerDown(Exception):
+    pass
+
+class FailingBroker(LocalBroker):
+    async def append(self, topic, partition, records):
+        raise BrokerDown(topic)
+
+def test_flush_raises_when_appending_fails():
+    async def run():
+        broker = FailingBroker()
+        broker.create_topic('events')
+        producer = await StreamProducer(broker, 'events', max_queue=2).start()
+        await producer.send(1)
+        with pytest.raises(BrokerDown):
+            await asyncio.wait_for(producer.flush(), 5)
+        with pytest.raises(BrokerDown):
+            for i in range(5):
+                await asyncio.wait_for(producer.send(i), 5)
+
+    asyncio.run(run())
@@ -1 +1,151 @@
-# Test Pipelines 
+"""
+Test Pipelines
+Stage cache rules: differential privacy noise is never reused
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pipelines.bootstrap_pipeline import BootstrapPipeline
+from pipelines.detection_pipeline import DetectionPipeline
+from pipelines.fused_pipeline import FusedPipeline
+from src.data.pseudonym_manager import PseudonymManager
+from src.data.stage_cache import StageCache
+
+SECURITY_CONFIG = str(ROOT / 'configs' / 'security_config.yaml')
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in a scratch directory so pseudonym stores and stats stay out of the repo"""
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    n = 500
+    pd.DataFrame({
+        'name': [f'user{i}' for i in range(n)],
+        'email': [f'user{i}@example.com' for i in range(n)],
+        'age': rng.integers(18, 80, n),
+        'salary': rng.integers(30_000, 150_000, n)
+    }).to_csv(tmp_path / 'raw.csv', index=False)
+    return tmp_path
+
+@pytest.fixture
+def cache(workdir):
+    return StageCache(workdir / 'cache')
+
+def bootstrap(cache, seed=7, **kwargs):
+    return BootstrapPipeline(config_path=SECURITY_CONFIG, seed=seed, cache=cache, **kwargs)
+
+def test_unseeded_privbayes_is_never_cached(workdir, cache):
+    pipeline = bootstrap(cache, seed=None)
+    assert pipeline.cache_params() is None
+    first = pipeline.anonymize_dataset('raw.csv', 'a.csv')
+    second = bootstrap(cache, seed=None).anonymize_dataset('raw.csv', 'b.csv')
+    assert cache.hits == 0
+    assert not cache._entries()
+    # Fresh noise on every run
+    assert not first['age'].equals(second['age'])
+
+def test_unseeded_fused_run_is_never_cached(workdir, cache):
+    for _ in range(2):
+        pipeline = FusedPipeline(bootstrap(None, seed=None), DetectionPipeline(), cache=cache)
+        pipeline.run_file('raw.csv', 'results.csv', chunksize=100)
+    assert cache.hits == 0
+    assert not cache._entries()
+
+def test_seeded_rerun_restores_output_and_noise_state(workdir, cache):
+    first = bootstrap(cache)
+    expected = first.anonymize_dataset('raw.csv', 'a.csv')
+    second = bootstrap(cache)
+    restored = second.anonymize_dataset('raw.csv', 'b.csv')
+    assert cache.hits == 1
+    pd.testing.assert_frame_equal(expected, restored, check_dtype=False)
+    # Later draws continue exactly as after an uncached run
+    assert first.privbayes.mechanism.rng.random() == second.privbayes.mechanism.rng.random()
+
+@pytest.mark.parametrize('change', ['epsilon', 'seed', 'rng_state'])
+def test_noise_parameters_change_the_key(workdir, cache, change):
+    bootstrap(cache).anonymize_dataset('raw.csv', 'a.csv')
+    pipeline = bootstrap(cache, seed=8 if change == 'seed' else 7)
+    if change == 'epsilon':
+        pipeline.privbayes.epsilon = 1.0
+    elif change == 'rng_state':
+        pipeline.privbayes.mechanism.rng.random()
+    pipeline.anonymize_dataset('raw.csv', 'b.csv')
+    assert cache.hits == 0
+    assert len(cache._entries()) == 2
+
+def test_noise_already_drawn_is_not_reused_in_the_same_pipeline(workdir, cache):
+    pipeline = bootstrap(cache)
+    first = pipeline.anonymize_dataset('raw.csv', 'a.csv')
+    second = pipeline.anonymize_dataset('raw.csv', 'b.csv')
+    assert cache.hits == 0
+    assert not first['age'].equals(second['age'])
+
+def test_reset_pseudonym_store_misses(workdir, cache):
+    bootstrap(cache).anonymize_dataset('raw.csv', 'a.csv')
+    pipeline = bootstrap(cache)
+    pipeline.pseudonym_manager = PseudonymManager(workdir / 'other_store')
+    pipeline.anonymize_dataset('raw.csv', 'b.csv')
+    assert cache.hits == 0
+    # The new store can reverse what was written
+    pseudonym = pd.read_csv('b.csv')['email_pseudo'].iloc[0]
+    assert pipeline.pseudonym_manager.reverse_pseudonym(pseudonym, 'email') == 'user0@example.com'
+
+def test_detection_cache_keys_on_contamination(workdir, cache):
+    bootstrap(None, use_privbayes=False).anonymize_dataset('raw.csv', 'anonymized.csv')
+    DetectionPipeline(contamination=0.1, cache=cache).run_detection('anonymized.csv', 'a.csv')
+    DetectionPipeline(contamination=0.05, cache=cache).run_detection('anonymized.csv', 'b.csv')
+    assert cache.hits == 0
+    restored = DetectionPipeline(contamination=0.1, cache=cache)
+    restored.run_detection('anonymized.csv', 'c.csv')
+    assert cache.hits == 1
+    assert restored.is_fitted
+    pd.testing.assert_frame_equal(pd.read_csv('a.csv'), pd.read_csv('c.csv'))
+
+def test_prefitted_detector_is_not_cached(workdir, cache):
+    bootstrap(None, use_privbayes=False).anonymize_dataset('raw.csv', 'anonymized.csv')
+    detector = DetectionPipeline(cache=cache).fit(pd.read_csv('anonymized.csv'))
+    assert detector.cache_params() is None
+    detector.run_detection('anonymized.csv', 'a.csv')
+    assert cache.hits == cache.misses == 0
+
+def test_streaming_accepts_decimals_after_an_integer_chunk(workdir):
+    pd.DataFrame({
+        'email': [f'user{i}@example.com' for i in range(6)],
+        'score': ['1', '2', '3', '4.5', '', '6']
+    }).to_csv('mixed.csv', index=False)
+    pipeline = bootstrap(None, use_privbayes=False)
+    assert pipeline.stream_anonymize_dataset('mixed.csv', 'out.csv', chunksize=3) == 6
+    assert pd.read_csv('out.csv')['score'].tolist()[3] == 4.5
+
+def test_streaming_and_batch_pseudonyms_match(workdir):
+    pd.DataFrame({
+        'name': [f'user{i}' for i in range(6)],
+        'phone': [5551234000 + i for i in range(6)],
+        'age': [30, 31, 32, 33, 34, 35]
+    }).to_csv('phones.csv', index=False)
+    pipeline = bootstrap(None, use_privbayes=False)
+    pipeline.anonymize_dataset('phones.csv', 'batch.csv')
+    pipeline.stream_anonymize_dataset('phones.csv', 'stream.csv', chunksize=4)
+    batch, stream = pd.read_csv('batch.csv'), pd.read_csv('stream.csv')
+    pd.testing.assert_frame_equal(batch, stream)
+    assert pipeline.pseudonym_manager.reverse_pseudonym(stream['phone_pseudo'][0], 'phone') == '5551234000'
+
+def test_input_hashes_keep_one_memo_per_path(workdir, cache):
+    for i in range(3):
+        (workdir / 'input.csv').write_text(f'a\n{i}\n')
+        cache.input_hash(workdir / 'input.csv')
+    assert len(list((cache.cache_dir / 'hashes').iterdir())) == 1
+
+def test_output_larger_than_the_cap_is_not_stored(workdir):
+    cache = StageCache(workdir / 'cache', max_bytes=10)
+    cache.store('key', {'output': workdir / 'raw.csv'}, stage='anonymize')
+    assert cache.lookup('key') is None
+    assert not cache._entries()
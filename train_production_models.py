@@ -1,98 +1,205 @@
 """
-Train Production ML Models on All 3 Real Datasets
-Handles missing values and ensures robust training
+Train Production ML Models on All Configured Datasets
+Datasets and model specs come from configs/model_config.yaml; every dataset
+trains in parallel worker processes
 """
 
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.metrics import classification_report, accuracy_score
-from sklearn.impute import SimpleImputer
-from sklearn.pipeline import Pipeline
+from sklearn.metrics import accuracy_score
 import joblib
+import yaml
 from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.data.stage_cache import StageCache, code_version
+from src.data.storage import find_table, read_table, write_table
+from src.models.registry.model_registry import ModelRegistry
+
+CONFIG_PATH = 'configs/model_config.yaml'
+
+def load_config(path=CONFIG_PATH):
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+def _slug(name):
+    return name.lower().replace(' ', '_')
+
+ARRAYS = ('X_train', 'X_test', 'y_train', 'y_test')
+
+def prepare_dataset(dataset, training):
+    """
+    Load one dataset once and save the train/test split as contiguous .npy files
+    Model workers memory-map these files instead of receiving pickled copies.
+    The cache directory is keyed by the table's content hash and the split
+    settings, so an edited table is never served stale features.
+    """
+    label = dataset.get('label', 'is_anomaly')
+    table = find_table(dataset['table'])
+    dtype = training.get('feature_dtype', 'float64')
+    key = json.dumps({
+        'table': StageCache().input_hash(table),
+        'label': label,
+        'dtype': dtype,
+        'test_size': training['test_size'],
+        'random_state': training['random_state'],
+        'code': code_version(prepare_dataset)
+    }, sort_keys=True)
+    cache_root = Path(training['feature_cache'])
+    slug = _slug(dataset['name'])
+    directory = cache_root / f"{slug}-{hashlib.sha256(key.encode()).hexdigest()[:16]}"
+    arrays = {name: str(directory / f'{name}.npy') for name in ARRAYS}
+
+    if not (directory / 'meta.json').exists():
+        df = read_table(table, numeric_only=True)
+        features = [c for c in df.select_dtypes(include=['number']).columns
+                    if c not in ('is_anomaly', 'anomaly_score', label)]
+        X = df[features].fillna(0).to_numpy(dtype=dtype)  # Fill NaN with 0
+        y = df[label].to_numpy()
+        del df
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=training['test_size'], random_state=training['random_state']
+        )
+
+        # Written under a temporary name and renamed, so readers never see a partial entry
+        staging = cache_root / f'.{slug}-{uuid.uuid4().hex}'
+        staging.mkdir(parents=True)
+        for name, array in zip(ARRAYS, (X_train, X_test, y_train, y_test)):
+            np.save(staging / f'{name}.npy', np.ascontiguousarray(array))
+        with open(staging / 'meta.json', 'w') as f:
+            json.dump({'features': features, 'rows': len(y), 'table': str(table)}, f)
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            # Another run prepared the same entry first
+            shutil.rmtree(staging, ignore_errors=True)
+        # Older entries for this dataset are stale now
+        for old in cache_root.glob(f'{slug}-*'):
+            if old != directory:
+                shutil.rmtree(old, ignore_errors=True)
+    else:
+        print(f"   {dataset['name']}: reusing cached features from {directory}")
+
+    with open(directory / 'meta.json') as f:
+        meta = json.load(f)
+    return {'arrays': arrays, **meta}
+
+def build_model(spec):
+    """Instantiate a model spec such as {'class': 'sklearn.ensemble.X', 'params': {...}}"""
+    module, _, cls = spec['class'].rpartition('.')
+    return getattr(importlib.import_module(module), cls)(**(spec.get('params') or {}))
+
+def train_model(dataset, model_name, spec, arrays, output_dir):
+    """Fit one model spec on a memory-mapped dataset and save it as a candidate"""
+    X_train, X_test, y_train, y_test = (np.load(arrays[name], mmap_mode='r') for name in ARRAYS)
+
+    model = build_model(spec)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    accuracy = accuracy_score(y_test, model.predict(X_test))
+
+    path = Path(output_dir) / f"{Path(dataset['model_file']).stem}.{model_name}.pkl"
+    joblib.dump(model, path)
+    print(f"✓ {dataset['name']} / {model_name}: accuracy {accuracy:.4f} ({fit_seconds:.1f}s)")
+    return {
+        'dataset': dataset['name'],
+        'model': model_name,
+        'accuracy': accuracy,
+        'fit_seconds': round(fit_seconds, 2),
+        'candidate_path': str(path)
+    }
+
+def train_models(config_path=CONFIG_PATH, workers=None):
+    config = load_config(config_path)
+    training = config['training']
+    datasets = config['datasets']
+    output_dir = Path(training['output_dir'])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tasks = [(dataset, name) for dataset in datasets for name in dataset['models']]
+    workers = workers or training.get('workers') or min(len(tasks), os.cpu_count() or 1)
 
-def train_models():
     print("="*80)
-    print("TRAINING PRODUCTION ML MODELS - All 3 Datasets")
+    print(f"TRAINING PRODUCTION ML MODELS - {len(datasets)} Datasets ({workers} worker(s))")
     print("="*80)
-    
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Each dataset is read and preprocessed once, in parallel
+        prepared = dict(zip(
+            [d['name'] for d in datasets],
+            pool.map(prepare_dataset, datasets, [training] * len(datasets))
+        ))
+        for dataset in datasets:
+            info = prepared[dataset['name']]
+            print(f"   {dataset['name']}: {info['rows']:,} rows x {len(info['features'])} features")
+
+        futures = [
+            pool.submit(train_model, dataset, name, config['models'][name],
+                        prepared[dataset['name']]['arrays'], output_dir)
+            for dataset, name in tasks
+        ]
+        results = [future.result() for future in futures]
+    wall_seconds = time.perf_counter() - start
+
+    # Keep the most accurate candidate per dataset under its configured file name
+    summary = pd.DataFrame(results)
+    summary['rows'] = summary['dataset'].map(lambda name: prepared[name]['rows'])
+    best = summary.loc[summary.groupby('dataset', sort=False)['accuracy'].idxmax()]
+    summary['selected'] = summary.index.isin(best.index)
+    registry = ModelRegistry(training['registry'])
     models_trained = []
-    
-    # Train on Dataset 1: Cybersecurity
-    print("\n[1/3] Training Model 1: Cybersecurity Threat Classifier...")
-    df1 = pd.read_csv('results/tables/dataset1_cybersecurity_results.csv')
-    numeric_cols1 = df1.select_dtypes(include=['number']).columns.tolist()
-    if 'is_anomaly' in numeric_cols1:
-        numeric_cols1.remove('is_anomaly')
-    
-    X1 = df1[numeric_cols1].fillna(0)  # Fill NaN with 0
-    y1 = df1['is_anomaly']
-    X_train1, X_test1, y_train1, y_test1 = train_test_split(X1, y1, test_size=0.2, random_state=42)
-    
-    model1 = RandomForestClassifier(n_estimators=100, random_state=42)
-    model1.fit(X_train1, y_train1)
-    acc1 = accuracy_score(y_test1, model1.predict(X_test1))
-    print(f"✓ Cybersecurity Model Accuracy: {acc1:.4f}")
-    
-    Path('models/trained').mkdir(parents=True, exist_ok=True)
-    joblib.dump(model1, 'models/trained/cybersecurity_model.pkl')
-    models_trained.append({'dataset': 'Cybersecurity', 'accuracy': acc1, 'model': 'RandomForest'})
-    
-    # Train on Dataset 2: Login Behavior
-    print("\n[2/3] Training Model 2: Login Behavior Classifier...")
-    df2 = pd.read_csv('results/tables/dataset2_login_behavior_results.csv')
-    numeric_cols2 = df2.select_dtypes(include=['number']).columns.tolist()
-    if 'is_anomaly' in numeric_cols2:
-        numeric_cols2.remove('is_anomaly')
-    
-    # Handle missing values properly
-    X2 = df2[numeric_cols2].fillna(0)  # Fill NaN with 0
-    y2 = df2['is_anomaly']
-    X_train2, X_test2, y_train2, y_test2 = train_test_split(X2, y2, test_size=0.2, random_state=42)
-    
-    # Use RandomForest instead (more robust to missing values)
-    model2 = RandomForestClassifier(n_estimators=100, random_state=42)
-    model2.fit(X_train2, y_train2)
-    acc2 = accuracy_score(y_test2, model2.predict(X_test2))
-    print(f"✓ Login Behavior Model Accuracy: {acc2:.4f}")
-    
-    joblib.dump(model2, 'models/trained/login_behavior_model.pkl')
-    models_trained.append({'dataset': 'Login Behavior', 'accuracy': acc2, 'model': 'RandomForest'})
-    
-    # Train on Dataset 3: Smart Grid
-    print("\n[3/3] Training Model 3: Smart Grid Anomaly Classifier...")
-    df3 = pd.read_csv('results/tables/dataset3_smart_grid_results.csv')
-    numeric_cols3 = df3.select_dtypes(include=['number']).columns.tolist()
-    if 'is_anomaly' in numeric_cols3:
-        numeric_cols3.remove('is_anomaly')
-    
-    X3 = df3[numeric_cols3].fillna(0)  # Fill NaN with 0
-    y3 = df3['is_anomaly']
-    X_train3, X_test3, y_train3, y_test3 = train_test_split(X3, y3, test_size=0.2, random_state=42)
-    
-    model3 = RandomForestClassifier(n_estimators=100, random_state=42)
-    model3.fit(X_train3, y_train3)
-    acc3 = accuracy_score(y_test3, model3.predict(X_test3))
-    print(f"✓ Smart Grid Model Accuracy: {acc3:.4f}")
-    
-    joblib.dump(model3, 'models/trained/smart_grid_model.pkl')
-    models_trained.append({'dataset': 'Smart Grid', 'accuracy': acc3, 'model': 'RandomForest'})
-    
+    for dataset in datasets:
+        for _, row in summary[summary['dataset'] == dataset['name']].iterrows():
+            if row['selected']:
+                info = prepared[dataset['name']]
+                name = Path(dataset['model_file']).stem
+                manifest = registry.register(
+                    name, joblib.load(row['candidate_path']), features=info['features'],
+                    metrics={'accuracy': row['accuracy']}, data_path=info['table'],
+                    training_seconds=row['fit_seconds'], extra={'model_name': row['model']}
+                )
+                registry.promote(name, manifest['version'])
+                os.replace(row['candidate_path'], output_dir / dataset['model_file'])
+                models_trained.append({
+                    'dataset': row['dataset'], 'accuracy': row['accuracy'], 'model': row['model']
+                })
+            else:
+                Path(row['candidate_path']).unlink(missing_ok=True)
+
+    summary = summary.drop(columns=['candidate_path'])
+    write_table(summary, training['summary_path'])
+
     # Summary
     print("\n" + "="*80)
     print("PRODUCTION ML MODELS TRAINING COMPLETE")
     print("="*80)
-    for m in models_trained:
-        print(f"✓ {m['dataset']}: {m['model']} (Accuracy: {m['accuracy']:.4f})")
-    
+    print(summary.to_string(index=False))
+
     avg_acc = sum(m['accuracy'] for m in models_trained) / len(models_trained)
     print(f"\nAverage Model Accuracy: {avg_acc:.4f}")
-    print("All models saved to: models/trained/")
+    print(f"Wall clock: {wall_seconds:.1f}s")
+    print(f"All models saved to: {output_dir}/ (versions in {training['registry']}/)")
+    print(f"Summary saved to: {training['summary_path']}")
     print("="*80)
-    
+
     return models_trained
 
 if __name__ == "__main__":
-    train_models()
+    parser = argparse.ArgumentParser(description="Train production models from the model config")
+    parser.add_argument('--config', default=CONFIG_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    train_models(args.config, args.workers)